@@ -7,7 +7,11 @@ import plotly.express as px
 from streamlit_lottie import st_lottie
 import requests
 from helpers.utils import (load_lottieurl, display_spotify_title, spotify_card, 
-                           display_footer, load_and_prepare_data, display_metric)
+                           display_footer, load_track_tables, load_track_frame, display_metric)
+from helpers.instrumentation import start_page, show_chart, render_metrics_overlay
+from helpers.query import aggregate_series
+from helpers.filters import render_global_filters, apply_global_filters, current_view_version, stop_if_empty
+from helpers.sketches import distinct_count
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -17,6 +21,9 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Instrumentasi: tandai awal run halaman ini
+start_page("app")
+
 # Menerapkan custom CSS
 with open("style/main.css") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
@@ -24,8 +31,9 @@ with open("style/main.css") as f:
 # Lottie animation
 lottie_music = load_lottieurl("https://assets7.lottiefiles.com/packages/lf20_w51pcehl.json")
 
-# Load dan persiapkan data
-df = load_and_prepare_data()
+# Load dan persiapkan data (lagu unik dan lagu per genre)
+tracks, _ = load_track_tables()
+genre_tracks = load_track_frame('playlist_genre')
 
 # Sidebar navigation
 st.sidebar.markdown("<div style='text-align: center; margin-bottom: 20px;'><h2 style='color: #1DB954;'>🎵 Spotify Insights</h2></div>", unsafe_allow_html=True)
@@ -48,6 +56,12 @@ st.sidebar.info("""
 Aplikasi ini menyajikan visualisasi data dari dataset Spotify untuk memahami tren musik, preferensi pendengar, dan karakteristik audio.
 """)
 
+# Filter global (genre, subgenre, tahun, popularitas) berlaku di semua halaman
+render_global_filters()
+tracks = apply_global_filters(tracks, "tracks")
+genre_tracks = apply_global_filters(genre_tracks, "genre_tracks")
+stop_if_empty(genre_tracks)
+
 # Halaman Beranda
 if selection == "🏠 Beranda":
     # Header section dengan animasi Lottie
@@ -67,19 +81,19 @@ if selection == "🏠 Beranda":
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        total_songs = len(df)
+        total_songs = len(tracks)
         display_metric("Total Lagu", f"{total_songs:,}", icon="🎵")
     
     with col2:
-        total_artists = df['track_artist'].nunique()
+        total_artists = distinct_count(tracks, 'track_artist', version=current_view_version(), name="tracks")
         display_metric("Jumlah Artis", f"{total_artists:,}", icon="👨‍🎤")
     
     with col3:
-        avg_popularity = round(df['track_popularity'].mean(), 1)
+        avg_popularity = round(tracks['track_popularity'].mean(), 1)
         display_metric("Rata-rata Popularitas", avg_popularity, icon="⭐")
     
     with col4:
-        genres = df['playlist_genre'].nunique()
+        genres = distinct_count(genre_tracks, 'playlist_genre', version=current_view_version(), name="genre_tracks")
         display_metric("Jumlah Genre", genres, icon="🎸")
     
     st.markdown("---")
@@ -147,7 +161,7 @@ if selection == "🏠 Beranda":
     with col1:
         # Scatter plot sederhana untuk danceability vs energy
         fig = px.scatter(
-            df.sample(1000), 
+            genre_tracks.sample(min(1000, len(genre_tracks))), 
             x="danceability", 
             y="energy",
             color="playlist_genre",
@@ -158,17 +172,11 @@ if selection == "🏠 Beranda":
             opacity=0.7
         )
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     with col2:
         # Bar chart untuk rata-rata popularitas per genre
-        genre_pop = df.groupby('playlist_genre')['track_popularity'].mean().sort_values(ascending=False)
+        genre_pop = aggregate_series(genre_tracks, 'playlist_genre', 'track_popularity', order_by='track_popularity', ascending=False)
         
         fig = px.bar(
             x=genre_pop.index, 
@@ -179,13 +187,7 @@ if selection == "🏠 Beranda":
             labels={"x": "Genre", "y": "Popularitas", "color": "Popularitas"}
         )
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white'
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     # Call to action
     st.markdown("""
@@ -195,5 +197,8 @@ if selection == "🏠 Beranda":
     </div>
     """, unsafe_allow_html=True)
 
+# Metrik performa (toggle di sidebar) dan ekspor file metrik
+render_metrics_overlay()
+
 # Footer
 display_footer()
@@ -0,0 +1,58 @@
+import argparse
+import time
+
+import plotly.express as px
+import plotly.io as pio
+import streamlit.logger as streamlit_logger
+from helpers.payload import optimize_figure
+from helpers.utils import load_track_frame, histogram_figure, scatter_figure
+
+# Kasus figure yang dibandingkan: (plotly.express, factory graph_objects) dengan argumen setara
+CASES = {
+    "histogram": (
+        lambda df: px.histogram(df, x="tempo", color="playlist_genre", nbins=30, opacity=0.7),
+        lambda df: histogram_figure(df, "tempo", "playlist_genre", nbins=30),
+    ),
+    "scatter": (
+        lambda df: px.scatter(df, x="danceability", y="track_popularity", color="playlist_genre",
+                              hover_name="track_name", hover_data=["track_artist"], opacity=0.7),
+        lambda df: scatter_figure(df, "danceability", "track_popularity", color="playlist_genre",
+                                  hover_name="track_name", hover_data=["track_artist"]),
+    ),
+    "ols": (
+        lambda df: px.scatter(df, x="energy", y="loudness", color="playlist_genre", trendline="ols", opacity=0.7),
+        lambda df: scatter_figure(df, "energy", "loudness", color="playlist_genre", trendline=True),
+    ),
+    "size": (
+        lambda df: px.scatter(df, x="valence", y="energy", color="playlist_genre", size="track_popularity",
+                              hover_name="track_name", opacity=0.7),
+        lambda df: scatter_figure(df, "valence", "energy", color="playlist_genre", size="track_popularity",
+                                  hover_name="track_name"),
+    ),
+}
+
+
+# Waktu build terbaik dan ukuran JSON setelah optimize_figure (payload yang dikirim show_chart)
+def measure(build, df, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fig = build(df)
+        times.append(time.perf_counter() - start)
+    return min(times), len(pio.to_json(optimize_figure(fig), validate=False).encode("utf-8"))
+
+
+# python -m benchmarks.figures --repeat 5
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark plotly.express vs factory graph_objects")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", default=",".join(CASES), help="kasus, dipisah koma")
+    arguments = parser.parse_args()
+    streamlit_logger.set_log_level("error")
+
+    df = load_track_frame('playlist_genre')
+    print(f"{len(df):,} baris, best of {arguments.repeat}")
+    for name in arguments.cases.split(","):
+        (px_time, px_size), (go_time, go_size) = (measure(build, df, arguments.repeat) for build in CASES[name])
+        print(f"{name:<10} px {px_time * 1000:7.1f} ms / {px_size / 1024:6.0f} KB  ->  "
+              f"go {go_time * 1000:7.1f} ms / {go_size / 1024:6.0f} KB")
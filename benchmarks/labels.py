@@ -0,0 +1,55 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit.logger as streamlit_logger
+from helpers.ranking import DIRECTION_COLORS
+from helpers.utils import label_isin, label_sign, map_categories
+
+GENRES = ["pop", "rap", "rock", "latin", "r&b", "edm"]
+
+
+# Frame sintetis: genre acak dan perubahan peringkat bertanda campuran
+def label_frame(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"playlist_genre": rng.choice(GENRES, rows), "change": rng.integers(-5, 6, rows)})
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return min(times), np.asarray(result)
+
+
+# python -m benchmarks.labels --rows 1000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark apply(lambda) vs helper label vektor")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+    streamlit_logger.set_log_level("error")
+
+    df = label_frame(arguments.rows)
+    highlight = ["pop", "rock"]
+    direction = label_sign(df["change"], "Naik", "Turun", "Tetap")
+    # Kasus: (apply baris per baris seperti kode lama, helper vektor pengganti)
+    cases = {
+        "highlight": (lambda: df["playlist_genre"].apply(lambda x: "Highlight" if x in highlight else "Background"),
+                      lambda: label_isin(df["playlist_genre"], highlight, "Highlight", "Background")),
+        "direction": (lambda: df["change"].apply(lambda x: "Naik" if x > 0 else "Turun" if x < 0 else "Tetap"),
+                      lambda: label_sign(df["change"], "Naik", "Turun", "Tetap")),
+        "colour": (lambda: pd.Series(direction).apply(lambda x: DIRECTION_COLORS.get(x)),
+                   lambda: map_categories(direction, DIRECTION_COLORS)),
+    }
+
+    print(f"{len(df):,} baris, best of {arguments.repeat}")
+    for name, (row_wise, vectorized) in cases.items():
+        (apply_time, expected), (helper_time, result) = best_of(row_wise, arguments.repeat), \
+            best_of(vectorized, arguments.repeat)
+        same = "sama" if np.array_equal(expected.astype(object), result.astype(object)) else "BERBEDA"
+        print(f"{name:<10} apply {apply_time * 1000:7.1f} ms  ->  helper {helper_time * 1000:7.1f} ms "
+              f"({apply_time / helper_time:4.1f}x, hasil {same})")
@@ -0,0 +1,48 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from helpers.utils import DATA_PATH, parse_release_dates
+
+
+# Kolom tanggal rilis dataset diperbesar ke `rows` baris dengan sampling acak (campuran YYYY, YYYY-MM, YYYY-MM-DD)
+def release_column(rows, seed=0):
+    values = pd.read_csv(DATA_PATH, usecols=['track_album_release_date'])['track_album_release_date'].to_numpy()
+    return pd.Series(values[np.random.default_rng(seed).integers(len(values), size=rows)])
+
+
+# Waktu terbaik dari beberapa percobaan beserta hasil percobaan terakhir
+def best_of(func, values, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(values)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+# python -m benchmarks.release_dates --rows 3000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark parse tanggal rilis format campuran")
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    arguments = parser.parse_args()
+
+    values = release_column(arguments.rows)
+    candidates = {
+        "pd.to_datetime(errors='coerce')": lambda v: pd.to_datetime(v, errors='coerce'),
+        "pd.to_datetime(format='mixed')": lambda v: pd.to_datetime(v, format='mixed', errors='coerce'),
+        "parse_release_dates": lambda v: parse_release_dates(v)['date'],
+    }
+    results = {}
+    print(f"{len(values):,} baris, {values.nunique():,} nilai unik, best of {arguments.repeat}")
+    for label, func in candidates.items():
+        elapsed, results[label] = best_of(func, values, arguments.repeat)
+        print(f"{label:<34}{elapsed:>8.2f} s{results[label].isna().mean():>8.1%} NaT")
+
+    # Cek kesamaan dengan format='mixed' untuk semua nilai yang berhasil di-parse keduanya
+    mixed, ours = results["pd.to_datetime(format='mixed')"], results["parse_release_dates"]
+    both = mixed.notna() & ours.notna()
+    print(f"sama dengan format='mixed': {(mixed[both] == ours[both]).mean():.2%} dari {both.sum():,} nilai, "
+          f"valid hanya di format='mixed': {(mixed.notna() & ours.isna()).sum():,}")
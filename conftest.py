@@ -0,0 +1 @@
+# conftest di root repo: pytest menambahkan folder ini ke sys.path sehingga tests/ bisa mengimpor helpers.*
@@ -0,0 +1,333 @@
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+import requests
+import streamlit.logger as streamlit_logger
+from helpers.instrumentation import instrumented_cache, record
+from helpers.query import aggregate, aggregate_series
+from helpers.filters import apply_global_filters, global_filter_key, view_version
+from helpers.similarity import SIMILARITY_METRICS, build_similarity_index
+from helpers.utils import (get_dataset_version, load_track_tables, load_track_frame, load_and_prepare_data,
+                           histogram_counts)
+
+# Mode klien: kosong = endpoint dipanggil langsung di proses Streamlit, "local" = server HTTP in-process,
+# URL lain (mis. http://compute:8765) = worker terpisah yang dijalankan dengan `python -m helpers.api`
+API_URL = os.environ.get("SPOTIFY_API_URL", "").rstrip("/")
+
+# Alamat server untuk mode "local" dan worker terpisah
+API_HOST = os.environ.get("SPOTIFY_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("SPOTIFY_API_PORT", 8765))
+
+# Jumlah respons yang disimpan di cache server dan klien, dan batas waktu request klien (detik)
+API_CACHE_ENTRIES = 256
+API_TIMEOUT = 30
+
+# Prefix path endpoint
+API_PREFIX = "/v1/"
+
+# Registry endpoint: nama -> fungsi(key filter, **parameter string) yang mengembalikan {nama tabel: DataFrame}
+ENDPOINTS = {}
+
+# Server in-process (mode "local"), cache respons server dan cache ETag klien
+_server = []
+_server_lock = threading.Lock()
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+_client_cache = OrderedDict()
+_client_lock = threading.Lock()
+
+
+# Kesalahan parameter dari klien (dijawab dengan HTTP 400)
+class ApiError(ValueError):
+    pass
+
+
+# Dekorator untuk mendaftarkan endpoint
+def endpoint(name):
+    def register(func):
+        ENDPOINTS[name] = func
+        return func
+    return register
+
+
+# Frame dasar yang dilayani API beserta nama filter globalnya
+def _frame(name, key):
+    if name == "tracks":
+        frame, _ = load_track_tables()
+    elif name == "playlist_rows":
+        frame = load_and_prepare_data()
+    else:
+        frame = load_track_frame('playlist_subgenre' if name == "subgenre_tracks" else 'playlist_genre')
+    return apply_global_filters(frame, name, key)
+
+
+# Validasi parameter string dari query: bilangan bulat (dengan batas bawah) dan bilangan
+def _int(value, name, minimum=1):
+    try:
+        number = int(value)
+    except ValueError:
+        raise ApiError(f"Parameter {name} harus bilangan bulat")
+    if number < minimum:
+        raise ApiError(f"Parameter {name} minimal {minimum}")
+    return number
+
+
+def _float(value, name):
+    try:
+        return float(value)
+    except ValueError:
+        raise ApiError(f"Parameter {name} harus bilangan")
+
+
+@endpoint("genre-popularity")
+def _genre_popularity(key, year=None):
+    df = _frame("genre_tracks", key)
+    where = [('year', '==', _float(year, "year"))] if year is not None else []
+    result = aggregate_series(df, 'playlist_genre', 'track_popularity', where=where,
+                              order_by='track_popularity', ascending=False, name="genre_tracks",
+                              version=view_version(key))
+    return {"popularity": result.reset_index()}
+
+
+@endpoint("genre-popularity-by-year")
+def _genre_popularity_by_year(key, min_year=None):
+    df = _frame("genre_tracks", key)
+    where = [('year', '>=', _float(min_year, "min_year"))] if min_year is not None else []
+    trend = aggregate_series(df, ['year', 'playlist_genre'], 'track_popularity', where=where, name="genre_tracks",
+                             version=view_version(key))
+    return {"trend": trend.reset_index()}
+
+
+@endpoint("top-artists")
+def _top_artists(key, n="10", genre=None):
+    name = "genre_tracks" if genre else "tracks"
+    where = [('playlist_genre', '==', genre)] if genre else []
+    result = aggregate_series(_frame(name, key), 'track_artist', 'track_popularity', where=where,
+                              order_by='track_popularity', ascending=False, limit=_int(n, "n"), name=name,
+                              version=view_version(key))
+    return {"artists": result.reset_index()}
+
+
+@endpoint("subgenre-stats")
+def _subgenre_stats(key, genre=None):
+    df = _frame("playlist_rows", key)
+    where = [('playlist_genre', '==', genre)] if genre else []
+    stats = aggregate(df, 'playlist_subgenre', {'songs': ('track_key', 'count'),
+                                                'track_popularity': ('track_popularity', 'mean')}, where=where,
+                      name="playlist_rows", version=view_version(key))
+    return {"subgenres": stats.reset_index()}
+
+
+@endpoint("histogram")
+def _histogram(key, column, bins="30", by=None, genre=None):
+    df = _frame("genre_tracks", key)
+    if column not in df.columns or (by is not None and by not in df.columns):
+        raise ApiError(f"Kolom tidak dikenal: {column if column not in df.columns else by}")
+    if genre:
+        df = df[df['playlist_genre'] == genre]
+    return {"counts": histogram_counts(df, column, by, _int(bins, "bins"))}
+
+
+@endpoint("similarity")
+def _similarity(key, level, metric="euclidean", anchor=None, size="20"):
+    df = _frame("playlist_rows", key)
+    if level not in df.columns:
+        raise ApiError(f"Level tidak dikenal: {level}")
+    if metric not in SIMILARITY_METRICS.values():
+        raise ApiError(f"Metrik tidak dikenal: {metric}")
+    index = build_similarity_index(df, view_version(key), level, metric)
+    if anchor is not None and anchor not in index.labels:
+        raise ApiError(f"Entitas acuan tidak dikenal: {anchor}")
+    labels = index.clustered_subset(anchor, _int(size, "size"))
+    result = {
+        "entities": pd.DataFrame({"entity": index.labels_by_size()}),
+        "matrix": index.matrix(labels).rename_axis("entity").reset_index()
+    }
+    if anchor is not None:
+        result["neighbors"] = index.most_similar(anchor)
+    return result
+
+
+# Parameter kanonik (string, terurut, tanpa nilai kosong) agar kunci cache dan ETag stabil
+def _canonical(params):
+    return {name: str(value) for name, value in sorted(params.items()) if value is not None}
+
+
+# Key filter global dari JSON ([[kolom, [nilai...]], ...]) menjadi tuple yang bisa di-hash
+def _filter_key(text):
+    try:
+        return tuple((column, tuple(values)) for column, values in json.loads(text or "[]"))
+    except (ValueError, TypeError):
+        raise ApiError("Parameter filters tidak valid")
+
+
+# ETag ditentukan dari versi dataset + endpoint + parameter, sehingga bisa dicek sebelum menghitung apa pun
+def make_etag(version, name, params):
+    digest = hashlib.sha1(json.dumps([version, name, params], sort_keys=True).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+# Hasil endpoint di-cache per versi dataset, endpoint dan parameter (dipakai juga oleh mode in-process langsung)
+# Hanya parameter yang tidak dikenal/kurang (dicek lewat signature) dan validasi di endpoint yang menjadi ApiError;
+# error lain dari dalam endpoint tetap diteruskan (HTTP 500)
+@instrumented_cache("api", show_spinner=False, max_entries=API_CACHE_ENTRIES)
+def _compute(version, name, params_json):
+    if name not in ENDPOINTS:
+        raise KeyError(name)
+    params = json.loads(params_json)
+    key = _filter_key(params.pop("filters", None))
+    try:
+        inspect.signature(ENDPOINTS[name]).bind(key, **params)
+    except TypeError as error:
+        raise ApiError(f"Parameter tidak valid untuk {name}: {error}")
+    return ENDPOINTS[name](key, **params)
+
+
+# Respons JSON: setiap tabel dalam format split (kolom + baris), tanpa indeks
+def encode_response(version, name, tables):
+    parts = ", ".join(f"{json.dumps(table)}: {frame.to_json(orient='split', index=False, date_format='iso')}"
+                      for table, frame in tables.items())
+    return f'{{"version": {json.dumps(version)}, "endpoint": {json.dumps(name)}, "data": {{{parts}}}}}'.encode("utf-8")
+
+
+def decode_response(body):
+    payload = json.loads(body)
+    return {table: pd.DataFrame(part["data"], columns=part["columns"]) for table, part in payload["data"].items()}
+
+
+# Body respons server di-cache per ETag (LRU)
+def _response_body(version, name, params, etag):
+    with _responses_lock:
+        if etag in _responses:
+            _responses.move_to_end(etag)
+            return _responses[etag]
+    body = encode_response(version, name, _compute(version, name, json.dumps(params, sort_keys=True)))
+    with _responses_lock:
+        _responses[etag] = body
+        while len(_responses) > API_CACHE_ENTRIES:
+            _responses.popitem(last=False)
+    return body
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "SpotifyAPI/1.0"
+
+    def _send(self, status, body=b"", etag=None):
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+
+    def _error(self, status, message):
+        self._send(status, json.dumps({"error": message}).encode("utf-8"))
+
+    def do_GET(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        version = get_dataset_version()
+        if url.path == "/health":
+            return self._send(200, json.dumps({"status": "ok", "version": version,
+                                               "endpoints": sorted(ENDPOINTS)}).encode("utf-8"))
+        name = url.path[len(API_PREFIX):] if url.path.startswith(API_PREFIX) else None
+        if name not in ENDPOINTS:
+            return self._error(404, f"Endpoint tidak dikenal: {url.path}")
+
+        params = _canonical(dict(parse_qsl(url.query)))
+        etag = make_etag(version, name, params)
+        if etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            self._send(304, etag=etag)
+        else:
+            try:
+                body = _response_body(version, name, params, etag)
+            except ApiError as error:
+                return self._error(400, str(error))
+            except Exception as error:
+                return self._error(500, f"{type(error).__name__}: {error}")
+            self._send(200, body, etag)
+        record("api", name, time.perf_counter() - start, page="api")
+
+    # Log akses per request dimatikan; durasi tercatat lewat metrik "api"
+    def log_message(self, format, *args):
+        pass
+
+
+# Menjalankan server API (blocking); dipakai worker terpisah
+def serve(host=API_HOST, port=API_PORT):
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+# Server API di thread daemon dalam proses ini, dibuat sekali untuk semua sesi (mode "local")
+def start_api_server(host=API_HOST, port=API_PORT):
+    with _server_lock:
+        if not _server:
+            server = ThreadingHTTPServer((host, port), ApiHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="spotify-api", daemon=True).start()
+            _server.append(server)
+        return _server[0]
+
+
+def _base_url():
+    if API_URL == "local":
+        host, port = start_api_server().server_address[:2]
+        return f"http://{host}:{port}"
+    return API_URL
+
+
+# Klien endpoint untuk halaman: filter global ikut dikirim, hasil berupa {nama tabel: DataFrame}
+# Lewat HTTP, respons disimpan per URL dan divalidasi ulang dengan If-None-Match (304 = pakai salinan lokal)
+# Kedua mode mengembalikan salinan agar halaman tidak bisa mengubah tabel di cache bersama
+def fetch(name, **params):
+    params = _canonical({**params, "filters": json.dumps(global_filter_key())})
+    if not API_URL:
+        tables = _compute(get_dataset_version(), name, json.dumps(params, sort_keys=True))
+        return {table: frame.copy() for table, frame in tables.items()}
+
+    url = f"{_base_url()}{API_PREFIX}{name}"
+    cache_key = (url, tuple(params.items()))
+    with _client_lock:
+        cached = _client_cache.get(cache_key)
+    start = time.perf_counter()
+    response = requests.get(url, params=params, timeout=API_TIMEOUT,
+                            headers={"If-None-Match": cached[0]} if cached else {})
+    if response.status_code == 304 and cached:
+        tables = cached[1]
+    else:
+        if response.status_code != 200:
+            raise RuntimeError(f"API {name} gagal ({response.status_code}): {response.text[:200]}")
+        tables = decode_response(response.content)
+        with _client_lock:
+            _client_cache[cache_key] = (response.headers.get("ETag"), tables)
+            while len(_client_cache) > API_CACHE_ENTRIES:
+                _client_cache.popitem(last=False)
+    record("api_client", name, time.perf_counter() - start, size=len(response.content))
+    return {table: frame.copy() for table, frame in tables.items()}
+
+
+# Worker terpisah: python -m helpers.api --host 0.0.0.0 --port 8765
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Layanan agregasi Spotify (HTTP/JSON)")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    arguments = parser.parse_args()
+    # Di luar `streamlit run` setiap akses cache memicu peringatan bare mode; cukup tampilkan error
+    streamlit_logger.set_log_level("error")
+    print(f"Layanan API berjalan di http://{arguments.host}:{arguments.port}{API_PREFIX}")
+    serve(arguments.host, arguments.port)
@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from helpers.instrumentation import instrumented_cache
+from helpers.utils import get_dataset_version, load_track_tables
+
+# Fitur mood untuk klastering (semuanya berskala 0-1, jadi tidak perlu standarisasi)
+MOOD_FEATURES = ["valence", "energy", "danceability", "acousticness", "instrumentalness"]
+
+# Jumlah klaster default dan pilihan yang ditawarkan di halaman
+MOOD_CLUSTERS = 6
+MOOD_CLUSTER_OPTIONS = [4, 5, 6, 7, 8]
+
+# Parameter mini-batch k-means: ukuran batch, jumlah pass atas data, ukuran chunk streaming
+BATCH_SIZE = 1024
+EPOCHS = 5
+CHUNK_ROWS = 250_000
+
+# Nama kuadran mood (valence tinggi/rendah, energy tinggi/rendah), sama dengan Mood Matrix
+MOOD_QUADRANTS = {(True, True): "Happy/Excited", (True, False): "Chill/Peaceful",
+                  (False, True): "Angry/Tense", (False, False): "Sad/Depressing"}
+
+
+# Iterasi chunk baris dengan fitur lengkap (sumber bisa array di memori atau generator chunk dari file)
+def _chunks(values, chunk_rows=CHUNK_ROWS):
+    sources = [values] if isinstance(values, np.ndarray) else values
+    for source in sources:
+        for start in range(0, len(source), chunk_rows):
+            block = np.asarray(source[start:start + chunk_rows], dtype=np.float64)
+            yield block[np.isfinite(block).all(axis=1)]
+
+
+# Fungsi untuk memberi label klaster terdekat secara batch (jarak kuadrat lewat ||x||^2 - 2x.c + ||c||^2)
+def assign_clusters(values, centroids, chunk_rows=CHUNK_ROWS):
+    values = np.asarray(values, dtype=np.float64)
+    labels = np.full(len(values), -1, dtype=np.int16)
+    squared = (centroids ** 2).sum(axis=1)
+    for start in range(0, len(values), chunk_rows):
+        block = values[start:start + chunk_rows]
+        valid = np.isfinite(block).all(axis=1)
+        distances = squared - 2 * block[valid] @ centroids.T
+        labels[start:start + chunk_rows][valid] = distances.argmin(axis=1)
+    return labels
+
+
+# Inisialisasi k-means++ pada sampel chunk pertama
+def _init_centroids(sample, n_clusters, rng):
+    centroids = [sample[rng.integers(len(sample))]]
+    for _ in range(1, n_clusters):
+        distances = ((sample[:, None, :] - np.array(centroids)[None]) ** 2).sum(axis=2).min(axis=1)
+        centroids.append(sample[rng.choice(len(sample), p=distances / distances.sum())])
+    return np.array(centroids)
+
+
+# Mini-batch k-means streaming: setiap batch memindahkan centroid ke rata-rata anggotanya dengan laju 1/jumlah
+# (rumus agregat dari update per titik Sculley), sehingga data cukup dibaca per chunk
+def fit_minibatch_kmeans(values, n_clusters=MOOD_CLUSTERS, batch_size=BATCH_SIZE, epochs=EPOCHS, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids, counts = None, np.zeros(n_clusters)
+    for _ in range(epochs):
+        for chunk in _chunks(values):
+            if centroids is None:
+                centroids = _init_centroids(chunk[rng.choice(len(chunk), min(len(chunk), 10 * batch_size),
+                                                             replace=False)], n_clusters, rng)
+            chunk = chunk[rng.permutation(len(chunk))]
+            for start in range(0, len(chunk), batch_size):
+                batch = chunk[start:start + batch_size]
+                labels = assign_clusters(batch, centroids)
+                batch_counts = np.bincount(labels, minlength=n_clusters)
+                sums = np.column_stack([np.bincount(labels, weights=batch[:, i], minlength=n_clusters)
+                                        for i in range(batch.shape[1])])
+                counts += batch_counts
+                moved = batch_counts > 0
+                centroids[moved] += (sums[moved] - batch_counts[moved, None] * centroids[moved]) / counts[moved, None]
+    return centroids
+
+
+# Nama klaster dari centroid: kuadran valence/energy, ditambah ciri fitur lain yang menonjol
+def cluster_names(centroids):
+    names = []
+    for i, centroid in enumerate(centroids):
+        values = dict(zip(MOOD_FEATURES, centroid))
+        name = MOOD_QUADRANTS[(values["valence"] >= 0.5, values["energy"] >= 0.5)]
+        traits = [label for feature, label in (("danceability", "Dance"), ("acousticness", "Akustik"),
+                                               ("instrumentalness", "Instrumental")) if values[feature] >= 0.6]
+        names.append(f"{i + 1}. {name}" + (f" ({', '.join(traits)})" if traits else ""))
+    return names
+
+
+# Membangun klaster mood untuk seluruh lagu unik: centroid terurut (energy naik), label per lagu dan ringkasannya
+def build_mood_clusters(tracks, n_clusters=MOOD_CLUSTERS, seed=0):
+    values = tracks[MOOD_FEATURES].to_numpy(dtype=np.float64)
+    centroids = fit_minibatch_kmeans(values, n_clusters, seed=seed)
+    centroids = centroids[np.lexsort((centroids[:, 0], centroids[:, 1]))]
+    labels = assign_clusters(values, centroids)
+    names = cluster_names(centroids)
+    valid = labels >= 0
+    inertia = float(((values[valid] - centroids[labels[valid]]) ** 2).sum())
+    return {
+        "centroids": pd.DataFrame(centroids, index=names, columns=MOOD_FEATURES),
+        "labels": pd.Series(labels, index=tracks.index, name="mood_cluster"),
+        "names": names,
+        "sizes": pd.Series(np.bincount(labels[valid], minlength=n_clusters), index=names),
+        "inertia": inertia
+    }
+
+
+# Centroid dan label di-cache per versi dataset dan jumlah klaster
+@instrumented_cache("mood_clusters", show_spinner="Mengelompokkan lagu berdasarkan mood...", max_entries=8)
+def _load_mood_clusters(version, n_clusters):
+    tracks, _ = load_track_tables()
+    return build_mood_clusters(tracks, n_clusters)
+
+def load_mood_clusters(n_clusters=MOOD_CLUSTERS):
+    return _load_mood_clusters(get_dataset_version(), n_clusters)
+
+
+# Fungsi untuk menambahkan kolom nama klaster ke frame apa pun yang punya track_key
+def with_mood_cluster(df, clusters):
+    labels = clusters["labels"].to_numpy()[df['track_key'].to_numpy()] if 'track_key' in df else \
+        clusters["labels"].reindex(df.index).to_numpy()
+    names = np.array(clusters["names"] + [None], dtype=object)
+    return df.assign(mood_cluster=names[labels])
+
+
+# Radar chart centroid klaster (bisa beberapa klaster sekaligus)
+def plot_cluster_radar(clusters, selected):
+    fig = go.Figure()
+    for name in selected:
+        fig.add_trace(go.Scatterpolar(
+            r=clusters["centroids"].loc[name].values,
+            theta=MOOD_FEATURES,
+            fill='toself',
+            name=name
+        ))
+    fig.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 1]
+            )
+        ),
+        title="Profil Mood per Klaster",
+        height=500
+    )
+    return fig
@@ -0,0 +1,210 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from scipy.stats import rankdata
+from helpers.instrumentation import instrumented_cache
+
+# Fitur yang dikorelasikan (popularitas dan fitur audio)
+CORRELATION_FEATURES = ["track_popularity", "danceability", "energy", "valence", "acousticness",
+                        "instrumentalness", "speechiness", "liveness", "loudness", "tempo", "duration_min"]
+
+# Metode korelasi (label -> metode)
+CORRELATION_METHODS = {"Pearson": "pearson", "Spearman": "spearman"}
+
+# Level pengelompokan (label -> kolom; None = seluruh lagu)
+CORRELATION_LEVELS = {"Semua Lagu": None, "Genre": "playlist_genre", "Subgenre": "playlist_subgenre"}
+
+# Indeks terakhir per level, dipakai untuk pembaruan inkremental saat data hanya bertambah di akhir
+_latest = {}
+_latest_lock = threading.Lock()
+
+
+# Co-moment per grup: jumlah baris n, rata-rata, dan matriks co-moment sum((x - mean)(x - mean)^T)
+# Baris diurutkan per grup sekali, lalu setiap grup satu perkalian matriks; rank=True meranking nilai di dalam grup (Spearman)
+def co_moments(values, codes, n_groups, rank=False):
+    k = values.shape[1]
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(n_groups + 1))
+    accumulator = {"n": np.diff(bounds).astype(np.float64), "mean": np.zeros((n_groups, k)),
+                   "comoment": np.zeros((n_groups, k, k))}
+    for g in range(n_groups):
+        block = values[order[bounds[g]:bounds[g + 1]]]
+        if not len(block):
+            continue
+        if rank:
+            block = rankdata(block, axis=0)
+        mean = block.mean(axis=0)
+        centered = block - mean
+        accumulator["mean"][g] = mean
+        accumulator["comoment"][g] = centered.T @ centered
+    return accumulator
+
+
+# Menggabungkan dua akumulator dengan grup yang sama (rumus Chan, stabil secara numerik)
+def merge_co_moments(a, b):
+    n = a["n"] + b["n"]
+    delta = b["mean"] - a["mean"]
+    weight = np.divide(a["n"] * b["n"], n, out=np.zeros_like(n), where=n > 0)
+    share = np.divide(b["n"], n, out=np.zeros_like(n), where=n > 0)
+    return {
+        "n": n,
+        "mean": a["mean"] + delta * share[:, None],
+        "comoment": a["comoment"] + b["comoment"] + delta[:, :, None] * delta[:, None, :] * weight[:, None, None]
+    }
+
+
+# Memperluas akumulator ke daftar grup baru (grup yang belum ada diisi nol)
+def _align(accumulator, groups, new_groups):
+    position = new_groups.get_indexer(groups)
+    k = accumulator["mean"].shape[1]
+    aligned = {"n": np.zeros(len(new_groups)), "mean": np.zeros((len(new_groups), k)),
+               "comoment": np.zeros((len(new_groups), k, k))}
+    for key in aligned:
+        aligned[key][position] = accumulator[key]
+    return aligned
+
+
+# Matriks korelasi dari co-moment satu grup
+def correlation_from(accumulator, position):
+    comoment = accumulator["comoment"][position]
+    scale = np.sqrt(np.diag(comoment))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = comoment / np.outer(scale, scale)
+    np.fill_diagonal(matrix, np.where(scale > 0, 1.0, np.nan))
+    return np.clip(matrix, -1, 1)
+
+
+def _valid_rows(df, level):
+    columns = CORRELATION_FEATURES + ([level] if level else [])
+    return df[columns][df[columns].notna().all(axis=1)]
+
+
+def _group_codes(frame, level, groups=None):
+    if level is None:
+        return np.zeros(len(frame), dtype=np.int64), pd.Index(["Semua Lagu"])
+    if groups is None:
+        codes, groups = pd.factorize(frame[level], sort=True)
+        return codes.astype(np.int64), pd.Index(groups)
+    return groups.get_indexer(frame[level]).astype(np.int64), groups
+
+
+# Sidik jari isi tabel, untuk memastikan data lama tidak berubah sebelum pembaruan inkremental
+def _fingerprint(frame):
+    return int(pd.util.hash_pandas_object(frame, index=False).to_numpy().sum(dtype=np.uint64))
+
+
+# Membangun indeks korelasi (akumulator Pearson dan Spearman per grup) dari nol
+def build_correlation_index(df, level=None):
+    frame = _valid_rows(df, level)
+    codes, groups = _group_codes(frame, level)
+    return {
+        "level": level,
+        "groups": groups,
+        "rows": len(df),
+        "fingerprint": _fingerprint(df[CORRELATION_FEATURES + ([level] if level else [])]),
+        "pearson": co_moments(frame[CORRELATION_FEATURES].to_numpy(dtype=np.float64), codes, len(groups)),
+        "spearman": co_moments(frame[CORRELATION_FEATURES].to_numpy(dtype=np.float64), codes, len(groups), rank=True)
+    }
+
+
+# Pembaruan inkremental untuk baris yang ditambahkan di akhir tabel:
+# akumulator Pearson digabung dengan co-moment baris baru, Spearman dihitung ulang hanya untuk grup yang berubah
+def update_correlation_index(index, df):
+    level = index["level"]
+    appended = _valid_rows(df.iloc[index["rows"]:], level)
+    new_groups = index["groups"].union(pd.Index(appended[level].unique())) if level else index["groups"]
+    codes, _ = _group_codes(appended, level, new_groups)
+    pearson = merge_co_moments(_align(index["pearson"], index["groups"], new_groups),
+                               co_moments(appended[CORRELATION_FEATURES].to_numpy(dtype=np.float64), codes,
+                                          len(new_groups)))
+
+    # Ranking bergeser saat baris baru masuk, jadi grup yang menerima baris baru diranking ulang seluruhnya
+    spearman = _align(index["spearman"], index["groups"], new_groups)
+    changed = np.unique(codes)
+    frame = _valid_rows(df, level)
+    if level:
+        frame = frame[frame[level].isin(new_groups[changed])]
+    frame_codes, _ = _group_codes(frame, level, new_groups)
+    recomputed = co_moments(frame[CORRELATION_FEATURES].to_numpy(dtype=np.float64), frame_codes, len(new_groups), rank=True)
+    for key in spearman:
+        spearman[key][changed] = recomputed[key][changed]
+
+    return {
+        "level": level,
+        "groups": new_groups,
+        "rows": len(df),
+        "fingerprint": _fingerprint(df[CORRELATION_FEATURES + ([level] if level else [])]),
+        "pearson": pearson,
+        "spearman": spearman
+    }
+
+
+# Indeks korelasi untuk satu frame: diperbarui inkremental jika frame = indeks terakhir + baris baru di akhir
+def correlation_index(df, level=None):
+    columns = CORRELATION_FEATURES + ([level] if level else [])
+    with _latest_lock:
+        previous = _latest.get(level)
+    if (previous is not None and previous["rows"] < len(df)
+            and _fingerprint(df[columns].iloc[:previous["rows"]]) == previous["fingerprint"]):
+        index = update_correlation_index(previous, df)
+    elif previous is not None and previous["rows"] == len(df) and _fingerprint(df[columns]) == previous["fingerprint"]:
+        index = previous
+    else:
+        index = build_correlation_index(df, level)
+    with _latest_lock:
+        _latest[level] = index
+    return index
+
+
+# Indeks korelasi di-cache per versi data (dataset + filter global) dan level grup
+@instrumented_cache("correlation_index", show_spinner=False, max_entries=32)
+def load_correlation_index(_df, version, level):
+    return correlation_index(_df, level)
+
+
+# Matriks korelasi sebagai DataFrame untuk metode dan grup tertentu (None = grup pertama / seluruh lagu)
+def correlation_frame(index, method="pearson", group=None):
+    position = 0 if group is None else index["groups"].get_loc(group)
+    matrix = correlation_from(index[method], position)
+    return pd.DataFrame(matrix, index=CORRELATION_FEATURES, columns=CORRELATION_FEATURES)
+
+
+# Jumlah lagu yang membentuk matriks satu grup
+def correlation_count(index, group=None):
+    position = 0 if group is None else index["groups"].get_loc(group)
+    return int(index["pearson"]["n"][position])
+
+
+# Pasangan fitur dengan korelasi terkuat (nilai absolut), tanpa diagonal dan duplikat
+def top_correlations(matrix, n=5, feature=None):
+    upper = matrix.where(np.triu(np.ones(matrix.shape, dtype=bool), k=1)).stack().rename("correlation")
+    pairs = upper.rename_axis(["feature_a", "feature_b"]).reset_index()
+    if feature is not None:
+        pairs = pairs[(pairs["feature_a"] == feature) | (pairs["feature_b"] == feature)]
+    return pairs.reindex(pairs["correlation"].abs().sort_values(ascending=False).index).head(n)
+
+
+# Heatmap matriks korelasi dengan nilai di setiap sel
+def plot_correlation_heatmap(matrix, title):
+    labels = [column.replace('_', ' ').capitalize() for column in matrix.columns]
+    fig = go.Figure(go.Heatmap(
+        z=matrix.to_numpy(),
+        x=labels,
+        y=labels,
+        zmin=-1,
+        zmax=1,
+        zmid=0,
+        colorscale='RdBu',
+        reversescale=True,
+        texttemplate="%{z:.2f}",
+        hovertemplate="%{y} × %{x}: %{z:.3f}<extra></extra>",
+        colorbar=dict(title='Korelasi')
+    ))
+    fig.update_layout(
+        title=title,
+        height=650,
+        yaxis=dict(autorange='reversed')
+    )
+    return fig
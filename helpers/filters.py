@@ -0,0 +1,234 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from helpers.instrumentation import instrumented_cache
+from helpers.utils import get_dataset_version, load_track_tables
+
+# Kolom dengan nilai unik sebanyak ini atau kurang disimpan sebagai bitmap; sisanya cukup daftar posisi baris
+BITMAP_MAX_VALUES = 256
+
+
+# Indeks satu kolom: posisi baris terurut per nilai, plus bitmap terkompresi (packbits) untuk kolom berkardinalitas rendah
+class ColumnIndex:
+    def __init__(self, values):
+        codes, self.values = pd.factorize(values, sort=True)
+        self.n_rows = len(codes)
+        missing = int((codes < 0).sum())
+        self.order = np.argsort(codes, kind='stable')[missing:]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.values))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        self.bitmaps = None
+        if len(self.values) <= BITMAP_MAX_VALUES:
+            self.bitmaps = np.zeros((len(self.values), (self.n_rows + 7) // 8), dtype=np.uint8)
+            for code in range(len(self.values)):
+                self.bitmaps[code] = self._pack(self.positions_of([code]))
+
+    def _pack(self, positions):
+        bits = np.zeros(self.n_rows, dtype=bool)
+        bits[positions] = True
+        return np.packbits(bits)
+
+    # Kode nilai untuk predikat: skalar (sama dengan), list/set (isin), atau slice (rentang inklusif)
+    def codes_for(self, predicate):
+        if isinstance(predicate, slice):
+            lo = 0 if predicate.start is None else self.values.searchsorted(predicate.start, side='left')
+            hi = len(self.values) if predicate.stop is None else self.values.searchsorted(predicate.stop, side='right')
+            return np.arange(lo, hi)
+        wanted = predicate if isinstance(predicate, (list, tuple, set, np.ndarray, pd.Index)) else [predicate]
+        codes = self.values.get_indexer(list(wanted))
+        return np.unique(codes[codes >= 0])
+
+    # Posisi baris (terurut) untuk sekumpulan kode nilai
+    def positions_of(self, codes):
+        parts = [self.order[self.offsets[c]:self.offsets[c + 1]] for c in codes]
+        if len(parts) == 1:
+            return np.sort(parts[0])
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    # Bitmap terkompresi untuk sekumpulan kode nilai (OR antar bitmap nilai)
+    def bitmap_of(self, codes):
+        if self.bitmaps is None:
+            return self._pack(self.positions_of(codes))
+        if len(codes) == 0:
+            return np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        return np.bitwise_or.reduce(self.bitmaps[codes], axis=0)
+
+
+# Indeks filter untuk satu frame: indeks kolom dibangun saat pertama kali dipakai, lalu dipakai ulang
+class FilterIndex:
+    def __init__(self, df):
+        self.df = df
+        self.n_rows = len(df)
+        self.columns = {}
+        self.lock = threading.Lock()
+
+    def column(self, name):
+        with self.lock:
+            if name not in self.columns:
+                self.columns[name] = ColumnIndex(self.df[name])
+            return self.columns[name]
+
+    # Posisi baris yang memenuhi semua predikat (AND), tanpa memindai kolom
+    def select(self, **predicates):
+        predicates = {k: v for k, v in predicates.items() if v is not None}
+        if not predicates:
+            return np.arange(self.n_rows)
+
+        resolved = [(self.column(name), self.column(name).codes_for(p)) for name, p in predicates.items()]
+        if len(resolved) == 1:
+            index, codes = resolved[0]
+            return index.positions_of(codes)
+
+        combined = resolved[0][0].bitmap_of(resolved[0][1])
+        for index, codes in resolved[1:]:
+            np.bitwise_and(combined, index.bitmap_of(codes), out=combined)
+        return np.flatnonzero(np.unpackbits(combined, count=self.n_rows))
+
+    # Frame hasil filter
+    def frame(self, **predicates):
+        return self.df.iloc[self.select(**predicates)]
+
+
+# Indeks filter di-cache per versi data (dataset + filter global) dan nama frame
+@instrumented_cache("filter_index", show_spinner=False, max_entries=64)
+def load_filter_index(_df, version, name):
+    return FilterIndex(_df)
+
+
+# Fungsi untuk memfilter frame lewat indeks, contoh: filter_rows(df, "tracks", playlist_genre="pop", year=slice(2010, 2020))
+def filter_rows(df, name, **predicates):
+    return load_filter_index(df, current_view_version(), name).frame(**predicates)
+
+
+# Kunci session state untuk filter global (bukan kunci widget, sehingga tetap ada saat pindah halaman)
+GLOBAL_FILTER_KEY = "global_filters"
+
+# Rentang popularitas lagu
+POPULARITY_RANGE = (0, 100)
+
+
+# Fungsi untuk mendapatkan filter global aktif dari session state
+def get_global_filters():
+    return st.session_state.setdefault(GLOBAL_FILTER_KEY, {
+        "genres": [],
+        "subgenres": [],
+        "years": None,
+        "popularity": POPULARITY_RANGE
+    })
+
+
+# Callback widget: salin nilai widget ke filter global
+def _sync_global_filter(name):
+    get_global_filters()[name] = st.session_state[f"global_filter_{name}"]
+
+
+# Kunci kombinasi filter yang ternormalisasi (tuple, bisa di-hash) — filter kosong tidak ikut
+def global_filter_key():
+    filters = get_global_filters()
+    key = []
+    if filters["genres"]:
+        key.append(("playlist_genre", tuple(sorted(filters["genres"]))))
+    if filters["subgenres"]:
+        key.append(("playlist_subgenre", tuple(sorted(filters["subgenres"]))))
+    if filters["years"] is not None:
+        key.append(("year", tuple(filters["years"])))
+    if tuple(filters["popularity"]) != POPULARITY_RANGE:
+        key.append(("track_popularity", tuple(filters["popularity"])))
+    return tuple(key)
+
+
+# Versi tampilan data: versi dataset + kombinasi filter global, dipakai sebagai kunci cache turunan
+def view_version(key):
+    return f"{get_dataset_version()}|{key}" if key else get_dataset_version()
+
+def current_view_version():
+    return view_version(global_filter_key())
+
+
+# Fungsi untuk menampilkan filter global di sidebar (dipakai di semua halaman)
+def render_global_filters():
+    from helpers.utils import load_track_frame
+
+    filters = get_global_filters()
+    options = load_track_frame('playlist_subgenre')
+    genres = sorted(options['playlist_genre'].dropna().unique())
+    min_year, max_year = int(options['year'].min()), int(options['year'].max())
+
+    with st.sidebar:
+        st.markdown("### 🔎 Filter Global")
+
+        st.multiselect("Genre", genres, default=[g for g in filters["genres"] if g in genres],
+                       key="global_filter_genres", on_change=_sync_global_filter, args=("genres",))
+
+        # Subgenre dibatasi pada genre yang dipilih
+        selected_genres = filters["genres"] or genres
+        subgenres = sorted(options.loc[options['playlist_genre'].isin(selected_genres), 'playlist_subgenre'].unique())
+        filters["subgenres"] = [s for s in filters["subgenres"] if s in subgenres]
+        st.multiselect("Subgenre", subgenres, default=filters["subgenres"],
+                       key="global_filter_subgenres", on_change=_sync_global_filter, args=("subgenres",))
+
+        years = filters["years"] or (min_year, max_year)
+        st.slider("Tahun Rilis", min_year, max_year, (max(years[0], min_year), min(years[1], max_year)),
+                  key="global_filter_years", on_change=_sync_global_filter, args=("years",))
+        if filters["years"] is not None and tuple(filters["years"]) == (min_year, max_year):
+            filters["years"] = None
+
+        st.slider("Popularitas", *POPULARITY_RANGE, tuple(filters["popularity"]),
+                  key="global_filter_popularity", on_change=_sync_global_filter, args=("popularity",))
+
+        st.markdown("---")
+
+
+# Kolom keanggotaan playlist: pada frame yang tidak memuat semua kolom ini (tabel lagu unik "tracks", atau
+# genre_tracks tanpa subgenre) predikatnya diselesaikan lewat tabel keanggotaan, karena satu lagu bisa masuk
+# beberapa genre/subgenre
+MEMBERSHIP_COLUMNS = ('playlist_genre', 'playlist_subgenre')
+
+
+# Posisi baris frame yang punya minimal satu playlist cocok dengan predikat genre/subgenre; dicocokkan per
+# track_key (indeks tabel lagu atau kolom) plus kolom keanggotaan yang ada di frame, mis. (lagu, genre)
+def _membership_positions(df, version, predicates):
+    _, memberships = load_track_tables()
+    rows = load_filter_index(memberships, version, "memberships").select(**predicates)
+    levels = [column for column in MEMBERSHIP_COLUMNS if column in df.columns]
+    matched = memberships.iloc[rows][['track_key'] + levels].astype({column: object for column in levels})
+    keys = df[['track_key'] + levels] if 'track_key' in df.columns else pd.DataFrame({'track_key': df.index})
+    if not levels:
+        return np.flatnonzero(np.isin(keys['track_key'].to_numpy(), matched['track_key'].unique()))
+    wanted = pd.MultiIndex.from_frame(matched.drop_duplicates())
+    return np.flatnonzero(pd.MultiIndex.from_frame(keys).isin(wanted))
+
+
+# Frame hasil filter global di-cache per kombinasi filter, dipakai ulang di semua halaman dan sesi
+@instrumented_cache("filtered_frame", show_spinner=False, max_entries=64)
+def _filtered_frame(_df, version, name, key):
+    predicates = {column: slice(*values) if column in ("year", "track_popularity") else list(values)
+                  for column, values in key}
+    index = load_filter_index(_df, version, name)
+    if all(column in _df.columns for column in predicates):
+        return index.frame(**predicates)
+
+    membership = {column: predicates.pop(column) for column in MEMBERSHIP_COLUMNS if column in predicates}
+    positions = index.select(**predicates)
+    if membership:
+        positions = np.intersect1d(positions, _membership_positions(_df, version, membership), assume_unique=True)
+    return _df.iloc[positions]
+
+
+# Fungsi untuk menerapkan filter global ke frame dasar (nama frame: genre_tracks, subgenre_tracks, tracks, playlist_rows)
+# key bisa diberikan langsung (mis. dari layanan API) sebagai pengganti filter di session state
+def apply_global_filters(df, name, key=None):
+    key = global_filter_key() if key is None else key
+    if not key:
+        return df
+    return _filtered_frame(df, get_dataset_version(), name, key)
+
+
+# Hentikan halaman dengan pesan jika filter global tidak menyisakan data
+def stop_if_empty(df):
+    if df.empty:
+        st.warning("Tidak ada lagu yang cocok dengan filter global. Ubah filter di sidebar.")
+        st.stop()
@@ -0,0 +1,157 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from helpers.instrumentation import instrumented_cache, record
+from helpers.utils import get_dataset_version, load_track_frame
+
+# Fitur audio untuk klasifikasi genre (sama dengan fitur yang dipakai di studi klasifikasi pada readme)
+GENRE_MODEL_FEATURES = ["danceability", "energy", "loudness", "speechiness", "acousticness",
+                        "instrumentalness", "liveness", "valence", "tempo", "duration_min"]
+
+# File model di disk (dilatih ulang otomatis jika versi dataset berbeda)
+GENRE_MODEL_FILE = os.environ.get("SPOTIFY_GENRE_MODEL_FILE", "genre_model.npz")
+
+# Hyperparameter regresi logistik multinomial (gradient descent full-batch dengan Adam)
+LEARNING_RATE = 0.1
+EPOCHS = 300
+L2_PENALTY = 1e-3
+
+# Satu dari HOLDOUT_FOLDS lagu (berdasarkan track_key) disisihkan untuk evaluasi, agar lagu yang sama tidak ada di kedua sisi
+HOLDOUT_FOLDS = 5
+
+# Ukuran chunk saat scoring, agar matriks probabilitas tetap kecil untuk jutaan lagu
+SCORE_CHUNK_ROWS = 250_000
+
+
+# Fungsi untuk menandai baris holdout (evaluasi) secara deterministik
+def holdout_mask(frame):
+    return frame['track_key'].to_numpy() % HOLDOUT_FOLDS == 0
+
+
+# Softmax yang stabil secara numerik (dikurangi maksimum per baris)
+def _softmax(logits):
+    logits = logits - logits.max(axis=1, keepdims=True)
+    np.exp(logits, out=logits)
+    logits /= logits.sum(axis=1, keepdims=True)
+    return logits
+
+
+# Melatih regresi logistik multinomial: fitur distandarisasi, bobot dioptimasi dengan Adam atas cross-entropy + L2
+def train_genre_model(frame, epochs=EPOCHS, learning_rate=LEARNING_RATE, l2=L2_PENALTY):
+    frame = frame[frame[GENRE_MODEL_FEATURES + ['playlist_genre']].notna().all(axis=1)]
+    codes, classes = pd.factorize(frame['playlist_genre'], sort=True)
+    values = frame[GENRE_MODEL_FEATURES].to_numpy(dtype=np.float64)
+    mean, scale = values.mean(axis=0), values.std(axis=0)
+    scale[scale == 0] = 1.0
+    x = np.column_stack([(values - mean) / scale, np.ones(len(values))])
+    target = np.eye(len(classes))[codes]
+
+    weights = np.zeros((x.shape[1], len(classes)))
+    moment, velocity = np.zeros_like(weights), np.zeros_like(weights)
+    for step in range(1, epochs + 1):
+        gradient = x.T @ (_softmax(x @ weights) - target) / len(x)
+        gradient[:-1] += l2 * weights[:-1]
+        moment = 0.9 * moment + 0.1 * gradient
+        velocity = 0.999 * velocity + 0.001 * gradient ** 2
+        weights -= learning_rate * (moment / (1 - 0.9 ** step)) / (np.sqrt(velocity / (1 - 0.999 ** step)) + 1e-8)
+
+    return {"classes": np.asarray(classes, dtype=str), "mean": mean, "scale": scale,
+            "weights": weights[:-1], "bias": weights[-1]}
+
+
+# Probabilitas genre untuk seluruh baris dalam satu panggilan vektor (diproses per chunk; fitur kosong -> NaN)
+def predict_proba(values, model, chunk_rows=SCORE_CHUNK_ROWS):
+    values = np.asarray(values, dtype=np.float64)
+    proba = np.empty((len(values), len(model["classes"])))
+    weights = model["weights"] / model["scale"][:, None]
+    bias = model["bias"] - (model["mean"] / model["scale"]) @ model["weights"]
+    for start in range(0, len(values), chunk_rows):
+        proba[start:start + chunk_rows] = _softmax(values[start:start + chunk_rows] @ weights + bias)
+    return proba
+
+
+# Scoring kolom lagu: genre prediksi dan keyakinannya, throughput dicatat sebagai metrik "model"
+def score_tracks(frame, model):
+    start = time.perf_counter()
+    proba = predict_proba(frame[GENRE_MODEL_FEATURES].to_numpy(dtype=np.float64), model)
+    best = proba.argmax(axis=1)
+    scored = pd.DataFrame({"predicted_genre": model["classes"][best],
+                           "confidence": proba[np.arange(len(proba)), best]}, index=frame.index)
+    scored.loc[np.isnan(proba).any(axis=1), ["predicted_genre", "confidence"]] = [None, np.nan]
+    record("model", "genre_score", time.perf_counter() - start, size=len(frame))
+    return scored
+
+
+# Menyimpan model ke .npz (ditulis ke file sementara lalu diganti atomik, seperti file metrik)
+def save_genre_model(model, version, path=GENRE_MODEL_FILE):
+    temporary = path + ".tmp.npz"
+    np.savez(temporary, version=np.array(version), **model)
+    os.replace(temporary, path)
+
+
+# Membaca model dari disk; None jika file tidak ada, rusak, atau dilatih dari versi dataset lain
+def read_genre_model(version, path=GENRE_MODEL_FILE):
+    try:
+        with np.load(path, allow_pickle=False) as stored:
+            if str(stored["version"]) != version:
+                return None
+            return {key: stored[key] for key in ("classes", "mean", "scale", "weights", "bias")}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+# Model genre per versi dataset: dibaca dari disk jika cocok, selain itu dilatih pada baris non-holdout lalu disimpan
+@instrumented_cache("genre_model", show_spinner="Melatih model prediksi genre...", max_entries=4)
+def _load_genre_model(version):
+    model = read_genre_model(version)
+    if model is None:
+        frame = load_track_frame('playlist_genre')
+        model = train_genre_model(frame[~holdout_mask(frame)])
+        try:
+            save_genre_model(model, version)
+        except OSError:
+            pass
+    return model
+
+def load_genre_model():
+    return _load_genre_model(get_dataset_version())
+
+
+# Confusion matrix (baris = genre asli, kolom = prediksi) dan akurasi
+def confusion_matrix(actual, predicted, classes):
+    position = pd.Index(classes)
+    a, p = position.get_indexer(actual), position.get_indexer(predicted)
+    ok = (a >= 0) & (p >= 0)
+    counts = np.bincount(a[ok] * len(classes) + p[ok], minlength=len(classes) ** 2).reshape(len(classes), -1)
+    matrix = pd.DataFrame(counts, index=position, columns=position)
+    accuracy = np.trace(counts) / counts.sum() if counts.sum() else np.nan
+    return matrix, accuracy
+
+
+# Heatmap confusion matrix dinormalisasi per baris (recall per genre), jumlah lagu di hover
+def plot_confusion_matrix(matrix, title="Confusion Matrix Prediksi Genre"):
+    totals = matrix.sum(axis=1).replace(0, np.nan)
+    share = matrix.div(totals, axis=0).fillna(0)
+    fig = go.Figure(go.Heatmap(
+        z=share.to_numpy(),
+        x=matrix.columns,
+        y=matrix.index,
+        customdata=matrix.to_numpy(),
+        zmin=0,
+        zmax=1,
+        colorscale='Greens',
+        texttemplate="%{z:.0%}",
+        hovertemplate="Asli %{y}, prediksi %{x}<br>%{customdata:,} lagu (%{z:.1%})<extra></extra>",
+        colorbar=dict(title='Proporsi')
+    ))
+    fig.update_layout(
+        title=title,
+        height=550,
+        xaxis_title="Genre Prediksi",
+        yaxis_title="Genre Asli",
+        yaxis=dict(autorange='reversed')
+    )
+    return fig
@@ -0,0 +1,286 @@
+import functools
+import contextlib
+import os
+import tempfile
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+import streamlit as st
+import streamlit.logger as streamlit_logger
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from helpers.payload import optimize_figure
+
+# SPOTIFY_METRICS=off mematikan semua pencatatan; =full selalu mengukur ukuran JSON figure (default: hanya saat overlay aktif)
+METRICS_MODE = os.environ.get("SPOTIFY_METRICS", "on").lower()
+
+# File ekspor format teks Prometheus (bisa dibaca node_exporter textfile collector atau cukup di-cat)
+METRICS_FILE = os.environ.get("SPOTIFY_METRICS_FILE", "metrics.prom")
+
+# Jeda minimal antar penulisan file ekspor (detik)
+EXPORT_INTERVAL = 5.0
+
+# Kunci session state untuk halaman aktif dan checkpoint waktu (bukan kunci widget)
+_STATE_KEY = "_instrumentation"
+_OVERLAY_KEY = "metrics_overlay"
+
+# Registry metrik per proses, dipakai bersama oleh semua sesi
+_lock = threading.Lock()
+_steps = {}    # (halaman, jenis, nama) -> [jumlah, total detik, maks detik, byte terakhir]
+_caches = {}   # nama cache -> [panggilan, miss]
+_last_export = [0.0]
+
+# Error ekspor metrik hanya dicatat di log, tidak boleh menggagalkan render halaman
+_logger = streamlit_logger.get_logger(__name__)
+
+
+# State instrumentasi milik sesi aktif (None di luar script Streamlit, misalnya saat benchmark)
+def _state():
+    if METRICS_MODE == "off" or get_script_run_ctx() is None:
+        return None
+    return st.session_state.setdefault(_STATE_KEY, {"page": "-", "checkpoint": time.perf_counter()})
+
+
+def _current_page():
+    state = _state()
+    return state["page"] if state else "-"
+
+
+# Mencatat satu pengukuran ke registry
+def record(kind, name, seconds, size=None, page=None):
+    if METRICS_MODE == "off":
+        return
+    key = (page or _current_page(), kind, name)
+    with _lock:
+        entry = _steps.setdefault(key, [0, 0.0, 0.0, None])
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+        if size is not None:
+            entry[3] = size
+
+
+# Fungsi untuk menandai awal run penuh sebuah halaman (dipanggil tepat setelah set_page_config)
+def start_page(name):
+    state = _state()
+    if state is not None:
+        state["page"] = name
+        state["checkpoint"] = time.perf_counter()
+
+
+# Context manager untuk mengukur satu langkah persiapan data
+class timed:
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        record("step", self.name, end - self.start)
+        state = _state()
+        if state is not None:
+            state["checkpoint"] = end
+
+
+# Pengganti st.fragment: checkpoint di-reset saat fragment dijalankan ulang sendiri, dan durasinya dicatat
+def fragment(func):
+    @functools.wraps(func)
+    def run(*args, **kwargs):
+        state = _state()
+        start = time.perf_counter()
+        if state is not None:
+            state["checkpoint"] = start
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record("fragment", func.__name__, time.perf_counter() - start)
+
+    return st.fragment(run)
+
+
+# Pengganti st.cache_resource yang menghitung hit/miss dan waktu panggilan per cache
+def instrumented_cache(name, **cache_kwargs):
+    def decorate(func):
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs):
+            with _lock:
+                _caches.setdefault(name, [0, 0])[1] += 1
+            return func(*args, **kwargs)
+
+        cached = st.cache_resource(**cache_kwargs)(on_miss)
+
+        @functools.wraps(func)
+        def call(*args, **kwargs):
+            start = time.perf_counter()
+            result = cached(*args, **kwargs)
+            with _lock:
+                _caches.setdefault(name, [0, 0])[0] += 1
+            record("cache", name, time.perf_counter() - start)
+            return result
+
+        call.clear = cached.clear
+        return call
+
+    return decorate
+
+
+# Nama chart: judul figure, atau jenis trace pertama jika figure tidak berjudul
+def _chart_name(fig):
+    return fig.layout.title.text or (f"{fig.data[0].type}_chart" if fig.data else "empty_chart")
+
+
+# Pengganti st.plotly_chart: optimasi payload, lalu catat waktu build (sejak checkpoint terakhir), ukuran JSON dan waktu render
+def show_chart(fig, name=None, optimize=True, **kwargs):
+    kwargs.setdefault("use_container_width", True)
+    # Gaya berasal dari template global spotify_dark, jadi tema Streamlit tidak perlu menimpanya di browser
+    kwargs.setdefault("theme", None)
+    state = _state()
+    if state is None:
+        return st.plotly_chart(optimize_figure(fig) if optimize else fig, **kwargs)
+
+    name = name or _chart_name(fig)
+    start = time.perf_counter()
+    record("build", name, start - state["checkpoint"])
+    measure = METRICS_MODE == "full" or st.session_state.get(_OVERLAY_KEY)
+
+    # Ukuran payload sebelum dan sesudah optimasi (hanya saat diukur, karena butuh serialisasi tambahan)
+    if measure:
+        record("payload_raw", name, 0.0, size=len(pio.to_json(fig, validate=False).encode("utf-8")))
+        start = time.perf_counter()
+    if optimize:
+        optimize_figure(fig)
+        optimized = time.perf_counter()
+        record("optimize", name, optimized - start)
+        start = optimized
+
+    if measure:
+        payload = pio.to_json(fig, validate=False)
+        serialized = time.perf_counter()
+        record("serialize", name, serialized - start, size=len(payload.encode("utf-8")))
+        start = serialized
+
+    result = st.plotly_chart(fig, **kwargs)
+    end = time.perf_counter()
+    record("render", name, end - start)
+    state["checkpoint"] = end
+    return result
+
+
+# Ringkasan metrik sebagai DataFrame (opsional hanya untuk satu halaman)
+def metrics_frame(page=None):
+    with _lock:
+        rows = [(p, kind, name, n, total, total / n, peak, size)
+                for (p, kind, name), (n, total, peak, size) in _steps.items() if page is None or p == page]
+    return pd.DataFrame(rows, columns=["page", "kind", "name", "count", "total_s", "mean_s", "max_s", "json_bytes"])
+
+
+# Ukuran payload per chart sebelum dan sesudah optimasi
+def payload_frame(page=None):
+    frame = metrics_frame(page)
+    sizes = frame[frame["kind"].isin(["payload_raw", "serialize"])].pivot_table(
+        index="name", columns="kind", values="json_bytes", aggfunc="last")
+    if sizes.empty or "payload_raw" not in sizes or "serialize" not in sizes:
+        return pd.DataFrame(columns=["name", "raw_bytes", "optimized_bytes", "saved_pct"])
+    sizes = sizes.dropna().astype(np.int64).rename(columns={"payload_raw": "raw_bytes", "serialize": "optimized_bytes"})
+    sizes["saved_pct"] = (100 * (1 - sizes["optimized_bytes"] / sizes["raw_bytes"])).round(1)
+    return sizes.reset_index()[["name", "raw_bytes", "optimized_bytes", "saved_pct"]].sort_values("raw_bytes", ascending=False)
+
+
+# Ringkasan hit/miss cache
+def cache_frame():
+    with _lock:
+        rows = [(name, calls, misses, calls - misses) for name, (calls, misses) in _caches.items()]
+    frame = pd.DataFrame(rows, columns=["cache", "calls", "misses", "hits"])
+    frame["hit_ratio"] = (frame["hits"] / frame["calls"]).round(3)
+    return frame
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+# Metrik dalam format teks Prometheus
+def prometheus_text():
+    lines = [
+        "# HELP spotify_step_seconds Durasi langkah per halaman (step, cache, build, serialize, render, fragment)",
+        "# TYPE spotify_step_seconds summary",
+    ]
+    peaks, sizes = [], []
+    with _lock:
+        for (page, kind, name), (n, total, peak, size) in sorted(_steps.items()):
+            labels = f'page="{_label(page)}",kind="{kind}",name="{_label(name)}"'
+            lines.append(f"spotify_step_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"spotify_step_seconds_count{{{labels}}} {n}")
+            peaks.append(f"spotify_step_seconds_max{{{labels}}} {peak:.6f}")
+            if size is not None:
+                sizes.append(f'spotify_chart_json_bytes{{page="{_label(page)}",name="{_label(name)}"}} {size}')
+        cache_lines = []
+        for name, (calls, misses) in sorted(_caches.items()):
+            cache_lines.append(f'spotify_cache_requests_total{{cache="{name}",result="hit"}} {calls - misses}')
+            cache_lines.append(f'spotify_cache_requests_total{{cache="{name}",result="miss"}} {misses}')
+    lines += ["# HELP spotify_step_seconds_max Durasi terlama per langkah", "# TYPE spotify_step_seconds_max gauge"] + peaks
+    lines += ["# HELP spotify_chart_json_bytes Ukuran JSON figure terakhir", "# TYPE spotify_chart_json_bytes gauge"] + sizes
+    lines += ["# HELP spotify_cache_requests_total Panggilan cache per hasil", "# TYPE spotify_cache_requests_total counter"] + cache_lines
+    return "\n".join(lines) + "\n"
+
+
+# Menulis file ekspor secara atomik, paling sering sekali per EXPORT_INTERVAL
+def export_metrics(path=METRICS_FILE, force=False):
+    if METRICS_MODE == "off" or not path:
+        return
+    # Cek dan set waktu ekspor di bawah lock: satu sesi saja yang menulis per interval
+    with _lock:
+        now = time.monotonic()
+        if not force and now - _last_export[0] < EXPORT_INTERVAL:
+            return
+        _last_export[0] = now
+
+    # File sementara unik per penulis, lalu os.replace (atomik) ke file tujuan
+    tmp = None
+    try:
+        text = prometheus_text()
+        with tempfile.NamedTemporaryFile("w", dir=os.path.dirname(os.path.abspath(path)),
+                                         prefix=f"{os.path.basename(path)}.", suffix=".tmp", delete=False) as f:
+            tmp = f.name
+            f.write(text)
+        os.replace(tmp, path)
+    except Exception as error:
+        _logger.warning("Ekspor metrik ke %s gagal: %s", path, error)
+        if tmp:
+            with contextlib.suppress(OSError):
+                os.remove(tmp)
+
+
+# Fungsi untuk menampilkan overlay debug (toggle di sidebar) dan mengekspor metrik; dipanggil di akhir halaman
+def render_metrics_overlay():
+    if METRICS_MODE == "off":
+        return
+    export_metrics()
+    if not st.sidebar.toggle("Tampilkan metrik performa", key=_OVERLAY_KEY):
+        return
+
+    page = _current_page()
+    with st.expander(f"⏱️ Metrik Performa ({page})", expanded=True):
+        frame = metrics_frame(page)
+        build = frame[frame["kind"] == "build"].set_index("name")["mean_s"]
+        st.caption(f"Total waktu build chart rata-rata: {build.sum() * 1000:.0f} ms — ukuran JSON diukur selama overlay aktif")
+        st.dataframe(
+            frame.drop(columns="page").sort_values("total_s", ascending=False),
+            use_container_width=True,
+            column_config={
+                "total_s": st.column_config.NumberColumn("Total (s)", format="%.3f"),
+                "mean_s": st.column_config.NumberColumn("Rata-rata (s)", format="%.4f"),
+                "max_s": st.column_config.NumberColumn("Maks (s)", format="%.4f"),
+                "json_bytes": st.column_config.NumberColumn("JSON (byte)", format="%d")
+            }
+        )
+        payload = payload_frame(page)
+        if len(payload):
+            st.caption(f"Payload chart: {payload['raw_bytes'].sum():,} → {payload['optimized_bytes'].sum():,} byte")
+            st.dataframe(payload, use_container_width=True)
+        st.dataframe(cache_frame(), use_container_width=True)
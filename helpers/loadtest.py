@@ -0,0 +1,228 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import threading
+import time
+
+import numpy as np
+import streamlit.logger as streamlit_logger
+from streamlit.testing.v1 import AppTest
+
+# Skenario interaksi per halaman: (file halaman, kunci radio tab, daftar aksi (tab, jenis widget, label atau key))
+# Tab None = widget sidebar (filter global) yang ada di semua tab
+LOAD_SCENARIOS = {
+    "genre": ("pages/01_genre_analysis.py", "genre_tabs", [
+        ("📊 Popularitas Genre", "selectbox", "Pilih Tahun"),
+        ("📈 Tren Genre", "slider", "Rentang Tahun"),
+        ("📈 Tren Genre", "selectbox", "Fitur"),
+        ("🎵 Karakteristik Genre", "selectbox", "Pilih Karakteristik X"),
+        (None, "slider", "global_filter_years"),
+    ]),
+    "artist": ("pages/02_artist_insights.py", "artist_tabs", [
+        ("🏆 Top Artis", "selectbox", "Filter Genre"),
+        ("🏆 Top Artis", "slider", "Jumlah Artis"),
+        ("🎸 Gaya Musik Artis", "multiselect", "Pilih Artis untuk Dibandingkan"),
+        ("🌟 Konsistensi Artis", "selectbox", "Pilih Artis"),
+    ]),
+    "playlist": ("pages/04_playlist_analysis.py", "playlist_tabs", [
+        ("🎯 Perbandingan Playlist", "multiselect", "Pilih Genre"),
+        ("🎯 Perbandingan Playlist", "selectbox", "Level Kemiripan"),
+        ("🧩 Subgenre Analysis", "selectbox", "Pilih Genre"),
+        ("🎭 Mood Cluster", "selectbox", "mood_cluster_count"),
+        (None, "multiselect", "global_filter_genres"),
+    ]),
+}
+
+# Persentil latensi rerun yang dilaporkan
+PERCENTILES = (50, 90, 95, 99)
+
+
+# Memori resident proses saat ini (Linux /proc), fallback ke puncak RSS dari getrusage
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return peak_rss_bytes()
+
+def peak_rss_bytes():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+# Mencari widget berdasarkan key atau label (kebanyakan widget halaman tidak punya key)
+def find_widget(at, kind, name):
+    for widget in getattr(at, kind):
+        if widget.key == name or widget.label == name:
+            return widget
+    return None
+
+
+# Nilai acak yang masuk akal untuk satu widget: opsi lain, subset opsi, atau posisi/rentang slider baru
+def random_value(widget, kind, rng):
+    if kind in ("selectbox", "radio"):
+        return widget.options[rng.integers(len(widget.options))]
+    if kind == "multiselect":
+        size = int(rng.integers(1, min(3, len(widget.options)) + 1))
+        return [widget.options[i] for i in sorted(rng.choice(len(widget.options), size, replace=False))]
+    low, high = widget.min, widget.max
+    if isinstance(widget.value, (tuple, list)):
+        start, end = sorted(rng.choice(np.arange(low, high + 1), 2, replace=False).tolist())
+        return (start, end)
+    return int(rng.integers(low, high + 1))
+
+
+# Satu sesi simulasi: buka halaman, lalu jalankan `steps` aksi acak (pindah tab bila perlu), catat latensi tiap rerun
+def run_session(scenario, steps, seed, think=0.0, timeout=300):
+    page, tab_key, actions = LOAD_SCENARIOS[scenario]
+    rng = np.random.default_rng(seed)
+    reruns, errors = [], []
+
+    def rerun(label, change=None):
+        start = time.perf_counter()
+        (change or at).run()
+        reruns.append((f"{scenario}/{label}", time.perf_counter() - start))
+        if at.exception:
+            errors.append(f"{scenario}/{label}: {at.exception[0].message}")
+
+    at = AppTest.from_file(page, default_timeout=timeout)
+    rerun("load")
+    for _ in range(steps):
+        tab, kind, name = actions[rng.integers(len(actions))]
+        if tab is not None and at.radio(key=tab_key).value != tab:
+            rerun("tab", at.radio(key=tab_key).set_value(tab))
+        widget = find_widget(at, kind, name)
+        if widget is None or (kind == "multiselect" and not widget.options):
+            errors.append(f"{scenario}/{name}: widget tidak ditemukan")
+            continue
+        rerun(name, widget.set_value(random_value(widget, kind, rng)))
+        if think:
+            time.sleep(think)
+    return {"scenario": scenario, "reruns": reruns, "errors": errors}
+
+
+# Ringkasan latensi (ms): jumlah rerun, persentil dan maksimum
+def latency_summary(seconds):
+    values = np.asarray(seconds) * 1000
+    if not len(values):
+        return {"reruns": 0}
+    summary = {"reruns": len(values)}
+    summary.update({f"p{p}": round(float(np.percentile(values, p)), 1) for p in PERCENTILES})
+    summary["max"] = round(float(values.max()), 1)
+    return summary
+
+
+# Satu proses worker: pemanasan cache untuk skenarionya, tunggu semua worker siap, lalu jalankan sesi-sesinya
+# berurutan sambil mencatat puncak RSS. AppTest memakai Runtime global sehingga tidak aman dijalankan paralel
+# dalam satu proses; konkurensi didapat dari beberapa proses (seperti beberapa replika aplikasi)
+def _worker(jobs, steps, think, timeout, barrier, results):
+    streamlit_logger.set_log_level("error")
+    for scenario in sorted({scenario for scenario, _ in jobs}):
+        run_session(scenario, 2 * len(LOAD_SCENARIOS[scenario][2]), 2 ** 32 - 1, timeout=timeout)
+    baseline = rss_bytes()
+    peak = [baseline]
+    stop = threading.Event()
+
+    def sample_memory():
+        while not stop.wait(0.05):
+            peak[0] = max(peak[0], rss_bytes())
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    barrier.wait()
+    sessions = [run_session(scenario, steps, seed, think, timeout) for scenario, seed in jobs]
+    stop.set()
+    sampler.join()
+    results.put({"sessions": sessions, "baseline": baseline, "peak": max(peak[0], rss_bytes())})
+
+
+# Menjalankan N sesi dibagi rata ke sejumlah proses worker yang berjalan bersamaan
+def run_load(sessions=4, steps=10, scenarios=tuple(LOAD_SCENARIOS), seed=0, think=0.0, timeout=300, workers=None):
+    workers = max(1, min(workers or sessions, sessions))
+    jobs = [[] for _ in range(workers)]
+    for i in range(sessions):
+        jobs[i % workers].append((scenarios[i % len(scenarios)], seed + i))
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers + 1)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(job, steps, think, timeout, barrier, results))
+                 for job in jobs]
+    for process in processes:
+        process.start()
+    barrier.wait()
+    start = time.perf_counter()
+    outcomes = [results.get() for _ in processes]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    results = [result for outcome in outcomes for result in outcome["sessions"]]
+    all_reruns = [seconds for result in results for _, seconds in result["reruns"]]
+    growth = sum(outcome["peak"] - outcome["baseline"] for outcome in outcomes)
+    report = {
+        "sessions": sessions,
+        "workers": workers,
+        "steps_per_session": steps,
+        "elapsed_s": round(elapsed, 2),
+        "reruns_per_s": round(len(all_reruns) / elapsed, 2) if elapsed else None,
+        "overall": latency_summary(all_reruns),
+        "scenarios": {scenario: latency_summary([s for r in results if r["scenario"] == scenario
+                                                 for _, s in r["reruns"]]) for scenario in scenarios},
+        "actions": {},
+        "memory": {
+            "worker_baseline_mb": round(max(outcome["baseline"] for outcome in outcomes) / 2 ** 20, 1),
+            "worker_peak_mb": round(max(outcome["peak"] for outcome in outcomes) / 2 ** 20, 1),
+            "per_session_mb": round(growth / 2 ** 20 / sessions, 2)
+        },
+        "errors": [error for result in results for error in result["errors"]]
+    }
+    labels = sorted({label for result in results for label, _ in result["reruns"]})
+    report["actions"] = {label: latency_summary([s for r in results for l, s in r["reruns"] if l == label])
+                         for label in labels}
+    return report
+
+
+# Laporan teks: tabel persentil per skenario dan per aksi, memori, dan error
+def format_report(report):
+    columns = ["reruns"] + [f"p{p}" for p in PERCENTILES] + ["max"]
+    lines = [f"{report['sessions']} sesi x {report['steps_per_session']} aksi di {report['workers']} worker "
+             f"dalam {report['elapsed_s']} s "
+             f"({report['reruns_per_s']} rerun/s)", "",
+             f"{'latensi (ms)':<34}" + "".join(f"{column:>9}" for column in columns)]
+    rows = [("semua", report["overall"])] + list(report["scenarios"].items()) + \
+           [(f"  {label}", summary) for label, summary in report["actions"].items()]
+    for name, summary in rows:
+        lines.append(f"{name:<34}" + "".join(f"{summary.get(column, '-'):>9}" for column in columns))
+    memory = report["memory"]
+    lines += ["", f"memori per worker: baseline {memory['worker_baseline_mb']} MB, "
+                  f"puncak {memory['worker_peak_mb']} MB, ~{memory['per_session_mb']} MB per sesi",
+              f"error: {len(report['errors'])}"] + [f"  {error}" for error in report["errors"][:10]]
+    return "\n".join(lines)
+
+
+# python -m helpers.loadtest --sessions 8 --workers 4 --steps 20 --scenarios genre,playlist --json hasil.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test headless halaman Streamlit (offline, satu mesin)")
+    parser.add_argument("--sessions", type=int, default=4, help="jumlah sesi bersamaan")
+    parser.add_argument("--workers", type=int, help="jumlah proses worker (default: satu per sesi)")
+    parser.add_argument("--steps", type=int, default=10, help="jumlah aksi per sesi")
+    parser.add_argument("--scenarios", default=",".join(LOAD_SCENARIOS), help="skenario, dipisah koma")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--think", type=float, default=0.0, help="jeda antar aksi (detik)")
+    parser.add_argument("--timeout", type=float, default=300, help="batas waktu satu rerun (detik)")
+    parser.add_argument("--json", help="simpan laporan lengkap ke file JSON")
+    arguments = parser.parse_args()
+    streamlit_logger.set_log_level("error")
+
+    scenarios = tuple(name.strip() for name in arguments.scenarios.split(",") if name.strip())
+    unknown = [name for name in scenarios if name not in LOAD_SCENARIOS]
+    if unknown:
+        parser.error(f"skenario tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(LOAD_SCENARIOS)})")
+    report = run_load(arguments.sessions, arguments.steps, scenarios, arguments.seed, arguments.think,
+                      arguments.timeout, arguments.workers)
+    print(format_report(report))
+    if arguments.json:
+        with open(arguments.json, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
@@ -0,0 +1,205 @@
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Agregasi paralel hanya dipakai mulai jumlah baris ini (0 = selalu, negatif = tidak pernah)
+PARALLEL_MIN_ROWS = int(os.environ.get("SPOTIFY_PARALLEL_MIN_ROWS", 1_000_000))
+
+# Jenis pool: thread (berbagi memori proses) atau process (array dikirim lewat shared memory, bukan pickle)
+PARALLEL_MODE = os.environ.get("SPOTIFY_PARALLEL", "thread").lower()
+
+# Jumlah worker (default: jumlah core)
+PARALLEL_WORKERS = int(os.environ.get("SPOTIFY_PARALLEL_WORKERS", os.cpu_count() or 1))
+
+# Statistik yang bisa digabung dari partial aggregate per partisi
+MERGEABLE = ("count", "sum", "mean", "std", "min", "max")
+
+# Jumlah bin histogram per grup untuk kuantil aproksimasi (galat <= lebar satu bin)
+QUANTILE_BINS = 256
+
+# Pool dibuat sekali per jenis dan dipakai semua sesi
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Fungsi untuk menentukan apakah tabel cukup besar untuk diagregasi paralel
+def should_parallelize(n_rows, min_rows=None):
+    min_rows = PARALLEL_MIN_ROWS if min_rows is None else min_rows
+    return min_rows >= 0 and n_rows >= min_rows
+
+
+def _pool(mode, workers):
+    with _pools_lock:
+        key = (mode, workers)
+        if key not in _pools:
+            executor = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+            _pools[key] = executor(max_workers=workers)
+        return _pools[key]
+
+
+# Kode grup terurut (seperti groupby sort=True) untuk satu atau beberapa kolom; kunci NaN mendapat kode -1
+def group_codes(df, by):
+    if len(by) == 1:
+        codes, uniques = pd.factorize(df[by[0]], sort=True)
+        return codes.astype(np.int64), pd.Index(uniques, name=by[0])
+    grouped = df.groupby(by, observed=True, sort=True)
+    codes = grouped.ngroup().fillna(-1).to_numpy(dtype=np.int64)
+    return codes, grouped.size().index
+
+
+# Partial aggregate satu partisi: count, sum dan M2 (jumlah kuadrat deviasi) per grup, plus min/max dan histogram opsional
+def partial_aggregate(codes, values, n_groups, start, stop, want_extremes=False, edges=None):
+    codes, values = codes[start:stop], values[:, start:stop]
+    k = values.shape[0]
+    partial = {"count": np.zeros((k, n_groups)), "sum": np.zeros((k, n_groups)), "m2": np.zeros((k, n_groups))}
+    if want_extremes:
+        partial["min"] = np.full((k, n_groups), np.inf)
+        partial["max"] = np.full((k, n_groups), -np.inf)
+    if edges is not None:
+        partial["hist"] = np.zeros((k, n_groups, QUANTILE_BINS))
+
+    for i in range(k):
+        ok = (codes >= 0) & ~np.isnan(values[i])
+        group, x = codes[ok], values[i][ok]
+        count = np.bincount(group, minlength=n_groups)
+        total = np.bincount(group, weights=x, minlength=n_groups)
+        mean = np.divide(total, count, out=np.zeros(n_groups), where=count > 0)
+        partial["count"][i], partial["sum"][i] = count, total
+        partial["m2"][i] = np.bincount(group, weights=(x - mean[group]) ** 2, minlength=n_groups)
+        if want_extremes:
+            np.minimum.at(partial["min"][i], group, x)
+            np.maximum.at(partial["max"][i], group, x)
+        if edges is not None:
+            lo, hi = edges[i]
+            bins = np.clip(((x - lo) / ((hi - lo) or 1) * QUANTILE_BINS).astype(np.int64), 0, QUANTILE_BINS - 1)
+            partial["hist"][i] = np.bincount(group * QUANTILE_BINS + bins,
+                                             minlength=n_groups * QUANTILE_BINS).reshape(n_groups, QUANTILE_BINS)
+    return partial
+
+
+# Worker proses: membaca kode dan nilai dari shared memory lewat nama blok, tanpa menyalin frame
+def _partial_from_shared(codes_spec, values_spec, n_groups, start, stop, want_extremes, edges):
+    blocks = [shared_memory.SharedMemory(name=spec[0]) for spec in (codes_spec, values_spec)]
+    try:
+        codes = np.ndarray(codes_spec[1], dtype=codes_spec[2], buffer=blocks[0].buf)
+        values = np.ndarray(values_spec[1], dtype=values_spec[2], buffer=blocks[1].buf)
+        return partial_aggregate(codes, values, n_groups, start, stop, want_extremes, edges)
+    finally:
+        del codes, values
+        for block in blocks:
+            block.close()
+
+
+# Menggabungkan partial aggregate (rumus Chan untuk M2 agar varians stabil secara numerik)
+def merge_partials(partials):
+    merged = {key: value.copy() for key, value in partials[0].items()}
+    for partial in partials[1:]:
+        n_a, n_b = merged["count"], partial["count"]
+        n = n_a + n_b
+        mean_a = np.divide(merged["sum"], n_a, out=np.zeros_like(n_a), where=n_a > 0)
+        mean_b = np.divide(partial["sum"], n_b, out=np.zeros_like(n_b), where=n_b > 0)
+        merged["m2"] += partial["m2"] + np.divide((mean_b - mean_a) ** 2 * n_a * n_b, n,
+                                                  out=np.zeros_like(n), where=n > 0)
+        merged["count"], merged["sum"] = n, merged["sum"] + partial["sum"]
+        if "min" in merged:
+            merged["min"] = np.minimum(merged["min"], partial["min"])
+            merged["max"] = np.maximum(merged["max"], partial["max"])
+        if "hist" in merged:
+            merged["hist"] += partial["hist"]
+    return merged
+
+
+# Kuantil aproksimasi dari histogram per grup (interpolasi linear di dalam bin)
+def _histogram_quantile(hist, count, lo, hi, q):
+    cumulative = np.cumsum(hist, axis=1)
+    target = q * count
+    position = np.minimum((cumulative < target[:, None]).sum(axis=1), QUANTILE_BINS - 1)
+    before = np.where(position > 0, np.take_along_axis(cumulative, np.maximum(position - 1, 0)[:, None], 1)[:, 0], 0)
+    inside = np.take_along_axis(hist, position[:, None], 1)[:, 0]
+    fraction = np.divide(target - before, inside, out=np.zeros_like(target), where=inside > 0)
+    width = (hi - lo) / QUANTILE_BINS
+    return np.where(count > 0, lo + (position + np.clip(fraction, 0, 1)) * width, np.nan)
+
+
+def _finalize(merged, i, func, edges):
+    count = merged["count"][i]
+    if func == "count":
+        return count
+    if func == "sum":
+        return merged["sum"][i]
+    if func == "mean":
+        return np.divide(merged["sum"][i], count, out=np.full_like(count, np.nan), where=count > 0)
+    if func == "std":
+        return np.sqrt(np.divide(merged["m2"][i], count - 1, out=np.full_like(count, np.nan), where=count > 1))
+    if func in ("min", "max"):
+        return np.where(count > 0, merged[func][i], np.nan)
+    return _histogram_quantile(merged["hist"][i], count, *edges[i], func)
+
+
+# Agregasi group-by paralel: tabel dipartisi, partial aggregate dihitung di pool lalu digabung
+# measures: {nama: (kolom, fungsi)}, fungsi salah satu MERGEABLE atau float 0..1 untuk kuantil aproksimasi
+def parallel_aggregate(df, by, measures, mode=None, workers=None):
+    by = [by] if isinstance(by, str) else list(by)
+    mode = (mode or PARALLEL_MODE).lower()
+    workers = max(1, workers or PARALLEL_WORKERS)
+    columns = list(dict.fromkeys(column for column, _ in measures.values()))
+    counted_only = {column for column in columns
+                    if all(func == "count" for measured, func in measures.values() if measured == column)}
+    codes, index = group_codes(df, by)
+    n_groups, n_rows = len(index), len(df)
+    want_extremes = any(func in ("min", "max") for _, func in measures.values())
+    want_quantiles = any(not isinstance(func, str) for _, func in measures.values())
+
+    # Nilai disusun per kolom (k x n) agar irisan partisi bersebelahan di memori
+    if mode == "process":
+        blocks = [shared_memory.SharedMemory(create=True, size=max(codes.nbytes, 1)),
+                  shared_memory.SharedMemory(create=True, size=max(len(columns) * n_rows * 8, 1))]
+        shared_codes = np.ndarray(codes.shape, dtype=np.int64, buffer=blocks[0].buf)
+        values = np.ndarray((len(columns), n_rows), dtype=np.float64, buffer=blocks[1].buf)
+        shared_codes[:] = codes
+    else:
+        blocks = []
+        values = np.empty((len(columns), n_rows), dtype=np.float64)
+    try:
+        for i, column in enumerate(columns):
+            # Kolom yang hanya dihitung (mis. string/ID) tidak perlu numerik: cukup penanda non-NaN
+            if column in counted_only:
+                values[i] = np.where(df[column].notna().to_numpy(), 0.0, np.nan)
+            else:
+                values[i] = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        edges = [(np.nanmin(row), np.nanmax(row)) if np.isfinite(row).any() else (0.0, 1.0) for row in values] \
+            if want_quantiles else None
+
+        bounds = np.linspace(0, n_rows, workers + 1).astype(np.int64)
+        tasks = [(start, stop) for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start] or [(0, 0)]
+        if workers == 1 or len(tasks) == 1:
+            partials = [partial_aggregate(codes, values, n_groups, start, stop, want_extremes, edges)
+                        for start, stop in tasks]
+        elif mode == "process":
+            specs = [(blocks[0].name, codes.shape, np.int64), (blocks[1].name, values.shape, np.float64)]
+            partials = list(_pool(mode, workers).map(
+                _partial_from_shared, *zip(*[(specs[0], specs[1], n_groups, start, stop, want_extremes, edges)
+                                             for start, stop in tasks])))
+        else:
+            partials = list(_pool(mode, workers).map(
+                lambda task: partial_aggregate(codes, values, n_groups, *task, want_extremes, edges), tasks))
+    finally:
+        if blocks:
+            del shared_codes, values
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    merged = merge_partials(partials)
+    position = {column: i for i, column in enumerate(columns)}
+    result = pd.DataFrame({name: _finalize(merged, position[column], func, edges)
+                           for name, (column, func) in measures.items()}, index=index)
+    for name, (_, func) in measures.items():
+        if func == "count":
+            result[name] = result[name].astype(np.int64)
+    return result
+
@@ -0,0 +1,84 @@
+import numpy as np
+import plotly
+
+# Plotly >= 6 mengirim array numpy sebagai typed array base64 (bdata); versi lama mengirim teks angka JSON
+TYPED_ARRAYS = int(plotly.__version__.split(".")[0]) >= 6
+
+# Jumlah digit signifikan yang dipertahankan (setara presisi float32)
+SIGNIFICANT_DIGITS = 6
+
+# Panjang maksimum teks hover sebelum dipotong
+HOVER_MAX_CHARS = 40
+
+# Atribut trace berisi array angka yang dipadatkan
+NUMERIC_ATTRIBUTES = ("x", "y", "z", "r", "theta", "values", "customdata")
+
+# Atribut trace berisi teks hover yang dipotong; "text" tidak ikut karena bisa tampil sebagai label di chart
+TEXT_ATTRIBUTES = ("hovertext", "customdata")
+
+
+# Memadatkan array angka: integer disimpan sebagai integer, float dibulatkan ke presisi float32
+def compact_numbers(values):
+    if TYPED_ARRAYS:
+        if np.issubdtype(values.dtype, np.integer) or (np.isfinite(values).all() and (values == np.round(values)).all()):
+            lo, hi = np.nanmin(values), np.nanmax(values)
+            for dtype in (np.int8, np.int16, np.int32):
+                if np.iinfo(dtype).min <= lo and hi <= np.iinfo(dtype).max:
+                    return values.astype(dtype)
+        return values.astype(np.float32)
+
+    if np.issubdtype(values.dtype, np.integer):
+        return values
+    finite = values[np.isfinite(values)]
+    if finite.size and (finite == np.round(finite)).all() and np.isfinite(values).all():
+        return values.astype(np.int64)
+    # Pembulatan digit signifikan relatif terhadap nilai absolut terbesar, agar teks JSON lebih pendek
+    scale = np.nanmax(np.abs(finite)) if finite.size else 0
+    if scale == 0:
+        return values
+    decimals = max(SIGNIFICANT_DIGITS - 1 - int(np.floor(np.log10(scale))), 0)
+    return np.round(values, decimals)
+
+
+# Memotong teks panjang pada array objek (1D atau 2D, misalnya customdata dari hover_data)
+def truncate_text(values, max_chars=HOVER_MAX_CHARS):
+    flat = values.ravel()
+    long_text = [i for i, v in enumerate(flat) if isinstance(v, str) and len(v) > max_chars]
+    if not long_text:
+        return values
+    flat = flat.copy()
+    for i in long_text:
+        flat[i] = flat[i][:max_chars - 1] + "…"
+    return flat.reshape(values.shape)
+
+
+# Template hanya menyimpan default untuk jenis trace yang benar-benar dipakai figure
+def prune_template(fig):
+    template = fig.layout.template
+    if template is None or not template.data:
+        return
+    used = {trace.type for trace in fig.data}
+    keep = {t: getattr(template.data, t) for t in used if getattr(template.data, t, None)}
+    fig.layout.template = dict(layout=template.layout, data=keep)
+
+
+# Optimasi payload figure sebelum dikirim ke browser (mengubah figure di tempat)
+def optimize_figure(fig, max_chars=HOVER_MAX_CHARS):
+    prune_template(fig)
+    for trace in fig.data:
+        for attribute in set(NUMERIC_ATTRIBUTES + TEXT_ATTRIBUTES):
+            values = getattr(trace, attribute, None)
+            if not isinstance(values, np.ndarray) or values.size == 0:
+                continue
+            if values.dtype.kind in "fiu" and attribute in NUMERIC_ATTRIBUTES:
+                setattr(trace, attribute, compact_numbers(values))
+            elif values.dtype.kind == "O" and attribute in TEXT_ATTRIBUTES:
+                setattr(trace, attribute, truncate_text(values, max_chars))
+
+        # Ukuran dan warna marker per titik (bubble chart, skala warna kontinu)
+        marker = getattr(trace, "marker", None)
+        for attribute in ("size", "color"):
+            values = getattr(marker, attribute, None) if marker is not None else None
+            if isinstance(values, np.ndarray) and values.size and values.dtype.kind in "fiu":
+                setattr(marker, attribute, compact_numbers(values))
+    return fig
@@ -0,0 +1,96 @@
+import numpy as np
+import pandas as pd
+from helpers.instrumentation import instrumented_cache
+
+# Fitur audio yang diringkas untuk setiap playlist
+PROFILE_FEATURES = ["danceability", "energy", "acousticness", "valence", "speechiness", "instrumentalness", "liveness"]
+
+# Kuantil popularitas yang disimpan per playlist
+POPULARITY_QUANTILES = {"pop_min": 0.0, "pop_q25": 0.25, "pop_median": 0.5, "pop_q75": 0.75, "pop_max": 1.0}
+
+
+# Kuantil per grup dari data yang sudah diurutkan per (grup, nilai), interpolasi linear seperti pandas
+def _grouped_quantile(sorted_values, starts, counts, q):
+    pos = q * (counts - 1)
+    lower = np.floor(pos).astype(np.int64)
+    upper = np.ceil(pos).astype(np.int64)
+    frac = pos - lower
+    return sorted_values[starts + lower] * (1 - frac) + sorted_values[starts + upper] * frac
+
+
+# Membangun tabel profil playlist dalam satu pass vektor (tanpa loop per playlist)
+def build_playlist_profiles(df):
+    # playlist_key dipadatkan ulang agar data yang sudah difilter tetap menghasilkan tabel rapat
+    playlist_keys, codes = np.unique(df['playlist_key'].to_numpy(), return_inverse=True)
+    n = len(playlist_keys)
+    counts = np.bincount(codes, minlength=n)
+
+    profiles = pd.DataFrame(index=pd.Index(playlist_keys, name='playlist_key'))
+
+    # Nama playlist diambil dari kemunculan pertama
+    first_row = np.full(n, len(codes), dtype=np.int64)
+    np.minimum.at(first_row, codes, np.arange(len(codes)))
+    profiles['playlist_name'] = df['playlist_name'].to_numpy()[first_row]
+    profiles['track_count'] = counts.astype(np.int32)
+
+    # Mean dan varians (ddof=1) tiap fitur dari count/sum/sum-of-squares, digeser ke mean global agar stabil
+    for feature in PROFILE_FEATURES + ['track_popularity']:
+        values = df[feature].to_numpy(dtype=np.float64)
+        shift = np.nanmean(values)
+        centered = values - shift
+        sums = np.bincount(codes, weights=centered, minlength=n)
+        sumsq = np.bincount(codes, weights=centered * centered, minlength=n)
+        means = sums / counts
+        with np.errstate(invalid='ignore', divide='ignore'):
+            variances = (sumsq - counts * means * means) / (counts - 1)
+        profiles[f'{feature}_mean'] = (means + shift).astype(np.float32)
+        profiles[f'{feature}_var'] = np.maximum(variances, 0).astype(np.float32)
+
+    # Distribusi popularitas: urutkan sekali per (playlist, popularitas), lalu ambil posisi kuantil
+    popularity = df['track_popularity'].to_numpy(dtype=np.float64)
+    order = np.lexsort((popularity, codes))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    for column, q in POPULARITY_QUANTILES.items():
+        profiles[column] = _grouped_quantile(popularity[order], starts, counts, q).astype(np.float32)
+
+    # Komposisi genre: jumlah lagu per (playlist, genre)
+    genre_codes, genres = pd.factorize(df['playlist_genre'], sort=True)
+    mix = np.bincount(codes * len(genres) + genre_codes, minlength=n * len(genres)).reshape(n, len(genres))
+    for i, genre in enumerate(genres):
+        profiles[f'genre_{genre}'] = mix[:, i].astype(np.int32)
+    profiles['playlist_genre'] = genres[mix.argmax(axis=1)]
+
+    return profiles
+
+
+# Profil playlist di-cache per versi data (dataset + filter global)
+@instrumented_cache("playlist_profiles", show_spinner="Menyiapkan profil playlist...", max_entries=32)
+def load_playlist_profiles(_df, version):
+    return build_playlist_profiles(_df)
+
+
+# Kolom komposisi genre pada tabel profil
+def genre_mix_columns(profiles):
+    return [c for c in profiles.columns if c.startswith('genre_')]
+
+
+# Jumlah lagu per playlist untuk setiap genre (setara groupby(['playlist_genre', 'playlist_key']).count())
+def songs_per_playlist_by_genre(profiles):
+    mix = profiles[genre_mix_columns(profiles)]
+    long = mix.melt(var_name='genre', value_name='song_count', ignore_index=False).reset_index()
+    long = long[long['song_count'] > 0]
+    long['genre'] = long['genre'].str.slice(len('genre_'))
+    return long[['genre', 'playlist_key', 'song_count']]
+
+
+# Label pilihan playlist: "nama (genre)", dengan playlist_key sebagai nilai
+def playlist_options(profiles):
+    ordered = profiles.sort_values('track_count', ascending=False)
+    return dict(zip(ordered.index, ordered['playlist_name'] + " (" + ordered['playlist_genre'] + ")"))
+
+
+# Satu halaman tabel profil playlist
+def playlist_page(profiles, page, page_size=25, sort_by='track_count', ascending=False):
+    ordered = profiles.sort_values(sort_by, ascending=ascending, kind='stable')
+    start = (page - 1) * page_size
+    return ordered.iloc[start:start + page_size]
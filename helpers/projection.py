@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from helpers.instrumentation import instrumented_cache
+from helpers.correlation import co_moments, merge_co_moments
+from helpers.utils import get_dataset_version, load_track_tables
+
+# Fitur audio yang diproyeksikan ke peta 2-D (popularitas tidak ikut, agar peta murni karakter musik)
+PROJECTION_FEATURES = ["danceability", "energy", "acousticness", "valence", "speechiness",
+                       "instrumentalness", "liveness", "loudness", "tempo"]
+
+# Jumlah baris per chunk saat fitting dan proyeksi, agar memori tetap kecil untuk jutaan lagu
+PROJECTION_CHUNK_ROWS = 250_000
+
+# Resolusi grid peta densitas dan jumlah titik sampel untuk drill-down
+MAP_BINS = 80
+SAMPLE_POINTS = 2000
+
+
+# Fitting PCA inkremental: co-moment fitur dikumpulkan per chunk lalu digabung, komponen dari eigen matriks korelasi
+# (setara PCA atas fitur yang distandarisasi, eksak, dan hanya butuh satu pass data)
+def fit_pca(values, n_components=2, chunk_rows=PROJECTION_CHUNK_ROWS):
+    accumulator = None
+    for start in range(0, len(values), chunk_rows):
+        block = values[start:start + chunk_rows]
+        block = block[np.isfinite(block).all(axis=1)]
+        partial = co_moments(block, np.zeros(len(block), dtype=np.int64), 1)
+        accumulator = partial if accumulator is None else merge_co_moments(accumulator, partial)
+
+    n, mean, comoment = accumulator["n"][0], accumulator["mean"][0], accumulator["comoment"][0]
+    scale = np.sqrt(np.diag(comoment) / max(n - 1, 1))
+    scale[scale == 0] = 1.0
+    correlation = comoment / max(n - 1, 1) / np.outer(scale, scale)
+    eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+    order = np.argsort(eigenvalues)[::-1]
+    components = eigenvectors[:, order[:n_components]].T
+
+    # Arah komponen dibuat deterministik: loading terbesar selalu positif
+    signs = np.sign(components[np.arange(n_components), np.abs(components).argmax(axis=1)])
+    return {
+        "mean": mean,
+        "scale": scale,
+        "components": components * signs[:, None],
+        "explained": eigenvalues[order] / eigenvalues.sum(),
+        "rows": int(n)
+    }
+
+
+# Proyeksi per chunk ke koordinat float32 (baris dengan fitur kosong menjadi NaN)
+def project(values, model, chunk_rows=PROJECTION_CHUNK_ROWS):
+    coords = np.empty((len(values), len(model["components"])), dtype=np.float32)
+    for start in range(0, len(values), chunk_rows):
+        block = (values[start:start + chunk_rows] - model["mean"]) / model["scale"]
+        coords[start:start + chunk_rows] = block @ model["components"].T
+    return coords
+
+
+# Membangun proyeksi seluruh lagu unik: model PCA dan kolom koordinat pc1/pc2 float32 (indeks = track_key)
+def build_projection(tracks):
+    values = tracks[PROJECTION_FEATURES].to_numpy(dtype=np.float64)
+    model = fit_pca(values)
+    coords = project(values, model)
+    frame = pd.DataFrame({"pc1": coords[:, 0], "pc2": coords[:, 1]}, index=tracks.index)
+    loadings = pd.DataFrame(model["components"].T, index=PROJECTION_FEATURES, columns=["PC1", "PC2"])
+    return {"coords": frame, "loadings": loadings, "explained": model["explained"], "rows": model["rows"]}
+
+
+# Proyeksi di-cache sekali per versi dataset (filter global cukup memilih baris koordinat)
+@instrumented_cache("projection", show_spinner="Menghitung peta musik...")
+def _load_projection(version):
+    tracks, _ = load_track_tables()
+    return build_projection(tracks)
+
+def load_projection():
+    return _load_projection(get_dataset_version())
+
+
+# Koordinat untuk baris tabel lagu (bisa hasil filter global) lewat track_key
+def map_coordinates(projection, tracks):
+    return projection["coords"].reindex(tracks.index)
+
+
+# Binning di server: histogram 2-D dalam jendela (x_range, y_range), hanya matriks hitungan yang dikirim ke browser
+# (indeks bin dihitung langsung lalu satu bincount, jauh lebih cepat dari histogram2d untuk jutaan titik)
+def density_grid(coords, x_range, y_range, bins=MAP_BINS):
+    x, y = coords["pc1"].to_numpy(), coords["pc2"].to_numpy()
+    x_edges = np.linspace(x_range[0], x_range[1], bins + 1)
+    y_edges = np.linspace(y_range[0], y_range[1], bins + 1)
+    inside = (x >= x_range[0]) & (x <= x_range[1]) & (y >= y_range[0]) & (y <= y_range[1])
+    ix = ((x[inside] - x_range[0]) * (bins / ((x_range[1] - x_range[0]) or 1))).astype(np.int64)
+    iy = ((y[inside] - y_range[0]) * (bins / ((y_range[1] - y_range[0]) or 1))).astype(np.int64)
+    cells = np.minimum(iy, bins - 1) * bins + np.minimum(ix, bins - 1)
+    counts = np.bincount(cells, minlength=bins * bins).reshape(bins, bins)
+    return counts, x_edges, y_edges
+
+
+# Indeks baris di dalam jendela (disampel acak deterministik untuk drill-down ke titik lagu) dan jumlah totalnya
+def sample_window(coords, x_range, y_range, n=SAMPLE_POINTS, seed=0):
+    x, y = coords["pc1"].to_numpy(), coords["pc2"].to_numpy()
+    inside = np.flatnonzero((x >= x_range[0]) & (x <= x_range[1]) & (y >= y_range[0]) & (y <= y_range[1]))
+    total = len(inside)
+    if total > n:
+        inside = np.sort(np.random.default_rng(seed).choice(inside, n, replace=False))
+    return inside, total
+
+
+# Peta musik: heatmap densitas (skala log) dengan overlay titik sampel per genre
+def plot_music_map(counts, x_edges, y_edges, explained, points=None, title="Peta Musik (PCA Fitur Audio)"):
+    fig = go.Figure(go.Heatmap(
+        z=np.round(np.log1p(counts), 2),
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        customdata=counts,
+        colorscale='Greens',
+        showscale=False,
+        hovertemplate="PC1 %{x:.2f}, PC2 %{y:.2f}<br>%{customdata:,.0f} lagu<extra></extra>"
+    ))
+    if points is not None:
+        for genre, group in points.groupby('playlist_genre', sort=True):
+            fig.add_trace(go.Scattergl(
+                x=group['pc1'],
+                y=group['pc2'],
+                mode='markers',
+                name=genre,
+                marker=dict(size=5, opacity=0.8),
+                hovertext=group['track_name'] + " - " + group['track_artist'],
+                hovertemplate="%{hovertext}<extra>" + genre + "</extra>"
+            ))
+    fig.update_layout(
+        title=title,
+        height=650,
+        xaxis_title=f"PC1 ({explained[0]:.0%} varians)",
+        yaxis_title=f"PC2 ({explained[1]:.0%} varians)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
@@ -0,0 +1,227 @@
+import os
+import sqlite3
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+from helpers.instrumentation import record
+from helpers.parallel import MERGEABLE, parallel_aggregate, should_parallelize
+
+# DuckDB opsional: tanpa paket ini backend duckdb tidak tersedia
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+# Backend agregasi: pandas (default), sqlite (bawaan Python, in-process) atau duckdb (kolumnar, multi-thread)
+QUERY_BACKEND = os.environ.get("SPOTIFY_QUERY_BACKEND", "pandas").lower()
+BACKENDS = ("pandas", "sqlite", "duckdb")
+
+# Fungsi agregasi yang didukung semua backend (semantik pandas: std sampel, count tanpa NaN)
+AGGREGATES = ("mean", "std", "sum", "count", "nunique", "min", "max")
+
+# Operator filter where: (kolom, operator, nilai)
+OPERATORS = ("==", "!=", ">=", "<=", ">", "<", "in")
+
+# Tabel SQLite per objek DataFrame; frame yang di-cache dipakai ulang antar rerun sehingga hanya disalin sekali
+_sqlite_tables = {}
+_sqlite_lock = threading.Lock()
+_duckdb_connection = []
+
+
+# Fungsi untuk memilih backend yang benar-benar tersedia
+def resolve_backend(backend=None):
+    backend = (backend or QUERY_BACKEND).lower()
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend query tidak dikenal: {backend} (pilihan: {', '.join(BACKENDS)})")
+    if backend == "duckdb" and duckdb is None:
+        raise ImportError("Backend duckdb membutuhkan paket duckdb (pip install duckdb)")
+    return backend
+
+
+def _columns_of(by, measures, where):
+    columns = list(by) + [column for column, _ in measures.values()] + [column for column, _, _ in where]
+    return list(dict.fromkeys(columns))
+
+
+# Memisahkan where menjadi predikat indeks filter (==, in, rentang inklusif >= / <=) dan sisanya (!=, <, >)
+def _index_predicates(where):
+    predicates, rest = {}, []
+    for column, op, value in where:
+        current = predicates.get(column)
+        if op in ("==", "in") and current is None:
+            predicates[column] = list(value) if op == "in" else value
+        elif op == ">=" and (current is None or (isinstance(current, slice) and current.start is None)):
+            predicates[column] = slice(value, current.stop if current is not None else None)
+        elif op == "<=" and (current is None or (isinstance(current, slice) and current.stop is None)):
+            predicates[column] = slice(current.start if current is not None else None, value)
+        else:
+            rest.append((column, op, value))
+    return predicates, rest
+
+
+# Baris yang memenuhi where: lewat indeks filter (helpers.filters) jika frame diberi nama, mask untuk sisanya
+def _where_frame(df, where, name, version):
+    frame = df
+    if name is not None:
+        from helpers.filters import current_view_version, load_filter_index
+
+        index = load_filter_index(df, version or current_view_version(), name)
+        # Indeks di-cache per versi + nama; frame lain dengan kunci yang sama tetap memakai mask
+        if index.df is df:
+            predicates, where = _index_predicates(where)
+            frame = index.frame(**predicates)
+    if where:
+        mask = np.ones(len(frame), dtype=bool)
+        for column, op, value in where:
+            values = frame[column]
+            if op == "in":
+                mask &= values.isin(list(value)).to_numpy()
+            else:
+                mask &= {"==": values.eq, "!=": values.ne, ">=": values.ge, "<=": values.le,
+                         ">": values.gt, "<": values.lt}[op](value).to_numpy()
+        frame = frame.loc[mask]
+    return frame
+
+
+# Backend pandas: filter (indeks atau mask) lalu groupby dengan named aggregation
+# Tabel besar (>= PARALLEL_MIN_ROWS) dengan statistik yang bisa digabung diagregasi paralel per partisi
+def _aggregate_pandas(df, by, measures, where, name=None, version=None):
+    frame = df
+    if where:
+        frame = _where_frame(df, where, name, version)[_columns_of(by, measures, [])]
+    if should_parallelize(len(frame)) and all(func in MERGEABLE for _, func in measures.values()):
+        return parallel_aggregate(frame, by, measures)
+    return frame.groupby(by, observed=True, sort=True).agg(**{name: spec for name, spec in measures.items()})
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+# Ekspresi SQL untuk satu agregasi; SQLite tidak punya STDDEV sehingga dihitung dari jumlah dan jumlah kuadrat
+def _sql_measure(column, func, backend):
+    column = _quote(column)
+    if func == "mean":
+        return f"AVG({column})"
+    if func == "nunique":
+        return f"COUNT(DISTINCT {column})"
+    if func == "std":
+        if backend == "duckdb":
+            return f"STDDEV_SAMP({column})"
+        n = f"COUNT({column})"
+        return (f"CASE WHEN {n} > 1 THEN SQRT(MAX(SUM({column} * {column}) - SUM({column}) * SUM({column}) / {n}, 0)"
+                f" / ({n} - 1)) END")
+    return f"{func.upper()}({column})"
+
+
+# Menyusun SELECT ... GROUP BY beserta parameternya (placeholder ? dipakai SQLite dan DuckDB)
+def _build_sql(table, by, measures, where, backend):
+    select = [_quote(column) for column in by] + [
+        f"{_sql_measure(column, func, backend)} AS {_quote(name)}" for name, (column, func) in measures.items()]
+    conditions, params = [f"{_quote(column)} IS NOT NULL" for column in by], []
+    for column, op, value in where:
+        if op == "in":
+            value = list(value)
+            if not value:
+                conditions.append("0 = 1")
+                continue
+            conditions.append(f"{_quote(column)} IN ({', '.join('?' * len(value))})")
+            params += value
+        else:
+            conditions.append(f"{_quote(column)} {'=' if op == '==' else op} ?")
+            params.append(value)
+    group = ", ".join(_quote(column) for column in by)
+    sql = (f"SELECT {', '.join(select)} FROM {table} WHERE {' AND '.join(conditions)}"
+           f" GROUP BY {group} ORDER BY {group}")
+    return sql, [_sql_value(value) for value in params]
+
+
+# Nilai parameter numpy diubah ke tipe Python agar bisa di-bind oleh driver SQL
+def _sql_value(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+# Kolom DataFrame ke tipe yang dipahami SQLite (kategori -> teks, tanggal -> teks ISO)
+def _sqlite_frame(df):
+    frame = df.copy()
+    for column in frame.columns:
+        if isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = frame[column].astype(object)
+        elif pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = frame[column].dt.strftime("%Y-%m-%d")
+    return frame
+
+
+# Tabel SQLite in-memory untuk satu DataFrame; dibuat ulang hanya jika query butuh kolom yang belum disalin
+def _sqlite_table(df, columns):
+    key = id(df)
+    with _sqlite_lock:
+        entry = _sqlite_tables.get(key)
+        if entry is None:
+            connection = sqlite3.connect(":memory:", check_same_thread=False)
+            entry = _sqlite_tables[key] = {"connection": connection, "lock": threading.Lock(), "columns": []}
+            weakref.finalize(df, _sqlite_tables.pop, key, None)
+    with entry["lock"]:
+        missing = [column for column in columns if column not in entry["columns"]]
+        if missing:
+            entry["columns"] += missing
+            _sqlite_frame(df[entry["columns"]]).to_sql("frame", entry["connection"], index=False, if_exists="replace")
+    return entry
+
+
+def _aggregate_sqlite(df, by, measures, where, name=None, version=None):
+    entry = _sqlite_table(df, _columns_of(by, measures, where))
+    sql, params = _build_sql("frame", by, measures, where, "sqlite")
+    with entry["lock"]:
+        rows = entry["connection"].execute(sql, params).fetchall()
+    return pd.DataFrame.from_records(rows, columns=list(by) + list(measures)).set_index(by)
+
+
+# DuckDB membaca kolom numpy DataFrame langsung (tanpa salin) lewat register pada cursor per query
+def _aggregate_duckdb(df, by, measures, where, name=None, version=None):
+    if not _duckdb_connection:
+        _duckdb_connection.append(duckdb.connect())
+    cursor = _duckdb_connection[0].cursor()
+    try:
+        cursor.register("frame", df[_columns_of(by, measures, where)])
+        sql, params = _build_sql("frame", by, measures, where, "duckdb")
+        result = cursor.execute(sql, params).df()
+    finally:
+        cursor.close()
+    return result.set_index(by)
+
+
+_BACKEND_FUNCTIONS = {"pandas": _aggregate_pandas, "sqlite": _aggregate_sqlite, "duckdb": _aggregate_duckdb}
+
+
+# Fungsi agregasi tunggal untuk semua halaman: GROUP BY `by` dengan `measures` {nama: (kolom, fungsi)}
+# Hasil berindeks kolom `by` (urut naik), bisa diurutkan ulang lewat order_by dan dipotong lewat limit
+# name (+ version, default versi tampilan aktif) = nama frame untuk indeks filter, dipakai backend pandas untuk where
+def aggregate(df, by, measures, where=(), order_by=None, ascending=True, limit=None, backend=None, name=None,
+              version=None):
+    by = [by] if isinstance(by, str) else list(by)
+    where = list(where)
+    for column, func in measures.values():
+        if func not in AGGREGATES:
+            raise ValueError(f"Agregasi tidak didukung: {func}")
+    for column, op, _ in where:
+        if op not in OPERATORS:
+            raise ValueError(f"Operator filter tidak didukung: {op}")
+
+    backend = resolve_backend(backend)
+    start = time.perf_counter()
+    result = _BACKEND_FUNCTIONS[backend](df, by, measures, where, name, version)
+    if order_by is not None:
+        result = result.sort_values(order_by, ascending=ascending, kind="stable")
+    if limit is not None:
+        result = result.head(limit)
+    record("query", f"{backend}:{'/'.join(by)}", time.perf_counter() - start)
+    return result
+
+
+# Agregasi satu ukuran sebagai Series (pengganti df.groupby(by)[column].func())
+def aggregate_series(df, by, column, func="mean", **kwargs):
+    return aggregate(df, by, {column: (column, func)}, **kwargs)[column]
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from helpers.utils import label_sign, map_categories
+from helpers.instrumentation import instrumented_cache
+
+# Level entitas yang bisa diperingkat (label -> kolom)
+RANK_LEVELS = {
+    "Genre": "playlist_genre",
+    "Subgenre": "playlist_subgenre",
+    "Artis": "track_artist"
+}
+
+# Warna arah perubahan peringkat
+DIRECTION_COLORS = {"Naik": "#1DB954", "Turun": "#E51D2A", "Tetap": "#B3B3B3"}
+
+
+# Membangun matriks tahun x entitas berisi rata-rata popularitas dan peringkatnya dalam satu pass
+def build_rank_table(df, entity_col, value_col='track_popularity'):
+    data = df[df['year'].notna()]
+    year_codes, years = pd.factorize(data['year'], sort=True)
+    entity_codes, entities = pd.factorize(data[entity_col], sort=True)
+    valid = entity_codes >= 0
+    cells = year_codes[valid].astype(np.int64) * len(entities) + entity_codes[valid]
+    size = len(years) * len(entities)
+
+    counts = np.bincount(cells, minlength=size)
+    sums = np.bincount(cells, weights=data[value_col].to_numpy(dtype=np.float64)[valid], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = (sums / counts).reshape(len(years), len(entities))
+
+    popularity = pd.DataFrame(means.astype(np.float32), index=pd.Index(years, name='year'),
+                              columns=pd.Index(entities, name=entity_col))
+    # Peringkat 1 = popularitas tertinggi pada tahun tersebut; entitas tanpa lagu tetap NaN
+    ranks = popularity.rank(axis=1, ascending=False, method='first')
+    return {'popularity': popularity, 'rank': ranks}
+
+
+# Tabel peringkat di-cache per versi data (dataset + filter global) dan level entitas
+@instrumented_cache("rank_table", show_spinner="Menghitung peringkat...", max_entries=32)
+def load_rank_table(_df, version, entity_col):
+    return build_rank_table(_df, entity_col)
+
+
+# Perubahan peringkat antara dua tahun, cukup lookup dua baris dari matriks peringkat
+def rank_change(rank_table, start_year, end_year, top=10):
+    ranks = rank_table['rank']
+    change = pd.DataFrame({
+        'rank_start': ranks.loc[start_year],
+        'rank_end': ranks.loc[end_year]
+    }).dropna()
+    change.index.name = 'entity'
+    change = change.reset_index()
+
+    change['change'] = change['rank_start'] - change['rank_end']
+    change['abs_change'] = change['change'].abs()
+    change['direction'] = label_sign(change['change'], "Naik", "Turun", "Tetap")
+    change['color'] = map_categories(change['direction'], DIRECTION_COLORS)
+
+    return change.sort_values('abs_change', ascending=False, kind='stable').head(top)
+
+
+# Slope chart perubahan peringkat: satu trace per arah, segmen dipisahkan None
+def plot_rank_change(change, start_year, end_year, entity_label="Genre"):
+    fig = go.Figure()
+
+    for direction, group in change.groupby('direction', sort=False):
+        n = len(group)
+        x = np.tile([start_year, end_year, None], n)
+        y = np.column_stack([group['rank_start'], group['rank_end'], np.full(n, None)]).ravel()
+        text = np.column_stack([
+            group['rank_start'].astype(int).astype(str),
+            group['rank_end'].astype(int).astype(str) + " " + group['entity'].astype(str),
+            np.full(n, "")
+        ]).ravel()
+        hover = np.repeat(group['entity'].astype(str).to_numpy(), 3)
+
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=y,
+            mode='lines+markers+text',
+            name=direction,
+            line=dict(width=2, color=DIRECTION_COLORS[direction]),
+            marker=dict(size=10),
+            text=text,
+            hovertext=hover,
+            hovertemplate="%{hovertext}<br>Peringkat: %{y}<extra></extra>",
+            textposition="top center"
+        ))
+
+    fig.update_layout(
+        title=f"Perubahan Peringkat {entity_label} dari {start_year} ke {end_year}",
+        xaxis_title="Tahun",
+        yaxis_title="Peringkat",
+        yaxis=dict(autorange="reversed"),  # Memastikan peringkat 1 di atas
+        height=600,
+        showlegend=True,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig
+
+
+# Bump chart: peringkat tiap tahun untuk entitas teratas, cukup slicing dari matriks peringkat
+def plot_bump_chart(rank_table, year_range, top=10, entity_label="Genre"):
+    ranks = rank_table['rank']
+    ranks = ranks.loc[(ranks.index >= year_range[0]) & (ranks.index <= year_range[1])]
+    ranks = ranks.loc[:, ranks.notna().any()]
+
+    # Entitas teratas menurut rata-rata peringkat dalam rentang tahun
+    entities = ranks.mean().nsmallest(top).index
+
+    fig = go.Figure()
+
+    for entity in entities:
+        fig.add_trace(go.Scatter(
+            x=ranks.index,
+            y=ranks[entity],
+            mode='lines+markers',
+            name=str(entity),
+            connectgaps=False,
+            line=dict(width=3),
+            marker=dict(size=9)
+        ))
+
+    fig.update_layout(
+        title=f"Peringkat {entity_label} per Tahun ({year_range[0]} - {year_range[1]})",
+        xaxis_title="Tahun",
+        yaxis_title="Peringkat",
+        yaxis=dict(autorange="reversed"),  # Memastikan peringkat 1 di atas
+        height=600,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+
+    return fig
@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.spatial.distance import pdist, squareform
+from helpers.instrumentation import instrumented_cache
+
+# Fitur audio yang dipakai untuk mengukur kemiripan
+SIMILARITY_FEATURES = ["danceability", "energy", "acousticness", "valence", "speechiness", "instrumentalness", "liveness"]
+
+# Level entitas yang bisa dibandingkan (label -> kolom)
+SIMILARITY_LEVELS = {
+    "Genre": "playlist_genre",
+    "Subgenre": "playlist_subgenre",
+    "Playlist": "playlist_name",
+    "Artis": "track_artist"
+}
+
+# Metrik kemiripan yang tersedia (label -> metrik)
+SIMILARITY_METRICS = {
+    "Euclidean": "euclidean",
+    "Cosine": "cosine",
+    "Korelasi": "correlation"
+}
+
+# Batas jumlah elemen matriks per blok (float32), menjaga memori tetap kecil
+BLOCK_ELEMENTS = 16_000_000
+
+
+# Menyiapkan matriks fitur sesuai metrik (centering / normalisasi baris)
+def _prepare_matrix(centroids, metric):
+    X = np.asarray(centroids, dtype=np.float32)
+    if metric == "correlation":
+        X = X - X.mean(axis=1, keepdims=True)
+    if metric in ("cosine", "correlation"):
+        norms = np.linalg.norm(X, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        X = X / norms
+    return X
+
+
+# Menghitung top-k tetangga per entitas secara blok demi blok (tanpa matriks N x N penuh)
+def blocked_topk(centroids, metric="euclidean", k=20, block_size=None):
+    X = _prepare_matrix(centroids, metric)
+    n = len(X)
+    k = max(0, min(k, n - 1))
+    if block_size is None:
+        block_size = int(min(4096, max(1, BLOCK_ELEMENTS // max(n, 1))))
+
+    neighbors = np.zeros((n, k), dtype=np.int32)
+    scores = np.zeros((n, k), dtype=np.float32)
+    sq_norms = np.einsum("ij,ij->i", X, X)
+    max_distance = np.float32(0)
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        block = X[start:stop] @ X.T
+        if metric == "euclidean":
+            # Jarak euclidean lewat ||a||^2 + ||b||^2 - 2ab, skor = -jarak
+            block *= -2
+            block += sq_norms[start:stop, None]
+            block += sq_norms[None, :]
+            np.maximum(block, 0, out=block)
+            np.sqrt(block, out=block)
+            max_distance = max(max_distance, block.max())
+            np.negative(block, out=block)
+
+        if k == 0:
+            continue
+
+        # Abaikan kemiripan entitas dengan dirinya sendiri
+        rows = np.arange(stop - start)
+        block[rows, rows + start] = -np.inf
+
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        neighbors[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    # Konversi jarak ke similarity (semakin dekat ke 1, semakin mirip)
+    if metric == "euclidean":
+        scores = 1 - (-scores / max_distance) if max_distance > 0 else np.ones_like(scores)
+
+    return neighbors, scores, float(max_distance)
+
+
+# Indeks kemiripan: centroid fitur per entitas + top-k tetangga yang bisa di-query
+class SimilarityIndex:
+    def __init__(self, labels, centroids, counts, metric="euclidean", k=20):
+        self.labels = pd.Index(labels)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self.counts = np.asarray(counts)
+        self.metric = metric
+        self.neighbors, self.scores, self.max_distance = blocked_topk(self.centroids, metric, k)
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Entitas diurutkan dari jumlah lagu terbanyak
+    def labels_by_size(self):
+        return self.labels[np.argsort(-self.counts, kind="stable")].tolist()
+
+    # Tetangga paling mirip untuk satu entitas
+    def most_similar(self, label, k=None):
+        pos = self.labels.get_loc(label)
+        k = self.neighbors.shape[1] if k is None else k
+        return pd.DataFrame({
+            "entity": self.labels[self.neighbors[pos, :k]],
+            "similarity": self.scores[pos, :k],
+            "song_count": self.counts[self.neighbors[pos, :k]]
+        })
+
+    # Matriks kemiripan padat hanya untuk subset entitas yang dipilih
+    def matrix(self, labels):
+        positions = self.labels.get_indexer(labels)
+        X = self.centroids[positions].astype(np.float64)
+        if self.metric == "euclidean":
+            dist = squareform(pdist(X, "euclidean"))
+            values = 1 - (dist / self.max_distance) if self.max_distance > 0 else np.ones_like(dist)
+        else:
+            values = 1 - squareform(pdist(X, self.metric))
+            np.fill_diagonal(values, 1)
+        return pd.DataFrame(values, index=self.labels[positions], columns=self.labels[positions])
+
+    # Subset untuk heatmap: entitas acuan + tetangganya, diurutkan dengan hierarchical clustering
+    def clustered_subset(self, anchor=None, size=20):
+        if len(self.labels) <= size:
+            labels = self.labels.tolist()
+        elif anchor is not None:
+            pos = self.labels.get_loc(anchor)
+            labels = [anchor] + self.labels[self.neighbors[pos, :size - 1]].tolist()
+        else:
+            labels = self.labels_by_size()[:size]
+
+        if len(labels) > 2:
+            X = _prepare_matrix(self.centroids[self.labels.get_indexer(labels)], self.metric)
+            order = leaves_list(linkage(X.astype(np.float64), "average"))
+            labels = [labels[i] for i in order]
+        return labels
+
+
+# Membangun indeks kemiripan untuk satu level, di-cache per versi dataset
+@instrumented_cache("similarity_index", show_spinner="Menghitung kemiripan...", max_entries=16)
+def build_similarity_index(_df, version, level_col, metric="euclidean", k=20):
+    grouped = _df.groupby(level_col)[SIMILARITY_FEATURES]
+    centroids = grouped.mean()
+    counts = grouped.size()
+    return SimilarityIndex(centroids.index, centroids.values, counts.values, metric, k)
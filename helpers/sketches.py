@@ -0,0 +1,311 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from helpers.instrumentation import instrumented_cache
+from helpers.query import aggregate_series
+
+# Mode sketch: exact (selalu hitung eksak), approx (selalu sketch) atau auto (eksak untuk tabel kecil)
+SKETCH_MODE = os.environ.get("SPOTIFY_SKETCHES", "auto").lower()
+SKETCH_MODES = ("auto", "exact", "approx")
+
+# Batas baris mode auto: di bawah ini distinct count dan kuantil dihitung eksak
+SKETCH_EXACT_MAX_ROWS = int(os.environ.get("SPOTIFY_SKETCH_EXACT_MAX_ROWS", 1_000_000))
+
+# HyperLogLog: 2^14 register per grup, galat relatif standar 1.04 / sqrt(2^14) = 0.81%
+HLL_PRECISION = 14
+
+# t-digest: kompresi delta = 200, galat rank kuantil <= pi / delta (1.6%), jauh lebih kecil di ekor distribusi
+TDIGEST_COMPRESSION = 200
+
+# Baris dibaca per chunk saat membangun sketch, agar memori tetap terbatas
+SKETCH_CHUNK_ROWS = 1_000_000
+
+# Level pengelompokan sketch (label -> kolom; None = seluruh tabel)
+SKETCH_LEVELS = {"Semua": None, "Genre": "playlist_genre", "Subgenre": "playlist_subgenre", "Tahun": "year"}
+
+# Kuantil untuk ringkasan box plot
+BOX_QUANTILES = (0.25, 0.5, 0.75)
+
+# Tabel sketch terakhir per (nama frame, level, kolom), untuk pembaruan inkremental saat baris ditambahkan
+_latest = {}
+_latest_lock = threading.Lock()
+
+
+# Fungsi untuk menentukan mode (exact/approx) untuk tabel berukuran n_rows
+def resolve_sketch_mode(n_rows, mode=None):
+    mode = (mode or SKETCH_MODE).lower()
+    if mode not in SKETCH_MODES:
+        raise ValueError(f"Mode sketch tidak dikenal: {mode} (pilihan: {', '.join(SKETCH_MODES)})")
+    if mode == "auto":
+        return "exact" if n_rows < SKETCH_EXACT_MAX_ROWS else "approx"
+    return mode
+
+
+# Galat relatif standar HyperLogLog dan batas galat rank t-digest
+def hll_relative_error(precision=HLL_PRECISION):
+    return 1.04 / np.sqrt(2 ** precision)
+
+def tdigest_rank_error(compression=TDIGEST_COMPRESSION):
+    return np.pi / compression
+
+
+# Register HyperLogLog per grup (n_groups x 2^precision, uint8) dari hash 64-bit nilai
+# Indeks register = bit atas hash, rank = posisi bit 1 pertama dari bit sisanya
+def hll_registers(values, codes, n_groups, precision=HLL_PRECISION):
+    m = 2 ** precision
+    registers = np.zeros((n_groups, m), dtype=np.uint8)
+    ok = (codes >= 0) & pd.notna(values)
+    hashes = pd.util.hash_array(np.asarray(values[ok], dtype=object) if values.dtype.kind not in "biuf"
+                                else np.asarray(values[ok]))
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+    bit_length = np.frexp(rest.astype(np.float64))[1]
+    rank = (64 - precision - bit_length + 1).astype(np.uint8)
+    np.maximum.at(registers.reshape(-1), codes[ok] * m + index, rank)
+    return registers
+
+
+def _sigma(x):
+    if x == 1:
+        return np.inf
+    y, z = 1.0, x
+    while True:
+        x *= x
+        previous, z = z, z + x * y
+        y += y
+        if z == previous:
+            return z
+
+
+def _tau(x):
+    if x == 0 or x == 1:
+        return 0.0
+    y, z = 1.0, 1 - x
+    while True:
+        x = np.sqrt(x)
+        y *= 0.5
+        previous, z = z, z - (1 - x) ** 2 * y
+        if z == previous:
+            return z / 3
+
+
+# Estimasi jumlah nilai unik per grup dengan estimator Ertl (2017): tanpa tabel koreksi bias,
+# galat tetap ~1.04 / sqrt(m) di seluruh rentang kardinalitas (termasuk transisi linear counting)
+def hll_estimate(registers):
+    m, q = registers.shape[1], 64 - int(np.log2(registers.shape[1]))
+    estimates = np.zeros(len(registers))
+    for g, row in enumerate(registers):
+        histogram = np.bincount(row, minlength=q + 2)
+        z = m * _tau(1 - histogram[q + 1] / m)
+        for k in range(q, 0, -1):
+            z = 0.5 * (z + histogram[k])
+        z += m * _sigma(histogram[0] / m)
+        estimates[g] = m * m / (2 * np.log(2)) / z
+    return estimates
+
+
+# Kompresi t-digest untuk banyak grup sekaligus: centroid diurutkan per grup, lalu digabung per bin skala
+# k(q) = delta / 2pi * asin(2q - 1), sehingga setiap centroid mencakup lebar k <= 1 (kecil di ekor, besar di median)
+def _compress(group, mean, weight, n_groups, compression):
+    order = np.lexsort((mean, group))
+    group, mean, weight = group[order], mean[order], weight[order]
+    total = np.bincount(group, weights=weight, minlength=n_groups)
+    offsets = np.concatenate([[0.0], np.cumsum(total)[:-1]])
+    before = np.cumsum(weight) - weight - offsets[group]
+    q = np.clip((before + weight / 2) / total[group], 0, 1)
+    bins_per_group = compression // 2 + 1
+    bins = np.minimum(np.floor(compression / (2 * np.pi) * np.arcsin(2 * q - 1) + compression / 4),
+                      bins_per_group - 1).astype(np.int64)
+    keys, inverse = np.unique(group * bins_per_group + bins, return_inverse=True)
+    merged_weight = np.bincount(inverse, weights=weight)
+    return {"group": keys // bins_per_group, "mean": np.bincount(inverse, weights=mean * weight) / merged_weight,
+            "weight": merged_weight}
+
+
+# t-digest per grup dari nilai mentah (centroid + min/max per grup untuk ujung interpolasi)
+def tdigest(values, codes, n_groups, compression=TDIGEST_COMPRESSION):
+    values = np.asarray(values, dtype=np.float64)
+    ok = (codes >= 0) & ~np.isnan(values)
+    codes, values = codes[ok], values[ok]
+    digest = _compress(codes, values, np.ones(len(values)), n_groups, compression)
+    digest["min"] = np.full(n_groups, np.inf)
+    digest["max"] = np.full(n_groups, -np.inf)
+    np.minimum.at(digest["min"], codes, values)
+    np.maximum.at(digest["max"], codes, values)
+    return digest
+
+
+# Menggabungkan dua t-digest dengan grup yang sama: centroid digabung lalu dikompresi ulang
+def merge_tdigests(a, b, compression=TDIGEST_COMPRESSION):
+    n_groups = len(a["min"])
+    digest = _compress(np.concatenate([a["group"], b["group"]]), np.concatenate([a["mean"], b["mean"]]),
+                       np.concatenate([a["weight"], b["weight"]]), n_groups, compression)
+    digest["min"], digest["max"] = np.minimum(a["min"], b["min"]), np.maximum(a["max"], b["max"])
+    return digest
+
+
+# Kuantil per grup dari t-digest (interpolasi linear antar titik tengah centroid, min/max di kedua ujung)
+def tdigest_quantiles(digest, qs):
+    n_groups = len(digest["min"])
+    result = np.full((n_groups, len(qs)), np.nan)
+    bounds = np.searchsorted(digest["group"], np.arange(n_groups + 1))
+    for g in range(n_groups):
+        mean, weight = digest["mean"][bounds[g]:bounds[g + 1]], digest["weight"][bounds[g]:bounds[g + 1]]
+        if not len(weight):
+            continue
+        total = weight.sum()
+        positions = np.concatenate([[0.0], np.cumsum(weight) - weight / 2, [total]])
+        points = np.concatenate([[digest["min"][g]], mean, [digest["max"][g]]])
+        result[g] = np.interp(np.asarray(qs) * total, positions, points)
+    return result
+
+
+# Memperluas sketch ke daftar grup baru (grup yang belum ada diisi kosong)
+def _align(table, new_groups):
+    position = new_groups.get_indexer(table["groups"])
+    for column, registers in table["hll"].items():
+        aligned = np.zeros((len(new_groups), registers.shape[1]), dtype=np.uint8)
+        aligned[position] = registers
+        table["hll"][column] = aligned
+    for column, digest in table["digest"].items():
+        minimum, maximum = np.full(len(new_groups), np.inf), np.full(len(new_groups), -np.inf)
+        minimum[position], maximum[position] = digest["min"], digest["max"]
+        table["digest"][column] = {"group": position[digest["group"]], "mean": digest["mean"],
+                                   "weight": digest["weight"], "min": minimum, "max": maximum}
+    table["groups"] = new_groups
+    return table
+
+
+def _group_codes(frame, level, groups):
+    if level is None:
+        return np.zeros(len(frame), dtype=np.int64)
+    return groups.get_indexer(frame[level]).astype(np.int64)
+
+
+# Sidik jari isi tabel, untuk memastikan data lama tidak berubah sebelum pembaruan inkremental
+def _fingerprint(frame):
+    return int(pd.util.hash_pandas_object(frame, index=False).to_numpy().sum(dtype=np.uint64))
+
+
+# Menambahkan baris (ingest) ke tabel sketch per chunk: register HLL digabung dengan maksimum, t-digest dikompresi ulang
+def update_sketch_table(table, df):
+    appended = df.iloc[table["rows"]:]
+    level = table["level"]
+    if level is not None:
+        seen = pd.Index(appended[level].dropna().unique())
+        table = _align(table, table["groups"].union(seen) if len(seen) else table["groups"])
+    n_groups = len(table["groups"])
+    for start in range(0, len(appended), SKETCH_CHUNK_ROWS):
+        chunk = appended.iloc[start:start + SKETCH_CHUNK_ROWS]
+        codes = _group_codes(chunk, level, table["groups"])
+        for column in table["hll"]:
+            table["hll"][column] = np.maximum(table["hll"][column],
+                                              hll_registers(chunk[column].to_numpy(), codes, n_groups))
+        for column in table["digest"]:
+            table["digest"][column] = merge_tdigests(table["digest"][column],
+                                                     tdigest(chunk[column].to_numpy(), codes, n_groups))
+    table["rows"] = len(df)
+    table["fingerprint"] = _fingerprint(df[table["columns"]])
+    return table
+
+
+# Membangun tabel sketch dari nol: HLL untuk kolom distinct, t-digest untuk kolom kuantil, per grup level
+def build_sketch_table(df, level=None, distinct=(), quantiles=()):
+    groups = pd.Index(["Semua"]) if level is None else pd.Index(np.sort(df[level].dropna().unique()))
+    table = {
+        "level": level,
+        "groups": groups,
+        "columns": list(dict.fromkeys(list(distinct) + list(quantiles) + ([level] if level else []))),
+        "rows": 0,
+        "hll": {column: np.zeros((len(groups), 2 ** HLL_PRECISION), dtype=np.uint8) for column in distinct},
+        "digest": {column: {"group": np.zeros(0, dtype=np.int64), "mean": np.zeros(0), "weight": np.zeros(0),
+                            "min": np.full(len(groups), np.inf), "max": np.full(len(groups), -np.inf)}
+                   for column in quantiles}
+    }
+    return update_sketch_table(table, df)
+
+
+# Tabel sketch untuk satu frame: diperbarui inkremental jika frame = tabel terakhir + baris baru di akhir
+def sketch_table(df, name, level=None, distinct=(), quantiles=()):
+    key = (name, level, tuple(distinct), tuple(quantiles))
+    with _latest_lock:
+        previous = _latest.get(key)
+    columns = previous["columns"] if previous else None
+    if (previous is not None and previous["rows"] <= len(df)
+            and _fingerprint(df[columns].iloc[:previous["rows"]]) == previous["fingerprint"]):
+        table = previous if previous["rows"] == len(df) else update_sketch_table(
+            {**previous, "hll": dict(previous["hll"]), "digest": dict(previous["digest"])}, df)
+    else:
+        table = build_sketch_table(df, level, distinct, quantiles)
+    with _latest_lock:
+        _latest[key] = table
+    return table
+
+
+# Tabel sketch di-cache per versi data (dataset + filter global), nama frame, level dan kolom
+@instrumented_cache("sketches", show_spinner=False, max_entries=32)
+def load_sketch_table(_df, version, name, level, distinct, quantiles):
+    return sketch_table(_df, name, level, distinct, quantiles)
+
+
+def _sketch(df, version, name, level, distinct=(), quantiles=()):
+    if version is None:
+        return build_sketch_table(df, level, distinct, quantiles)
+    return load_sketch_table(df, version, name, level, tuple(distinct), tuple(quantiles))
+
+
+# Jumlah nilai unik `column` (per grup `by` sebagai Series, atau satu angka): eksak untuk tabel kecil, HLL untuk tabel besar
+def distinct_count(df, column, by=None, version=None, name="frame", mode=None):
+    if resolve_sketch_mode(len(df), mode) == "exact":
+        return int(df[column].nunique()) if by is None else aggregate_series(df, by, column, "nunique")
+    table = _sketch(df, version, name, by, distinct=(column,))
+    estimate = np.round(hll_estimate(table["hll"][column])).astype(np.int64)
+    if by is None:
+        return int(estimate[0])
+    return pd.Series(estimate, index=table["groups"].rename(by), name=column)
+
+
+# Ringkasan distribusi per grup (min, kuartil, max, jumlah) untuk box plot: eksak atau dari t-digest
+def quantile_summary(df, column, by, version=None, name="frame", mode=None, qs=BOX_QUANTILES):
+    labels = ["q1", "median", "q3"] if tuple(qs) == BOX_QUANTILES else [f"q{q:g}" for q in qs]
+    if resolve_sketch_mode(len(df), mode) == "exact":
+        grouped = df[[by, column]].dropna().groupby(by, observed=True, sort=True)[column]
+        summary = grouped.quantile(list(qs)).unstack()
+        summary.columns = labels
+        summary["min"], summary["max"], summary["count"] = grouped.min(), grouped.max(), grouped.count()
+    else:
+        table = _sketch(df, version, name, by, quantiles=(column,))
+        digest = table["digest"][column]
+        summary = pd.DataFrame(tdigest_quantiles(digest, qs), index=table["groups"].rename(by), columns=labels)
+        summary["min"], summary["max"] = digest["min"], digest["max"]
+        summary["count"] = np.bincount(digest["group"], weights=digest["weight"], minlength=len(summary))
+        summary = summary[summary["count"] > 0]
+    summary["count"] = summary["count"].astype(np.int64)
+    return summary[["min"] + labels + ["max", "count"]]
+
+
+# Box plot dari ringkasan kuartil (hanya lima angka per grup yang dikirim ke browser, bukan semua titik)
+def plot_quantile_box(summary, title, x_label, y_label, height=500):
+    fig = go.Figure()
+    for group, row in summary.iterrows():
+        fig.add_trace(go.Box(
+            x=[group],
+            q1=[row["q1"]],
+            median=[row["median"]],
+            q3=[row["q3"]],
+            lowerfence=[row["min"]],
+            upperfence=[row["max"]],
+            name=str(group),
+            hovertext=f"{row['count']:,} data"
+        ))
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_label,
+        yaxis_title=y_label,
+        height=height,
+        showlegend=False
+    )
+    return fig
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+from helpers.instrumentation import instrumented_cache
+
+# Fitur yang diringkas di cube tren
+TREND_FEATURES = ["track_popularity", "danceability", "energy", "valence", "acousticness",
+                  "instrumentalness", "speechiness", "liveness", "loudness", "tempo", "duration_min"]
+
+# Resolusi waktu yang didukung (label -> resolusi)
+TREND_RESOLUTIONS = {"Tahun": "year", "Kuartal": "quarter", "Bulan": "month"}
+
+
+# Membangun cube count/sum/sum-of-squares per (tahun, bulan, grup) sekali untuk semua fitur
+def build_trend_cube(df, group_cols):
+    data = df[df['year'].notna()]
+    keys = ['year', 'release_month'] + list(group_cols)
+    values = data[TREND_FEATURES].astype(np.float64)
+    squares = (values * values).add_suffix('__sumsq')
+    frame = pd.concat([data[keys], values.add_suffix('__sum'), squares], axis=1)
+    for feature in TREND_FEATURES:
+        # Baris dengan nilai kosong tidak ikut dihitung untuk fitur tersebut
+        frame[f'{feature}__n'] = values[feature].notna().astype(np.int64)
+    cube = frame.groupby(keys, sort=True, observed=True).sum(min_count=0).reset_index()
+    cube['year'] = cube['year'].astype(np.int32)
+    return cube
+
+
+# Cube tren di-cache per versi data (dataset + filter global) dan level grup
+@instrumented_cache("trend_cube", show_spinner="Menyiapkan cube tren...", max_entries=32)
+def load_trend_cube(_df, version, group_cols):
+    return build_trend_cube(_df, list(group_cols))
+
+
+# Kolom periode untuk resolusi tertentu (bulan 0 = tanggal hanya tahun, tidak ikut resolusi kuartal/bulan)
+def _periods(cube, resolution):
+    if resolution == 'year':
+        return cube['year'], np.ones(len(cube), dtype=bool)
+    known = cube['release_month'].to_numpy() > 0
+    month = cube['release_month'].clip(lower=1)
+    if resolution == 'quarter':
+        month = (month - 1) // 3 * 3 + 1
+    periods = pd.to_datetime(dict(year=cube['year'], month=month, day=1))
+    return periods, known
+
+
+# Rollup cube ke resolusi dan grup tertentu, dengan rata-rata bergulir (rolling) yang berbobot jumlah lagu
+def trend_rollup(cube, feature, resolution='year', by='playlist_genre', rolling=1, year_range=None):
+    periods, known = _periods(cube, resolution)
+    mask = known
+    if year_range is not None:
+        mask = mask & (cube['year'] >= year_range[0]).to_numpy() & (cube['year'] <= year_range[1]).to_numpy()
+
+    columns = [f'{feature}__n', f'{feature}__sum', f'{feature}__sumsq']
+    part = cube.loc[mask, columns].set_axis(['n', 'sum', 'sumsq'], axis=1)
+    part['period'] = periods[mask].to_numpy()
+    part['group'] = cube.loc[mask, by].to_numpy() if by else "Semua"
+    totals = part.groupby(['period', 'group'], sort=True).sum()
+
+    # Pivot ke periode x grup; periode yang kosong diisi 0 agar jendela rolling tetap berurutan waktu
+    wide = totals.unstack('group', fill_value=0)
+    if rolling > 1 and len(wide):
+        if resolution == 'year':
+            full = np.arange(wide.index.min(), wide.index.max() + 1)
+        else:
+            full = pd.date_range(wide.index.min(), wide.index.max(), freq='QS' if resolution == 'quarter' else 'MS')
+        wide = wide.reindex(full, fill_value=0).rolling(rolling, min_periods=1).sum()
+        wide.index.name = 'period'
+
+    n, total, total_sq = wide['n'], wide['sum'], wide['sumsq']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        std = np.sqrt(((total_sq - total * total / n) / (n - 1)).clip(lower=0))
+
+    result = pd.DataFrame({
+        'mean': mean.stack(future_stack=True),
+        'std': std.stack(future_stack=True),
+        'count': n.stack(future_stack=True)
+    }).reset_index()
+    return result[result['count'] > 0].reset_index(drop=True)
+
+
+# Plot tren fitur dari hasil rollup
+def plot_feature_trend(trend, feature, resolution, rolling=1, group_label="Genre"):
+    title = f"Tren {feature.replace('_', ' ').capitalize()} per {dict(year='Tahun', quarter='Kuartal', month='Bulan')[resolution]}"
+    if rolling > 1:
+        title += f" (rata-rata bergulir {rolling} periode)"
+
+    fig = px.line(
+        trend,
+        x='period',
+        y='mean',
+        color='group',
+        markers=resolution == 'year',
+        hover_data={'count': True},
+        title=title,
+        labels={'period': 'Periode', 'mean': feature.replace('_', ' ').capitalize(), 'group': group_label, 'count': 'Jumlah Lagu'}
+    )
+
+    fig.update_layout(
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        ),
+        height=500
+    )
+
+    return fig
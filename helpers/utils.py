@@ -2,11 +2,34 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 from streamlit_lottie import st_lottie
 import requests
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import os
+from helpers.instrumentation import instrumented_cache
+from helpers.query import aggregate
+
+# Palet warna kategori (sama dengan palet default Streamlit yang dipakai sebelumnya)
+SPOTIFY_COLORWAY = ["#0068C9", "#83C9FF", "#FF2B2B", "#FFABAB", "#29B09D",
+                    "#7DEFA1", "#FF8700", "#FFD16A", "#6D3FC0", "#D5DAE5"]
+
+# Template tema gelap Spotify: didaftarkan sekali dan dipakai global, menggantikan update_layout gaya di setiap figure
+_GRID = dict(gridcolor='rgba(255,255,255,0.1)', zerolinecolor='rgba(255,255,255,0.2)', linecolor='rgba(255,255,255,0.2)')
+pio.templates["spotify_dark"] = go.layout.Template(layout=dict(
+    plot_bgcolor='rgba(40,40,40,0.8)',
+    paper_bgcolor='rgba(40,40,40,0.8)',
+    font=dict(color='white', family='"Source Sans Pro", sans-serif'),
+    colorway=SPOTIFY_COLORWAY,
+    xaxis=dict(automargin=True, **_GRID),
+    yaxis=dict(automargin=True, **_GRID),
+    polar=dict(bgcolor='rgba(40,40,40,0.8)', radialaxis=dict(gridcolor=_GRID['gridcolor']), angularaxis=dict(gridcolor=_GRID['gridcolor'])),
+    legend=dict(bgcolor='rgba(0,0,0,0)'),
+    hoverlabel=dict(font=dict(family='"Source Sans Pro", sans-serif'))
+))
+pio.templates.default = "spotify_dark"
 
 # Fungsi untuk memuat animasi Lottie
 def load_lottieurl(url):
@@ -55,65 +78,347 @@ def display_footer():
     </div>
     """, unsafe_allow_html=True)
 
-# Fungsi untuk mempersiapkan data
-def load_and_prepare_data():
-    df = pd.read_csv("spotify_songs.csv")
-    df['track_album_release_date'] = pd.to_datetime(df['track_album_release_date'], errors='coerce')
-    df['year'] = df['track_album_release_date'].dt.year
+# Lokasi file dataset
+DATA_PATH = "spotify_songs.csv"
+
+# Fungsi untuk tab yang dirender malas: hanya isi tab aktif yang dihitung, tab lain ditunda sampai dipilih
+# Mengembalikan satu flag per tab, dipakai sebagai: tab1, tab2 = lazy_tabs([...], key="..."); if tab1: ...
+def lazy_tabs(labels, key):
+    active = st.radio("Tab", labels, horizontal=True, key=key, label_visibility="collapsed")
+    st.markdown("<hr style='margin-top: 0;'>", unsafe_allow_html=True)
+    return [label == active for label in labels]
+
+# Fungsi untuk mendapatkan versi dataset (berubah setiap kali file data berubah)
+def get_dataset_version(path=DATA_PATH):
+    stat = os.stat(path)
+    return f"{stat.st_size}-{stat.st_mtime_ns}"
+
+# Presisi tanggal rilis: 0 = tidak valid, 1 = tahun, 2 = tahun-bulan, 3 = tanggal lengkap
+DATE_PRECISION_LABELS = {0: "Tidak Diketahui", 1: "Tahun", 2: "Bulan", 3: "Hari"}
+
+# Rentang tahun yang muat di datetime64[ns] (1677-09-21 s.d. 2262-04-11); tahun di luarnya dianggap tidak valid
+RELEASE_YEAR_RANGE = (1678, 2261)
+
+# Fungsi untuk mem-parse tanggal rilis format campuran (YYYY, YYYY-MM, YYYY-MM-DD) dalam satu pass vektor
+def parse_release_dates(values):
+    # Tanggal rilis sangat berulang: parse hanya nilai unik, lalu sebarkan lewat kode faktorisasi
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    uniques = pd.Series(uniques).where(pd.Series(uniques).map(type) == str, "")
+
+    # Setiap string menjadi 11 karakter UCS-4 yang dibaca sebagai matriks kode karakter
+    chars = np.asarray(uniques.to_numpy(), dtype="U11").view(np.uint32).reshape(-1, 11)
+    digits = chars.astype(np.int32) - ord("0")
+    is_digit = (digits >= 0) & (digits <= 9)
+    length = (chars != 0).sum(axis=1)
+
+    year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+    month = digits[:, 5] * 10 + digits[:, 6]
+    day = digits[:, 8] * 10 + digits[:, 9]
+
+    has_year = (is_digit[:, :4].all(axis=1) & (length >= 4) & (length <= 10)
+                & ((length == 4) | (chars[:, 4] == ord("-")))
+                & (year >= RELEASE_YEAR_RANGE[0]) & (year <= RELEASE_YEAR_RANGE[1]))
+    has_month = (has_year & (length >= 7) & (chars[:, 4] == ord("-")) & is_digit[:, 5:7].all(axis=1)
+                 & (month >= 1) & (month <= 12) & ((length == 7) | (chars[:, 7] == ord("-"))))
+    month = np.where(has_month, month, 1)
+
+    # Awal bulan sebagai datetime64, lalu validasi hari terhadap panjang bulan
+    month_start = ((year - 1970) * 12 + month - 1).astype("datetime64[M]")
+    days_in_month = ((month_start + 1).astype("datetime64[D]") - month_start.astype("datetime64[D]")).astype(np.int32)
+    has_day = (has_month & (length == 10) & (chars[:, 7] == ord("-")) & is_digit[:, 8:10].all(axis=1)
+               & (day >= 1) & (day <= days_in_month))
+    day = np.where(has_day, day, 1)
+
+    precision = (has_year.astype(np.int8) + has_month + has_day).astype(np.int8)
+    dates = month_start.astype("datetime64[D]") + (day - 1)
+    dates[~has_year] = np.datetime64("NaT")
+
+    return pd.DataFrame({
+        'date': dates.astype("datetime64[ns]")[codes],
+        'year': np.where(has_year, year, np.nan)[codes],
+        'month': np.where(has_month, month, 0).astype(np.int8)[codes],
+        'precision': precision[codes]
+    }, index=getattr(values, 'index', None))
+
+# Kolom keanggotaan playlist; kolom lainnya melekat pada lagu
+PLAYLIST_COLUMNS = ['playlist_name', 'playlist_genre', 'playlist_subgenre']
+
+# Kolom ID Spotify (string base62) dan nama kolom kode integer penggantinya
+ID_COLUMNS = {'track_id': 'track_key', 'playlist_id': 'playlist_key', 'track_album_id': 'album_key'}
+
+# Fungsi untuk meng-encode ID string menjadi kode int32 padat (0..n-1) beserta kamus baliknya
+def encode_ids(values):
+    codes, uniques = pd.factorize(values)
+    return codes.astype(np.int32), pd.Index(uniques)
+
+# Fungsi untuk memuat dataset dan memecahnya menjadi tabel lagu (unik) dan tabel keanggotaan playlist
+@instrumented_cache("dataset", show_spinner="Memuat data...")
+def _load_dataset(version):
+    raw = pd.read_csv(DATA_PATH)
+    release = parse_release_dates(raw['track_album_release_date'])
+    raw['track_album_release_date'] = release['date']
+    raw['year'] = release['year']
+    raw['release_month'] = release['month']
+    raw['release_precision'] = release['precision']
+    raw['duration_min'] = raw['duration_ms'] / 60000
+
+    # ID string diganti kode int32; string aslinya hanya disimpan sekali di kamus
+    ids = {}
+    for id_column, key_column in ID_COLUMNS.items():
+        raw[key_column], ids[id_column] = encode_ids(raw.pop(id_column))
+    track_key = raw['track_key'].to_numpy()
+
+    # Tabel lagu: satu baris per lagu (posisi baris == track_key), hanya atribut lagu; genre/subgenre
+    # adalah atribut playlist sehingga hanya ada di tabel keanggotaan
+    first_rows = np.full(len(ids['track_id']), len(raw), dtype=np.int64)
+    np.minimum.at(first_rows, track_key, np.arange(len(raw)))
+    track_columns = [c for c in raw.columns if c not in PLAYLIST_COLUMNS + ['track_key', 'playlist_key']]
+    tracks = raw.iloc[first_rows][track_columns].reset_index(drop=True)
+    tracks.index.name = 'track_key'
+
+    # Tabel keanggotaan: pasangan lagu-playlist dengan kunci integer
+    memberships = raw[['track_key', 'playlist_key']].copy()
+    for column in PLAYLIST_COLUMNS:
+        memberships[column] = raw[column].astype('category')
+
+    return {'tracks': tracks, 'memberships': memberships, 'ids': ids}
+
+# Fungsi untuk mendapatkan tabel lagu unik dan tabel keanggotaan playlist
+def load_track_tables():
+    dataset = _load_dataset(get_dataset_version())
+    return dataset['tracks'], dataset['memberships']
+
+# Fungsi untuk mendapatkan kamus balik kode integer -> ID string
+def load_id_dictionaries():
+    return _load_dataset(get_dataset_version())['ids']
+
+# Fungsi untuk mengubah kode integer kembali menjadi ID string (untuk ditampilkan)
+def decode_ids(codes, id_column):
+    return load_id_dictionaries()[id_column].take(np.asarray(codes))
+
+# Fungsi untuk menggabungkan kolom lagu ke baris keanggotaan lewat kunci integer
+def join_track_columns(memberships, tracks, columns=None):
+    columns = [c for c in tracks.columns if c not in memberships.columns] if columns is None else columns
+    keys = memberships['track_key'].to_numpy()
+    joined = memberships.reset_index(drop=True)
+    for column in columns:
+        joined[column] = tracks[column].to_numpy()[keys]
+    return joined
+
+# Fungsi untuk membuat satu baris per (lagu, genre/subgenre) agar statistik per genre tidak menghitung lagu ganda
+@instrumented_cache("track_frame", show_spinner=False)
+def _load_track_frame(version, level):
+    tracks, memberships = load_track_tables()
+    level_columns = ['playlist_genre', 'playlist_subgenre'] if level == 'playlist_subgenre' else [level]
+    distinct = memberships.drop_duplicates(['track_key', level])[['track_key'] + level_columns]
+    for column in level_columns:
+        distinct[column] = distinct[column].astype(object)
+    return join_track_columns(distinct, tracks)
+
+def load_track_frame(level='playlist_genre'):
+    return _load_track_frame(get_dataset_version(), level)
+
+# Fungsi untuk mempersiapkan data (satu baris per lagu per playlist)
+@instrumented_cache("playlist_rows", show_spinner=False)
+def _load_playlist_rows(version):
+    tracks, memberships = load_track_tables()
+    df = join_track_columns(memberships, tracks)
+    for column in PLAYLIST_COLUMNS:
+        df[column] = df[column].astype(object)
     return df
 
-# Plot Genres Favorit
-def plot_favorite_genres(df, year=2020):
-    df_year = df[df['year'] == year]
-    genre_popularity = df_year.groupby('playlist_genre')['track_popularity'].mean().sort_values(ascending=False)
-    
+def load_and_prepare_data():
+    return _load_playlist_rows(get_dataset_version())
+
+# Fungsi untuk label genre/subgenre setiap lagu dari tabel keanggotaan (mis. "pop, rock"), urut sesuai track_keys
+def track_labels(track_keys, level='playlist_genre'):
+    frame = load_track_frame('playlist_subgenre')
+    rows = frame[frame['track_key'].isin(track_keys)].drop_duplicates(['track_key', level])
+    labels = rows.groupby('track_key')[level].agg(lambda values: ", ".join(sorted(values)))
+    return labels.reindex(track_keys).to_numpy()
+
+# Fungsi untuk membuat kolom label dari daftar kondisi (np.select), pengganti apply(lambda) per baris
+def label_where(conditions, choices, default):
+    return np.select([np.asarray(c, dtype=bool) for c in conditions], choices, default)
+
+# Fungsi untuk label dua nilai berdasarkan keanggotaan dalam daftar (isin)
+def label_isin(values, members, true_label, false_label):
+    return np.where(pd.Series(values).isin(members).to_numpy(), true_label, false_label)
+
+# Fungsi untuk label berdasarkan tanda nilai (positif / negatif / nol)
+def label_sign(values, positive, negative, zero):
+    sign = np.sign(np.asarray(values, dtype=np.float64))
+    return label_where([sign > 0, sign < 0], [positive, negative], zero)
+
+# Fungsi untuk memetakan kategori ke label/warna lewat kode kategori (satu lookup array, bukan dict per baris)
+def map_categories(values, mapping, default=None):
+    categorical = pd.Categorical(values)
+    lookup = np.array([mapping.get(c, default) for c in categorical.categories] + [default], dtype=object)
+    return lookup[categorical.codes]
+
+# Fungsi untuk menebalkan trace yang di-highlight dan meredupkan sisanya dalam dua update batch
+def highlight_traces(fig, highlighted, width=4, background_width=1.5, background_opacity=0.5):
+    fig.update_traces(line_width=background_width, opacity=background_opacity)
+    fig.update_traces(line_width=width, opacity=1,
+                      selector=lambda trace: trace.legendgroup.split(", ")[0] in highlighted)
+    return fig
+
+# Factory figure ringan: trace graph_objects langsung + template global, tanpa overhead plotly.express
+def make_figure(traces, title=None, height=None, **layout):
+    fig = go.Figure(data=traces)
+    fig.update_layout(title=title, height=height, **layout)
+    return fig
+
+# Hitungan histogram per grup (format panjang: group, bin_start, bin_end, count) dengan tepi bin yang sama untuk semua grup
+def histogram_counts(df, x, color=None, nbins=30):
+    values = df[x].to_numpy(dtype=np.float64)
+    valid = np.isfinite(values)
+    edges = np.histogram_bin_edges(values[valid], bins=nbins)
+
+    if color is None:
+        groups = [(None, values[valid])]
+    else:
+        codes, names = pd.factorize(df[color])
+        keep = valid & (codes >= 0)
+        groups = [(name, values[keep & (codes == i)]) for i, name in enumerate(names)]
+
+    return pd.DataFrame({
+        "group": np.repeat([name for name, _ in groups], len(edges) - 1),
+        "bin_start": np.tile(edges[:-1], len(groups)),
+        "bin_end": np.tile(edges[1:], len(groups)),
+        "count": np.concatenate([np.histogram(group_values, bins=edges)[0] for _, group_values in groups])
+    })
+
+# Histogram yang dibinning di server: satu go.Bar per grup berisi ~nbins angka, bukan seluruh nilai mentah
+def histogram_figure(df, x, color=None, nbins=30, opacity=0.7, title=None, labels=None, height=400):
+    return histogram_counts_figure(histogram_counts(df, x, color, nbins), x, color, opacity, title, labels, height)
+
+# Histogram dari hitungan yang sudah dibinning (hasil histogram_counts, lokal atau dari layanan API)
+def histogram_counts_figure(counts, x, color=None, opacity=0.7, title=None, labels=None, height=400):
+    labels = labels or {}
+    traces = []
+    for name, group in counts.groupby("group", sort=False, dropna=False):
+        name = None if color is None else name
+        traces.append(go.Bar(
+            x=(group["bin_start"] + group["bin_end"]) / 2,
+            y=group["count"],
+            width=(group["bin_end"] - group["bin_start"]).iloc[0] if len(group) else None,
+            name=str(name) if name is not None else None,
+            showlegend=name is not None,
+            opacity=opacity,
+            customdata=group[["bin_start", "bin_end"]].to_numpy(),
+            hovertemplate=(f"{labels.get(color, color)}={name}<br>" if name is not None else "")
+                          + f"{labels.get(x, x)}=%{{customdata[0]:.3g}} - %{{customdata[1]:.3g}}<br>"
+                          + f"{labels.get('count', 'count')}=%{{y}}<extra></extra>"
+        ))
+
+    return make_figure(traces, title=title, height=height, barmode='relative', bargap=0,
+                       xaxis_title=labels.get(x, x), yaxis_title=labels.get('count', 'count'),
+                       legend_title_text=labels.get(color, color) if color else None)
+
+# Scatter per grup dengan go.Scatter; opsi ukuran marker (mode area seperti px) dan garis tren OLS per grup
+def scatter_figure(df, x, y, color=None, size=None, hover_name=None, hover_data=(), opacity=0.7,
+                   trendline=False, title=None, labels=None, height=600, marker_size=None):
+    labels = labels or {}
+    name_of = lambda column: labels.get(column, column)
+    hover = (f"<b>%{{hovertext}}</b><br><br>" if hover_name else "") + \
+            (f"{name_of(color)}=%{{meta}}<br>" if color else "") + \
+            f"{name_of(x)}=%{{x}}<br>{name_of(y)}=%{{y}}" + \
+            "".join(f"<br>{name_of(c)}=%{{customdata[{i}]}}" for i, c in enumerate(hover_data))
+    if size:
+        hover += f"<br>{name_of(size)}=%{{marker.size}}"
+        sizeref = 2.0 * df[size].max() / (20 ** 2)
+
+    if color is None:
+        groups = [(None, df)]
+    else:
+        codes, names = pd.factorize(df[color])
+        order = np.argsort(codes, kind='stable')
+        bounds = np.searchsorted(codes[order], np.arange(len(names) + 1))
+        groups = [(name, df.iloc[order[bounds[i]:bounds[i + 1]]]) for i, name in enumerate(names)]
+
+    traces = []
+    for i, (name, group) in enumerate(groups):
+        marker = dict(size=group[size].to_numpy(), sizemode='area', sizeref=sizeref) if size else dict(size=marker_size)
+        traces.append(go.Scatter(
+            x=group[x].to_numpy(),
+            y=group[y].to_numpy(),
+            mode='markers',
+            name=str(name) if name is not None else None,
+            legendgroup=str(name) if name is not None else None,
+            showlegend=name is not None,
+            marker=marker,
+            opacity=opacity,
+            meta=str(name) if name is not None else None,
+            hovertext=group[hover_name].to_numpy() if hover_name else None,
+            customdata=group[list(hover_data)].to_numpy() if hover_data else None,
+            hovertemplate=hover + "<extra></extra>"
+        ))
+
+        # Garis tren OLS (kuadrat terkecil derajat 1) per grup
+        if trendline:
+            valid = group[[x, y]].dropna()
+            if len(valid) >= 2:
+                slope, intercept = np.polyfit(valid[x], valid[y], 1)
+                line_x = np.array([valid[x].min(), valid[x].max()])
+                traces.append(go.Scatter(
+                    x=line_x,
+                    y=slope * line_x + intercept,
+                    mode='lines',
+                    name=str(name) if name is not None else "OLS",
+                    legendgroup=str(name) if name is not None else None,
+                    showlegend=False,
+                    line=dict(color=SPOTIFY_COLORWAY[i % len(SPOTIFY_COLORWAY)]),
+                    hovertemplate=f"OLS: {name_of(y)} = {slope:.3g} * {name_of(x)} + {intercept:.3g}<extra></extra>"
+                ))
+
+    # Warna marker mengikuti colorway agar garis tren sewarna dengan titiknya
+    if trendline:
+        for i, trace in enumerate(t for t in traces if t.mode == 'markers'):
+            trace.marker.color = SPOTIFY_COLORWAY[i % len(SPOTIFY_COLORWAY)]
+
+    return make_figure(traces, title=title, height=height, xaxis_title=name_of(x), yaxis_title=name_of(y),
+                       legend_title_text=name_of(color) if color else None)
+
+# Plot Genres Favorit (genre_popularity: kolom playlist_genre dan track_popularity, urut menurun)
+def plot_favorite_genres(genre_popularity, year=2020):
     fig = px.bar(
-        x=genre_popularity.values, 
-        y=genre_popularity.index,
+        x=genre_popularity['track_popularity'], 
+        y=genre_popularity['playlist_genre'],
         orientation='h',
-        color=genre_popularity.values,
+        color=genre_popularity['track_popularity'],
         color_continuous_scale='Viridis',
         title=f"Popularitas Genre Musik Tahun {year}",
         labels={'x': 'Popularitas', 'y': 'Genre', 'color': 'Popularitas'}
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         coloraxis_colorbar=dict(title='Popularitas'),
         height=500
     )
     
     return fig
 
-# Plot Top Artists
-def plot_top_artists(df, n=10):
-    top_artist = df.groupby('track_artist')['track_popularity'].mean().sort_values(ascending=False).head(n)
-    
+# Plot Top Artists (top_artist: kolom track_artist dan track_popularity, urut menurun)
+def plot_top_artists(top_artist, n=10):
     fig = px.bar(
-        x=top_artist.values, 
-        y=top_artist.index,
+        x=top_artist['track_popularity'], 
+        y=top_artist['track_artist'],
         orientation='h',
-        color=top_artist.values,
+        color=top_artist['track_popularity'],
         color_continuous_scale='Viridis',
         title=f"Top {n} Artis Berdasarkan Popularitas",
         labels={'x': 'Popularitas', 'y': 'Artis', 'color': 'Popularitas'}
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=600
     )
     
     return fig
 
-# Plot Music Trends
-def plot_music_trends(df, min_year=2010):
-    trend = df[df['year'] >= min_year].groupby(['year', 'playlist_genre'])['track_popularity'].mean().reset_index()
-    
+# Plot Music Trends (trend: kolom year, playlist_genre dan track_popularity)
+def plot_music_trends(trend):
     fig = px.line(
         trend, 
         x='year', 
@@ -125,9 +430,6 @@ def plot_music_trends(df, min_year=2010):
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         legend=dict(
             orientation="h",
             yanchor="bottom",
@@ -143,7 +445,8 @@ def plot_music_trends(df, min_year=2010):
 # Mood Radar Chart
 def plot_mood_radar(df, genre):
     mood_cols = ["valence", "energy", "acousticness", "danceability", "instrumentalness"]
-    mood_vals = df[df["playlist_genre"] == genre][mood_cols].mean()
+    mood_vals = aggregate(df, "playlist_genre", {c: (c, "mean") for c in mood_cols},
+                          where=[("playlist_genre", "==", genre)]).reindex([genre]).iloc[0]
     
     fig = go.Figure()
     fig.add_trace(go.Scatterpolar(
@@ -159,13 +462,10 @@ def plot_mood_radar(df, genre):
             radialaxis=dict(
                 visible=True,
                 range=[0, 1]
-            ),
-            bgcolor='rgba(40,40,40,0.8)'
+            )
         ),
         showlegend=False,
-        title=f"Radar Chart Mood Musik: {genre}",
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white'
+        title=f"Radar Chart Mood Musik: {genre}"
     )
     
     return fig 
\ No newline at end of file
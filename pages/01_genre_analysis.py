@@ -1,9 +1,19 @@
+import time
+
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-from helpers.utils import (display_spotify_title, spotify_card, display_footer,
-                          load_and_prepare_data, plot_favorite_genres, plot_music_trends)
+from helpers.utils import (display_spotify_title, lazy_tabs, spotify_card, display_footer,
+                          load_track_frame, load_track_tables,
+                          plot_favorite_genres, plot_music_trends, label_isin, highlight_traces)
+from helpers.instrumentation import start_page, show_chart, render_metrics_overlay, fragment
+from helpers.query import aggregate, aggregate_series
+from helpers.filters import (render_global_filters, apply_global_filters,
+                             current_view_version, stop_if_empty)
+from helpers.trends import TREND_FEATURES, TREND_RESOLUTIONS, load_trend_cube, trend_rollup, plot_feature_trend
+from helpers.ranking import RANK_LEVELS, load_rank_table, rank_change, plot_rank_change, plot_bump_chart
+from helpers.api import fetch
+from helpers.genre_model import (GENRE_MODEL_FEATURES, load_genre_model, holdout_mask, score_tracks,
+                                 confusion_matrix, plot_confusion_matrix)
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -12,12 +22,27 @@ st.set_page_config(
     layout="wide"
 )
 
+# Instrumentasi: tandai awal run halaman ini
+start_page("genre_analysis")
+
 # Menerapkan custom CSS
 with open("style/main.css") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-# Load data
-df = load_and_prepare_data()
+# Load data (satu baris per lagu per genre, agar lagu di banyak playlist tidak dihitung ganda)
+df = load_track_frame('playlist_genre')
+subgenre_tracks = load_track_frame('playlist_subgenre')
+tracks, _ = load_track_tables()
+
+# Filter global dari sidebar, hasilnya di-cache per kombinasi filter
+render_global_filters()
+df = apply_global_filters(df, "genre_tracks")
+subgenre_tracks = apply_global_filters(subgenre_tracks, "subgenre_tracks")
+tracks = apply_global_filters(tracks, "tracks")
+stop_if_empty(df)
+
+# Data sumber peringkat untuk setiap level
+rank_frames = {"Genre": df, "Subgenre": subgenre_tracks, "Artis": tracks}
 
 # Header
 display_spotify_title("Analisis Genre Musik", "🎸")
@@ -31,75 +56,86 @@ st.markdown("""
 st.markdown("---")
 
 # Tabs untuk berbagai analisis
-tab1, tab2, tab3 = st.tabs(["📊 Popularitas Genre", "📈 Tren Genre", "🎵 Karakteristik Genre"])
+tab1, tab2, tab3, tab4 = lazy_tabs(["📊 Popularitas Genre", "📈 Tren Genre", "🎵 Karakteristik Genre",
+                                   "🤖 Prediksi Genre"], key="genre_tabs")
 
 # Tab 1: Popularitas Genre
-with tab1:
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.subheader("Genre Musik Paling Populer")
+if tab1:
+    # Fragment: pilihan tahun hanya menggambar ulang grafik popularitas genre
+    @fragment
+    def genre_popularity_by_year():
+        col1, col2 = st.columns([1, 2])
+    
+        with col1:
+            st.subheader("Genre Musik Paling Populer")
         
-        # Filter tahun
-        years = sorted(df['year'].dropna().unique())
-        selected_year = st.selectbox("Pilih Tahun", years, index=len(years)-1)
+            # Filter tahun
+            years = sorted(df['year'].dropna().unique())
+            selected_year = st.selectbox("Pilih Tahun", years, index=len(years)-1)
         
-        # Informasi tambahan
-        st.markdown("""
-        **Apa itu Popularitas?**
+            # Informasi tambahan
+            st.markdown("""
+            **Apa itu Popularitas?**
         
-        Skor popularitas (0-100) menunjukkan seberapa populer lagu tersebut, berdasarkan:
-        - Jumlah streaming
-        - Banyaknya simpan ke pustaka
-        - Shared di media sosial
-        - Dan metrik lainnya
-        """)
+            Skor popularitas (0-100) menunjukkan seberapa populer lagu tersebut, berdasarkan:
+            - Jumlah streaming
+            - Banyaknya simpan ke pustaka
+            - Shared di media sosial
+            - Dan metrik lainnya
+            """)
         
-        # Menambahkan card info
-        spotify_card(
-            "Tahukah Kamu?",
-            "Popularitas genre dapat berubah signifikan dari tahun ke tahun, dipengaruhi oleh tren, artis baru, dan perubahan selera pendengar.",
-            "💡"
-        )
+            # Menambahkan card info
+            spotify_card(
+                "Tahukah Kamu?",
+                "Popularitas genre dapat berubah signifikan dari tahun ke tahun, dipengaruhi oleh tren, artis baru, dan perubahan selera pendengar.",
+                "💡"
+            )
     
-    with col2:
-        # Plot genre popularity
-        fig = plot_favorite_genres(df, selected_year)
-        st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            # Plot genre popularity
+            fig = plot_favorite_genres(fetch("genre-popularity", year=selected_year)["popularity"], selected_year)
+            show_chart(fig)
+
+    genre_popularity_by_year()
     
     # Analisis tambahan
     st.subheader("Subgenre Terpopuler")
     
-    # Filter genre
-    genres = sorted(df['playlist_genre'].unique())
-    selected_genre = st.selectbox("Pilih Genre", genres)
-    
-    # Filter data
-    filtered_df = df[df['playlist_genre'] == selected_genre]
-    
-    # Plot subgenre popularity
-    subgenre_pop = filtered_df.groupby('playlist_subgenre')['track_popularity'].mean().sort_values(ascending=False)
-    
-    fig = px.bar(
-        x=subgenre_pop.index, 
-        y=subgenre_pop.values,
-        color=subgenre_pop.values,
-        color_continuous_scale='Viridis',
-        title=f"Popularitas Subgenre dalam {selected_genre}",
-        labels={"x": "Subgenre", "y": "Popularitas", "color": "Popularitas"}
-    )
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=500
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    # Fragment: pilihan genre hanya menggambar ulang grafik subgenre
+    @fragment
+    def subgenre_popularity():
+        # Filter genre
+        genres = sorted(df['playlist_genre'].unique())
+        selected_genre = st.selectbox("Pilih Genre", genres)
+    
+        # Popularitas subgenre dalam genre terpilih
+        subgenre_pop = aggregate_series(subgenre_tracks, 'playlist_subgenre', 'track_popularity',
+                                        where=[('playlist_genre', '==', selected_genre)],
+                                        order_by='track_popularity', ascending=False, name="subgenre_tracks")
+    
+        fig = px.bar(
+            x=subgenre_pop.index, 
+            y=subgenre_pop.values,
+            color=subgenre_pop.values,
+            color_continuous_scale='Viridis',
+            title=f"Popularitas Subgenre dalam {selected_genre}",
+            labels={"x": "Subgenre", "y": "Popularitas", "color": "Popularitas"}
+        )
+    
+        fig.update_layout(
+            height=500
+        )
+    
+        show_chart(fig)
+
+    subgenre_popularity()
 
 # Tab 2: Tren Genre
-with tab2:
+if tab2:
+    # Cube tren (count/sum/sum-of-squares per tahun, bulan dan grup) dibangun sekali per versi data, saat tab ini pertama dibuka
+    genre_cube = load_trend_cube(df, current_view_version(), ('playlist_genre',))
+    subgenre_cube = load_trend_cube(subgenre_tracks, current_view_version(), ('playlist_genre', 'playlist_subgenre'))
+    
     st.subheader("Tren Popularitas Genre dari Tahun ke Tahun")
     
     col1, col2 = st.columns([1, 2])
@@ -108,11 +144,11 @@ with tab2:
         # Filter tahun
         min_year = int(df['year'].min())
         max_year = int(df['year'].max())
-        year_range = st.slider("Rentang Tahun", min_year, max_year, (2010, max_year))
+        year_range = st.slider("Rentang Tahun", min_year, max_year, (min(max(2010, min_year), max_year), max_year))
         
         # Pilih genre untuk highlight
         genres = sorted(df['playlist_genre'].unique())
-        highlight_genre = st.multiselect("Highlight Genre", genres, default=["pop", "rap"])
+        highlight_genre = st.multiselect("Highlight Genre", genres, default=[g for g in ["pop", "rap"] if g in genres])
         
         # Info card
         spotify_card(
@@ -122,15 +158,13 @@ with tab2:
         )
     
     with col2:
-        # Filter berdasarkan rentang tahun
-        trend_df = df[(df['year'] >= year_range[0]) & (df['year'] <= year_range[1])]
-        
-        # Prepare data
-        trend = trend_df.groupby(['year', 'playlist_genre'])['track_popularity'].mean().reset_index()
+        # Rollup cube tren untuk rentang tahun yang dipilih
+        trend = trend_rollup(genre_cube, 'track_popularity', 'year', 'playlist_genre', year_range=year_range)
+        trend = trend.rename(columns={'period': 'year', 'group': 'playlist_genre', 'mean': 'track_popularity'})
         
         # Highlight selected genres
         if highlight_genre:
-            trend['highlight'] = trend['playlist_genre'].apply(lambda x: "Highlight" if x in highlight_genre else "Background")
+            trend['highlight'] = label_isin(trend['playlist_genre'], highlight_genre, "Highlight", "Background")
             
             fig = px.line(
                 trend, 
@@ -145,12 +179,7 @@ with tab2:
             )
             
             # Membuat genre yang di-highlight lebih tebal
-            for i, genre in enumerate(trend['playlist_genre'].unique()):
-                if genre in highlight_genre:
-                    fig.data[i].line.width = 4
-                else:
-                    fig.data[i].line.width = 1.5
-                    fig.data[i].opacity = 0.5
+            highlight_traces(fig, highlight_genre)
         else:
             fig = px.line(
                 trend, 
@@ -163,9 +192,6 @@ with tab2:
             )
         
         fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
             legend=dict(
                 orientation="h",
                 yanchor="bottom",
@@ -176,117 +202,125 @@ with tab2:
             height=600
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
+    
+    # Tren fitur audio dengan resolusi waktu dan rata-rata bergulir
+    st.subheader("Tren Fitur Audio dari Waktu ke Waktu")
+    
+    # Fragment tren fitur audio; rentang tahun diambil dari slider di atas (run penuh)
+    @fragment
+    def feature_trend_section(year_range):
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            trend_feature = st.selectbox("Fitur", TREND_FEATURES, index=TREND_FEATURES.index("danceability"))
+        with col2:
+            trend_resolution = st.selectbox("Resolusi Waktu", list(TREND_RESOLUTIONS.keys()))
+        with col3:
+            trend_rolling = st.slider("Rata-rata Bergulir (periode)", 1, 12, 3)
+        with col4:
+            trend_genre = st.selectbox("Rincian Subgenre", ["Semua Genre"] + sorted(df['playlist_genre'].unique()))
+    
+        # Rollup dari cube: per genre, atau per subgenre dalam satu genre
+        if trend_genre == "Semua Genre":
+            feature_trend = trend_rollup(genre_cube, trend_feature, TREND_RESOLUTIONS[trend_resolution],
+                                         'playlist_genre', trend_rolling, year_range)
+            group_label = "Genre"
+        else:
+            genre_subgenre_cube = subgenre_cube[subgenre_cube['playlist_genre'] == trend_genre]
+            feature_trend = trend_rollup(genre_subgenre_cube, trend_feature, TREND_RESOLUTIONS[trend_resolution],
+                                         'playlist_subgenre', trend_rolling, year_range)
+            group_label = "Subgenre"
+    
+        fig = plot_feature_trend(feature_trend, trend_feature, TREND_RESOLUTIONS[trend_resolution], trend_rolling, group_label)
+        show_chart(fig)
+    
+        st.caption("Resolusi kuartal dan bulan hanya memakai lagu dengan tanggal rilis yang mencantumkan bulan.")
+
+    feature_trend_section(year_range)
+    
+    # Bump chart: peringkat setiap tahun dalam rentang tahun yang dipilih
+    st.subheader("Bump Chart Peringkat per Tahun")
+    
+    # Fragment bump chart: level dan jumlah entitas tidak menjalankan ulang grafik lain
+    @fragment
+    def bump_chart_section(year_range):
+        col1, col2 = st.columns(2)
+        with col1:
+            bump_level = st.selectbox("Level Bump Chart", list(RANK_LEVELS.keys()))
+        with col2:
+            bump_top = st.slider("Jumlah Entitas", 3, 20, 10)
+    
+        # Matriks peringkat dibangun sekali per versi data; slider hanya memotong baris tahun
+        bump_table = load_rank_table(rank_frames[bump_level], current_view_version(), RANK_LEVELS[bump_level])
+        fig = plot_bump_chart(bump_table, year_range, bump_top, bump_level)
+    
+        show_chart(fig)
+
+    bump_chart_section(year_range)
     
     # Tambahan analisis perubahan peringkat
     st.subheader("Perubahan Peringkat Genre")
     
-    # Tahun awal dan akhir untuk perbandingan
-    col1, col2 = st.columns(2)
-    with col1:
-        start_year = st.selectbox("Tahun Awal", sorted(df['year'].dropna().unique()), index=5)
-    with col2:
-        end_year = st.selectbox("Tahun Akhir", sorted(df['year'].dropna().unique()), index=len(sorted(df['year'].dropna().unique())) - 1)
-    
-    # Hitung peringkat untuk kedua tahun
-    start_rank = df[df['year'] == start_year].groupby('playlist_genre')['track_popularity'].mean().sort_values(ascending=False)
-    end_rank = df[df['year'] == end_year].groupby('playlist_genre')['track_popularity'].mean().sort_values(ascending=False)
-    
-    # Konversi ke peringkat
-    start_rank = start_rank.reset_index()
-    start_rank['rank'] = range(1, len(start_rank) + 1)
-    start_rank = start_rank.set_index('playlist_genre')
-    
-    end_rank = end_rank.reset_index()
-    end_rank['rank'] = range(1, len(end_rank) + 1)
-    end_rank = end_rank.set_index('playlist_genre')
-    
-    # Gabungkan kedua dataframe
-    rank_change = pd.DataFrame({
-        'genre': start_rank.index,
-        'rank_start': start_rank['rank'],
-        'rank_end': [end_rank.loc[genre, 'rank'] if genre in end_rank.index else None for genre in start_rank.index]
-    }).dropna()
-    
-    # Hitung perubahan peringkat
-    rank_change['change'] = rank_change['rank_start'] - rank_change['rank_end']
-    rank_change['abs_change'] = abs(rank_change['change'])
-    rank_change['direction'] = rank_change['change'].apply(lambda x: "Naik" if x > 0 else "Turun" if x < 0 else "Tetap")
-    rank_change['color'] = rank_change['change'].apply(lambda x: "#1DB954" if x > 0 else "#E51D2A" if x < 0 else "#B3B3B3")
-    
-    # Urutkan berdasarkan perubahan absolut
-    rank_change = rank_change.sort_values('abs_change', ascending=False).head(10)
-    
-    # Plot perubahan peringkat
-    fig = go.Figure()
-    
-    for i, row in rank_change.iterrows():
-        fig.add_trace(go.Scatter(
-            x=[start_year, end_year],
-            y=[row['rank_start'], row['rank_end']],
-            mode='lines+markers+text',
-            name=row['genre'],
-            line=dict(width=2, color=row['color']),
-            marker=dict(size=10),
-            text=[f"{int(row['rank_start'])}", f"{int(row['rank_end'])}"],
-            textposition="top center"
-        ))
-    
-    # Invert y-axis so that rank 1 is at the top
-    fig.update_layout(
-        title=f"Perubahan Peringkat Genre dari {start_year} ke {end_year}",
-        xaxis_title="Tahun",
-        yaxis_title="Peringkat",
-        yaxis=dict(autorange="reversed"),  # Memastikan peringkat 1 di atas
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=600,
-        showlegend=True,
-        legend=dict(
-            orientation="h",
-            yanchor="bottom",
-            y=1.02,
-            xanchor="right",
-            x=1
-        )
-    )
+    # Fragment perubahan peringkat
+    @fragment
+    def rank_change_section():
+        # Level entitas dan tahun awal/akhir untuk perbandingan
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            rank_level = st.selectbox("Level Peringkat", list(RANK_LEVELS.keys()))
+    
+        # Matriks peringkat semua tahun x entitas, dihitung sekali per versi data
+        rank_table = load_rank_table(rank_frames[rank_level], current_view_version(), RANK_LEVELS[rank_level])
+        rank_years = rank_table['rank'].index.tolist()
     
-    st.plotly_chart(fig, use_container_width=True)
+        with col2:
+            start_year = st.selectbox("Tahun Awal", rank_years, index=min(5, len(rank_years) - 1))
+        with col3:
+            end_year = st.selectbox("Tahun Akhir", rank_years, index=len(rank_years) - 1)
+    
+        # Lookup peringkat kedua tahun dan plot perubahannya
+        rank_change_df = rank_change(rank_table, start_year, end_year)
+        fig = plot_rank_change(rank_change_df, start_year, end_year, rank_level)
+    
+        show_chart(fig)
+
+    rank_change_section()
 
 # Tab 3: Karakteristik Genre
-with tab3:
+if tab3:
     st.subheader("Karakteristik Audio per Genre")
     
-    # Pilih karakteristik audio
-    audio_features = ["danceability", "energy", "acousticness", "instrumentalness", "valence", "speechiness", "liveness"]
-    x_feature = st.selectbox("Pilih Karakteristik X", audio_features, index=0)
-    y_feature = st.selectbox("Pilih Karakteristik Y", audio_features, index=1)
-    
-    # Plot bubble chart untuk perbandingan karakteristik antar genre
-    genre_features = df.groupby('playlist_genre')[audio_features + ['track_popularity']].mean().reset_index()
-    
-    fig = px.scatter(
-        genre_features,
-        x=x_feature,
-        y=y_feature,
-        size="track_popularity",
-        color="playlist_genre",
-        hover_name="playlist_genre",
-        size_max=40,
-        title=f"Perbandingan {x_feature.capitalize()} vs {y_feature.capitalize()} antar Genre"
-    )
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=600,
-        xaxis=dict(title=x_feature.capitalize()),
-        yaxis=dict(title=y_feature.capitalize())
-    )
-    
-    st.plotly_chart(fig, use_container_width=True)
+    # Fragment: pilihan sumbu X/Y hanya menggambar ulang bubble chart
+    @fragment
+    def genre_feature_bubble():
+        # Pilih karakteristik audio
+        audio_features = ["danceability", "energy", "acousticness", "instrumentalness", "valence", "speechiness", "liveness"]
+        x_feature = st.selectbox("Pilih Karakteristik X", audio_features, index=0)
+        y_feature = st.selectbox("Pilih Karakteristik Y", audio_features, index=1)
+    
+        # Plot bubble chart untuk perbandingan karakteristik antar genre
+        genre_features = aggregate(df, 'playlist_genre', {c: (c, 'mean') for c in audio_features + ['track_popularity']}).reset_index()
+    
+        fig = px.scatter(
+            genre_features,
+            x=x_feature,
+            y=y_feature,
+            size="track_popularity",
+            color="playlist_genre",
+            hover_name="playlist_genre",
+            size_max=40,
+            title=f"Perbandingan {x_feature.capitalize()} vs {y_feature.capitalize()} antar Genre"
+        )
+    
+        fig.update_layout(
+            height=600,
+            xaxis=dict(title=x_feature.capitalize()),
+            yaxis=dict(title=y_feature.capitalize())
+        )
+    
+        show_chart(fig)
+
+    genre_feature_bubble()
     
     # Penjelasan fitur audio
     col1, col2 = st.columns(2)
@@ -329,5 +363,51 @@ with tab3:
             "🗣️"
         )
 
+# Tab 4: Prediksi Genre
+if tab4:
+    st.subheader("Prediksi Genre dari Fitur Audio")
+
+    # Model regresi logistik dilatih pada 4/5 lagu; evaluasi memakai lagu holdout yang lolos filter global
+    model = load_genre_model()
+    holdout = df[holdout_mask(df)]
+    if holdout.empty:
+        st.info("Tidak ada lagu evaluasi (holdout) untuk filter yang dipilih")
+    else:
+        start = time.perf_counter()
+        scored = holdout.join(score_tracks(holdout, model))
+        elapsed = time.perf_counter() - start
+        matrix, accuracy = confusion_matrix(scored['playlist_genre'], scored['predicted_genre'], model["classes"])
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Akurasi Holdout", f"{accuracy:.1%}")
+        col2.metric("Lagu Evaluasi", f"{len(scored):,}")
+        col3.metric("Throughput Scoring", f"{len(scored) / max(elapsed, 1e-9):,.0f} lagu/detik")
+        st.caption(f"Regresi logistik multinomial atas {len(GENRE_MODEL_FEATURES)} fitur audio; "
+                   f"tebakan acak menghasilkan akurasi {1 / len(model['classes']):.1%}.")
+
+        show_chart(plot_confusion_matrix(matrix))
+
+        # Fragment: daftar lagu yang salah diklasifikasikan, bisa difilter per genre asli
+        @fragment
+        def misclassified_tracks():
+            st.markdown("#### Lagu yang Salah Diklasifikasikan")
+            genre = st.selectbox("Genre Asli", ["Semua"] + list(model["classes"]), key="misclassified_genre")
+            wrong = scored[scored['predicted_genre'] != scored['playlist_genre']]
+            if genre != "Semua":
+                wrong = wrong[wrong['playlist_genre'] == genre]
+            wrong = wrong.nlargest(50, 'confidence')[['track_name', 'track_artist', 'playlist_genre',
+                                                      'predicted_genre', 'confidence']]
+            st.dataframe(wrong.rename(columns={'track_name': 'Judul', 'track_artist': 'Artis',
+                                               'playlist_genre': 'Genre Asli', 'predicted_genre': 'Prediksi',
+                                               'confidence': 'Keyakinan'}),
+                         hide_index=True, use_container_width=True,
+                         column_config={'Keyakinan': st.column_config.ProgressColumn(min_value=0, max_value=1,
+                                                                                     format="%.2f")})
+
+        misclassified_tracks()
+
+# Metrik performa (toggle di sidebar) dan ekspor file metrik
+render_metrics_overlay()
+
 # Footer
 display_footer() 
\ No newline at end of file
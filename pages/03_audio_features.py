@@ -3,8 +3,17 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from helpers.utils import (display_spotify_title, spotify_card, display_footer,
-                          load_and_prepare_data)
+from helpers.utils import (display_spotify_title, lazy_tabs, spotify_card, display_footer,
+                          load_track_tables, load_track_frame, histogram_counts_figure, scatter_figure)
+from helpers.instrumentation import start_page, show_chart, render_metrics_overlay, fragment
+from helpers.query import aggregate, aggregate_series
+from helpers.filters import (render_global_filters, apply_global_filters,
+                             current_view_version, stop_if_empty)
+from helpers.correlation import (CORRELATION_LEVELS, CORRELATION_METHODS, load_correlation_index, correlation_frame,
+                                 correlation_count, top_correlations, plot_correlation_heatmap)
+from helpers.api import fetch
+from helpers.sketches import quantile_summary, plot_quantile_box
+from helpers.projection import load_projection, map_coordinates, density_grid, sample_window, plot_music_map
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -13,12 +22,22 @@ st.set_page_config(
     layout="wide"
 )
 
+# Instrumentasi: tandai awal run halaman ini
+start_page("audio_features")
+
 # Menerapkan custom CSS
 with open("style/main.css") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
 
-# Load data
-df = load_and_prepare_data()
+# Load data: lagu per genre untuk distribusi per genre, lagu unik untuk scatter plot
+df = load_track_frame('playlist_genre')
+tracks, _ = load_track_tables()
+
+# Filter global dari sidebar, hasilnya di-cache per kombinasi filter
+render_global_filters()
+df = apply_global_filters(df, "genre_tracks")
+tracks = apply_global_filters(tracks, "tracks")
+stop_if_empty(df)
 
 # Header
 display_spotify_title("Analisis Fitur Audio", "🎚️")
@@ -32,78 +51,69 @@ st.markdown("""
 st.markdown("---")
 
 # Tabs untuk berbagai analisis
-tab1, tab2, tab3, tab4 = st.tabs(["💃 Danceability", "⚡ Energy", "😊 Valence", "🔍 Tempo & Duration"])
+tab1, tab2, tab3, tab4, tab5, tab6 = lazy_tabs(["💃 Danceability", "⚡ Energy", "😊 Valence", "🔍 Tempo & Duration",
+                                               "🔗 Korelasi", "🗺️ Peta Musik"], key="audio_tabs")
 
 # Tab 1: Danceability
-with tab1:
+if tab1:
     st.subheader("Analisis Danceability")
     
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown("""
-        <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
-            <h4 style="color: #1DB954;">Apa itu Danceability?</h4>
-            <p style="color: #FFFFFF;">
-                Danceability menggambarkan seberapa cocok lagu untuk menari berdasarkan kombinasi elemen musik seperti tempo, 
-                stabilitas ritme, kekuatan beat, dan keteraturan secara keseluruhan.
-                <br><br>
-                <strong>Skala:</strong> 0.0 (paling tidak cocok untuk menari) sampai 1.0 (paling cocok untuk menari)
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Filter genre
-        genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
-        selected_genre = st.selectbox("Filter Genre", genres, key="dance_genre")
+    # Fragment: mengganti genre hanya menjalankan ulang bagian ini, bukan seluruh halaman
+    @fragment
+    def danceability_distribution():
+        col1, col2 = st.columns([1, 2])
+    
+        with col1:
+            st.markdown("""
+            <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
+                <h4 style="color: #1DB954;">Apa itu Danceability?</h4>
+                <p style="color: #FFFFFF;">
+                    Danceability menggambarkan seberapa cocok lagu untuk menari berdasarkan kombinasi elemen musik seperti tempo, 
+                    stabilitas ritme, kekuatan beat, dan keteraturan secara keseluruhan.
+                    <br><br>
+                    <strong>Skala:</strong> 0.0 (paling tidak cocok untuk menari) sampai 1.0 (paling cocok untuk menari)
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
         
-        # Tambahkan informasi tambahan
-        spotify_card(
-            "Tahukah Kamu?",
-            "Lagu-lagu dengan danceability tinggi cenderung memiliki ritme yang stabil, beat yang kuat, dan tempo yang konsisten.",
-            "💡"
-        )
-    
-    with col2:
-        # Filter data berdasarkan genre
-        if selected_genre != "Semua Genre":
-            genre_df = df[df['playlist_genre'] == selected_genre]
-        else:
-            genre_df = df
+            # Filter genre
+            genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
+            selected_genre = st.selectbox("Filter Genre", genres, key="dance_genre")
         
-        # Histogram danceability
-        fig = px.histogram(
-            genre_df,
-            x="danceability",
-            color="playlist_genre" if selected_genre == "Semua Genre" else None,
-            nbins=30,
-            opacity=0.7,
-            title="Distribusi Danceability" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
-            labels={"danceability": "Danceability", "count": "Jumlah Lagu"}
-        )
+            # Tambahkan informasi tambahan
+            spotify_card(
+                "Tahukah Kamu?",
+                "Lagu-lagu dengan danceability tinggi cenderung memiliki ritme yang stabil, beat yang kuat, dan tempo yang konsisten.",
+                "💡"
+            )
+    
+        with col2:
+            # Hitungan histogram (per genre jika dipilih) dari layanan agregasi
+            counts = fetch("histogram", column="danceability",
+                           by="playlist_genre" if selected_genre == "Semua Genre" else None,
+                           genre=selected_genre if selected_genre != "Semua Genre" else None)["counts"]
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
-            height=400
-        )
+            # Histogram danceability
+            fig = histogram_counts_figure(
+                counts,
+                "danceability",
+                color="playlist_genre" if selected_genre == "Semua Genre" else None,
+                title="Distribusi Danceability" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
+                labels={"danceability": "Danceability", "count": "Jumlah Lagu"}
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
+
+    danceability_distribution()
     
     # Rata-rata danceability per genre
     st.subheader("Perbandingan Danceability antar Genre")
     
-    # Menghitung rata-rata danceability per genre
-    dance_avg = df.groupby('playlist_genre')['danceability'].mean().sort_values(ascending=False)
-    dance_std = df.groupby('playlist_genre')['danceability'].std()
-    
-    # Membuat dataframe untuk plotting
-    dance_stats = pd.DataFrame({
-        'genre': dance_avg.index,
-        'avg_danceability': dance_avg.values,
-        'std_danceability': dance_std.values
-    })
+    # Menghitung rata-rata dan standar deviasi danceability per genre dalam satu query
+    dance_stats = aggregate(df, 'playlist_genre', {
+        'avg_danceability': ('danceability', 'mean'),
+        'std_danceability': ('danceability', 'std')
+    }, order_by='avg_danceability', ascending=False).rename_axis('genre').reset_index()
     
     # Plot bar chart dengan error bars
     fig = go.Figure()
@@ -124,26 +134,23 @@ with tab1:
         title="Rata-rata Danceability per Genre (dengan Standar Deviasi)",
         xaxis_title="Genre",
         yaxis_title="Danceability",
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=500
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Hubungan danceability dengan popularitas
     st.subheader("Hubungan antara Danceability dan Popularitas")
     
     # Scatter plot danceability vs popularitas
-    fig = px.scatter(
+    fig = scatter_figure(
         df,
-        x="danceability",
-        y="track_popularity",
+        "danceability",
+        "track_popularity",
         color="playlist_genre",
         hover_name="track_name",
         hover_data=["track_artist"],
-        opacity=0.7,
+        marker_size=8,
         title="Danceability vs Popularitas Lagu",
         labels={
             "danceability": "Danceability",
@@ -154,18 +161,14 @@ with tab1:
         }
     )
     
-    # Tambahkan trend line
-    fig.update_traces(marker=dict(size=8))
-    
-    # Tambahkan garis regresi
-    fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=600
-    )
+    show_chart(fig)
     
-    st.plotly_chart(fig, use_container_width=True)
+    # Korelasi yang dihitung dari indeks korelasi (bukan hanya perkiraan visual)
+    correlation = load_correlation_index(tracks, current_view_version(), None)
+    pearson = correlation_frame(correlation, "pearson").loc["danceability", "track_popularity"]
+    spearman = correlation_frame(correlation, "spearman").loc["danceability", "track_popularity"]
+    st.caption(f"Korelasi danceability–popularitas: Pearson r = {pearson:.3f}, Spearman ρ = {spearman:.3f} "
+               f"({correlation_count(correlation):,} lagu)")
     
     # Penjelasan hubungan
     st.markdown("""
@@ -184,75 +187,69 @@ with tab1:
     """, unsafe_allow_html=True)
 
 # Tab 2: Energy
-with tab2:
+if tab2:
     st.subheader("Analisis Energy")
     
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown("""
-        <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
-            <h4 style="color: #1DB954;">Apa itu Energy?</h4>
-            <p style="color: #FFFFFF;">
-                Energy adalah ukuran dari 0.0 hingga 1.0 yang mewakili persepsi intensitas dan aktivitas.
-                Biasanya, lagu yang energik terasa cepat, keras, dan bising.
-                <br><br>
-                Misalnya, death metal memiliki energy tinggi, sedangkan prelude Bach mendapat skor rendah pada skala ini.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Fragment: mengganti genre hanya menjalankan ulang bagian ini, bukan seluruh halaman
+    @fragment
+    def energy_distribution():
+        col1, col2 = st.columns([1, 2])
+    
+        with col1:
+            st.markdown("""
+            <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
+                <h4 style="color: #1DB954;">Apa itu Energy?</h4>
+                <p style="color: #FFFFFF;">
+                    Energy adalah ukuran dari 0.0 hingga 1.0 yang mewakili persepsi intensitas dan aktivitas.
+                    Biasanya, lagu yang energik terasa cepat, keras, dan bising.
+                    <br><br>
+                    Misalnya, death metal memiliki energy tinggi, sedangkan prelude Bach mendapat skor rendah pada skala ini.
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
         
-        # Filter genre
-        genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
-        selected_genre = st.selectbox("Filter Genre", genres, key="energy_genre")
+            # Filter genre
+            genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
+            selected_genre = st.selectbox("Filter Genre", genres, key="energy_genre")
         
-        # Tambahkan informasi tambahan
-        spotify_card(
-            "Fitur Perseptual",
-            "Fitur yang berkontribusi pada atribut energy meliputi dynamic range, loudness, timbre, tingkat onset, dan entropi secara umum.",
-            "⚡"
-        )
-    
-    with col2:
-        # Filter data berdasarkan genre
-        if selected_genre != "Semua Genre":
-            genre_df = df[df['playlist_genre'] == selected_genre]
-        else:
-            genre_df = df
+            # Tambahkan informasi tambahan
+            spotify_card(
+                "Fitur Perseptual",
+                "Fitur yang berkontribusi pada atribut energy meliputi dynamic range, loudness, timbre, tingkat onset, dan entropi secara umum.",
+                "⚡"
+            )
+    
+        with col2:
+            # Hitungan histogram (per genre jika dipilih) dari layanan agregasi
+            counts = fetch("histogram", column="energy",
+                           by="playlist_genre" if selected_genre == "Semua Genre" else None,
+                           genre=selected_genre if selected_genre != "Semua Genre" else None)["counts"]
         
-        # Histogram energy
-        fig = px.histogram(
-            genre_df,
-            x="energy",
-            color="playlist_genre" if selected_genre == "Semua Genre" else None,
-            nbins=30,
-            opacity=0.7,
-            title="Distribusi Energy" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
-            labels={"energy": "Energy", "count": "Jumlah Lagu"}
-        )
+            # Histogram energy
+            fig = histogram_counts_figure(
+                counts,
+                "energy",
+                color="playlist_genre" if selected_genre == "Semua Genre" else None,
+                title="Distribusi Energy" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
+                labels={"energy": "Energy", "count": "Jumlah Lagu"}
+            )
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
-            height=400
-        )
-        
-        st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
+
+    energy_distribution()
     
     # Hubungan energy dengan loudness
     st.subheader("Hubungan antara Energy dan Loudness")
     
     # Scatter plot energy vs loudness dengan regresi
-    fig = px.scatter(
+    fig = scatter_figure(
         df,
-        x="energy",
-        y="loudness",
+        "energy",
+        "loudness",
         color="playlist_genre",
         hover_name="track_name",
         hover_data=["track_artist"],
-        opacity=0.7,
-        trendline="ols",
+        trendline=True,
         title="Energy vs Loudness (Kekuatan Suara)",
         labels={
             "energy": "Energy",
@@ -264,13 +261,10 @@ with tab2:
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=600
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Penjelasan hubungan
     st.markdown("""
@@ -289,119 +283,110 @@ with tab2:
     """, unsafe_allow_html=True)
 
 # Tab 3: Valence
-with tab3:
+if tab3:
     st.subheader("Analisis Valence (Mood/Suasana Musik)")
     
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown("""
-        <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
-            <h4 style="color: #1DB954;">Apa itu Valence?</h4>
-            <p style="color: #FFFFFF;">
-                Valence adalah ukuran dari 0.0 hingga 1.0 yang menggambarkan positivitas musik.
-                <br><br>
-                <strong>Valence Tinggi (0.7-1.0):</strong> Lagu terdengar lebih positif (senang, ceria, euforia)<br>
-                <strong>Valence Rendah (0.0-0.3):</strong> Lagu terdengar lebih negatif (sedih, depresi, marah)
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Filter genre
-        genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
-        selected_genre = st.selectbox("Filter Genre", genres, key="valence_genre")
+    # Fragment: filter genre dan opsi mood matrix hanya menjalankan ulang bagian ini
+    @fragment
+    def valence_distribution():
+        col1, col2 = st.columns([1, 2])
+    
+        with col1:
+            st.markdown("""
+            <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
+                <h4 style="color: #1DB954;">Apa itu Valence?</h4>
+                <p style="color: #FFFFFF;">
+                    Valence adalah ukuran dari 0.0 hingga 1.0 yang menggambarkan positivitas musik.
+                    <br><br>
+                    <strong>Valence Tinggi (0.7-1.0):</strong> Lagu terdengar lebih positif (senang, ceria, euforia)<br>
+                    <strong>Valence Rendah (0.0-0.3):</strong> Lagu terdengar lebih negatif (sedih, depresi, marah)
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
         
-        # Tambahkan opsi untuk melihat valence vs energy
-        show_energy = st.checkbox("Tampilkan hubungan dengan Energy", value=True)
-    
-    with col2:
-        # Filter data berdasarkan genre
-        if selected_genre != "Semua Genre":
-            genre_df = df[df['playlist_genre'] == selected_genre]
-        else:
-            genre_df = df
+            # Filter genre
+            genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
+            selected_genre = st.selectbox("Filter Genre", genres, key="valence_genre")
         
-        # Histogram valence
-        fig = px.histogram(
-            genre_df,
-            x="valence",
-            color="playlist_genre" if selected_genre == "Semua Genre" else None,
-            nbins=30,
-            opacity=0.7,
-            title="Distribusi Valence (Mood)" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
-            labels={"valence": "Valence", "count": "Jumlah Lagu"}
-        )
+            # Tambahkan opsi untuk melihat valence vs energy
+            show_energy = st.checkbox("Tampilkan hubungan dengan Energy", value=True)
+    
+        with col2:
+            # Hitungan histogram (per genre jika dipilih) dari layanan agregasi
+            counts = fetch("histogram", column="valence",
+                           by="playlist_genre" if selected_genre == "Semua Genre" else None,
+                           genre=selected_genre if selected_genre != "Semua Genre" else None)["counts"]
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
-            height=400
-        )
+            # Histogram valence
+            fig = histogram_counts_figure(
+                counts,
+                "valence",
+                color="playlist_genre" if selected_genre == "Semua Genre" else None,
+                title="Distribusi Valence (Mood)" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
+                labels={"valence": "Valence", "count": "Jumlah Lagu"}
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
     
-    # Valence vs Energy (Mood Matrix)
-    if show_energy:
-        st.subheader("Mood Matrix: Valence vs Energy")
+        # Valence vs Energy (Mood Matrix)
+        if show_energy:
+            st.subheader("Mood Matrix: Valence vs Energy")
         
-        # Scatter plot valence vs energy
-        fig = px.scatter(
-            df,
-            x="valence",
-            y="energy",
-            color="playlist_genre",
-            hover_name="track_name",
-            hover_data=["track_artist"],
-            opacity=0.7,
-            title="Mood Matrix (Valence vs Energy)",
-            labels={
-                "valence": "Valence (Positivity)",
-                "energy": "Energy",
-                "playlist_genre": "Genre"
-            }
-        )
+            # Scatter plot valence vs energy
+            fig = scatter_figure(
+                df,
+                "valence",
+                "energy",
+                color="playlist_genre",
+                hover_name="track_name",
+                hover_data=["track_artist"],
+                title="Mood Matrix (Valence vs Energy)",
+                labels={
+                    "valence": "Valence (Positivity)",
+                    "energy": "Energy",
+                    "playlist_genre": "Genre"
+                }
+            )
         
-        # Tambahkan anotasi untuk kuadran
-        fig.add_annotation(x=0.25, y=0.75, text="Angry/Tense", showarrow=False, font=dict(color="#E51D2A"))
-        fig.add_annotation(x=0.75, y=0.75, text="Happy/Excited", showarrow=False, font=dict(color="#1DB954"))
-        fig.add_annotation(x=0.25, y=0.25, text="Sad/Depressing", showarrow=False, font=dict(color="#B3B3B3"))
-        fig.add_annotation(x=0.75, y=0.25, text="Chill/Peaceful", showarrow=False, font=dict(color="#4688F2"))
+            # Tambahkan anotasi untuk kuadran
+            fig.add_annotation(x=0.25, y=0.75, text="Angry/Tense", showarrow=False, font=dict(color="#E51D2A"))
+            fig.add_annotation(x=0.75, y=0.75, text="Happy/Excited", showarrow=False, font=dict(color="#1DB954"))
+            fig.add_annotation(x=0.25, y=0.25, text="Sad/Depressing", showarrow=False, font=dict(color="#B3B3B3"))
+            fig.add_annotation(x=0.75, y=0.25, text="Chill/Peaceful", showarrow=False, font=dict(color="#4688F2"))
         
-        # Tambahkan garis untuk kuadran
-        fig.add_shape(type="line", x0=0.5, y0=0, x1=0.5, y1=1, line=dict(color="White", width=1, dash="dash"))
-        fig.add_shape(type="line", x0=0, y0=0.5, x1=1, y1=0.5, line=dict(color="White", width=1, dash="dash"))
+            # Tambahkan garis untuk kuadran
+            fig.add_shape(type="line", x0=0.5, y0=0, x1=0.5, y1=1, line=dict(color="White", width=1, dash="dash"))
+            fig.add_shape(type="line", x0=0, y0=0.5, x1=1, y1=0.5, line=dict(color="White", width=1, dash="dash"))
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
-            height=600
-        )
+            fig.update_layout(
+                height=600
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
         
-        # Penjelasan Mood Matrix
-        st.markdown("""
-        <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-top: 1rem;">
-            <h4 style="color: #1DB954;">Memahami Mood Matrix</h4>
-            <p style="color: #FFFFFF;">
-                Mood Matrix menggabungkan valence (positivitas) dan energy untuk mengkategorikan lagu berdasarkan mood/suasana:
-                <ul>
-                    <li><strong>Happy/Excited (Valence Tinggi, Energy Tinggi):</strong> Lagu yang ceria, semangat, euforia</li>
-                    <li><strong>Chill/Peaceful (Valence Tinggi, Energy Rendah):</strong> Lagu yang menenangkan, damai, santai</li>
-                    <li><strong>Angry/Tense (Valence Rendah, Energy Tinggi):</strong> Lagu yang intens, agresif, tegang</li>
-                    <li><strong>Sad/Depressing (Valence Rendah, Energy Rendah):</strong> Lagu yang sedih, melankolis, depresi</li>
-                </ul>
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+            # Penjelasan Mood Matrix
+            st.markdown("""
+            <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-top: 1rem;">
+                <h4 style="color: #1DB954;">Memahami Mood Matrix</h4>
+                <p style="color: #FFFFFF;">
+                    Mood Matrix menggabungkan valence (positivitas) dan energy untuk mengkategorikan lagu berdasarkan mood/suasana:
+                    <ul>
+                        <li><strong>Happy/Excited (Valence Tinggi, Energy Tinggi):</strong> Lagu yang ceria, semangat, euforia</li>
+                        <li><strong>Chill/Peaceful (Valence Tinggi, Energy Rendah):</strong> Lagu yang menenangkan, damai, santai</li>
+                        <li><strong>Angry/Tense (Valence Rendah, Energy Tinggi):</strong> Lagu yang intens, agresif, tegang</li>
+                        <li><strong>Sad/Depressing (Valence Rendah, Energy Rendah):</strong> Lagu yang sedih, melankolis, depresi</li>
+                    </ul>
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
+
+    valence_distribution()
     
     # Rata-rata valence per genre
     st.subheader("Mood Musik per Genre")
     
     # Menghitung rata-rata valence per genre
-    valence_avg = df.groupby('playlist_genre')['valence'].mean().sort_values()
+    valence_avg = aggregate_series(df, 'playlist_genre', 'valence', order_by='valence')
     
     # Bar chart untuk rata-rata valence
     fig = px.bar(
@@ -419,13 +404,10 @@ with tab3:
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=500
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Penjelasan valence per genre
     st.markdown("""
@@ -444,74 +426,64 @@ with tab3:
     """, unsafe_allow_html=True)
 
 # Tab 4: Tempo & Duration
-with tab4:
+if tab4:
     st.subheader("Analisis Tempo dan Durasi Lagu")
     
-    col1, col2 = st.columns([1, 2])
-    
-    with col1:
-        st.markdown("""
-        <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
-            <h4 style="color: #1DB954;">Apa itu Tempo?</h4>
-            <p style="color: #FFFFFF;">
-                Tempo adalah estimasi kecepatan atau pace dari sebuah lagu dalam beat per minute (BPM).
-                <br><br>
-                Dalam terminologi musik, tempo adalah kecepatan atau pace dari sebuah lagu dan berasal langsung dari durasi beat rata-rata.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        # Filter genre
-        genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
-        selected_genre = st.selectbox("Filter Genre", genres, key="tempo_genre")
+    # Fragment: mengganti genre hanya menjalankan ulang bagian ini, bukan seluruh halaman
+    @fragment
+    def tempo_distribution():
+        col1, col2 = st.columns([1, 2])
+    
+        with col1:
+            st.markdown("""
+            <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-bottom: 1rem;">
+                <h4 style="color: #1DB954;">Apa itu Tempo?</h4>
+                <p style="color: #FFFFFF;">
+                    Tempo adalah estimasi kecepatan atau pace dari sebuah lagu dalam beat per minute (BPM).
+                    <br><br>
+                    Dalam terminologi musik, tempo adalah kecepatan atau pace dari sebuah lagu dan berasal langsung dari durasi beat rata-rata.
+                </p>
+            </div>
+            """, unsafe_allow_html=True)
         
-        # Informasi tambahan
-        spotify_card(
-            "Durasi",
-            "Durasi lagu diukur dalam milidetik. Rata-rata lagu pop modern berdurasi sekitar 3-4 menit (180.000-240.000 ms).",
-            "⏱️"
-        )
-    
-    with col2:
-        # Filter data berdasarkan genre
-        if selected_genre != "Semua Genre":
-            genre_df = df[df['playlist_genre'] == selected_genre]
-        else:
-            genre_df = df
+            # Filter genre
+            genres = ["Semua Genre"] + sorted(df['playlist_genre'].unique().tolist())
+            selected_genre = st.selectbox("Filter Genre", genres, key="tempo_genre")
         
-        # Histogram tempo
-        fig = px.histogram(
-            genre_df,
-            x="tempo",
-            color="playlist_genre" if selected_genre == "Semua Genre" else None,
-            nbins=30,
-            opacity=0.7,
-            title="Distribusi Tempo" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
-            labels={"tempo": "Tempo (BPM)", "count": "Jumlah Lagu"}
-        )
+            # Informasi tambahan
+            spotify_card(
+                "Durasi",
+                "Durasi lagu diukur dalam milidetik. Rata-rata lagu pop modern berdurasi sekitar 3-4 menit (180.000-240.000 ms).",
+                "⏱️"
+            )
+    
+        with col2:
+            # Hitungan histogram (per genre jika dipilih) dari layanan agregasi
+            counts = fetch("histogram", column="tempo",
+                           by="playlist_genre" if selected_genre == "Semua Genre" else None,
+                           genre=selected_genre if selected_genre != "Semua Genre" else None)["counts"]
         
-        fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
-            height=400
-        )
+            # Histogram tempo
+            fig = histogram_counts_figure(
+                counts,
+                "tempo",
+                color="playlist_genre" if selected_genre == "Semua Genre" else None,
+                title="Distribusi Tempo" + (f" - {selected_genre}" if selected_genre != "Semua Genre" else ""),
+                labels={"tempo": "Tempo (BPM)", "count": "Jumlah Lagu"}
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+            show_chart(fig)
+
+    tempo_distribution()
     
     # Rata-rata tempo per genre
     st.subheader("Perbandingan Tempo antar Genre")
     
-    # Menghitung rata-rata tempo per genre
-    tempo_avg = df.groupby('playlist_genre')['tempo'].mean().sort_values()
-    tempo_std = df.groupby('playlist_genre')['tempo'].std()
-    
-    # Membuat dataframe untuk plotting
-    tempo_stats = pd.DataFrame({
-        'genre': tempo_avg.index,
-        'avg_tempo': tempo_avg.values,
-        'std_tempo': tempo_std.values
-    })
+    # Menghitung rata-rata dan standar deviasi tempo per genre dalam satu query
+    tempo_stats = aggregate(df, 'playlist_genre', {
+        'avg_tempo': ('tempo', 'mean'),
+        'std_tempo': ('tempo', 'std')
+    }, order_by='avg_tempo').rename_axis('genre').reset_index()
     
     # Plot tempo dengan error bars
     fig = go.Figure()
@@ -532,42 +504,19 @@ with tab4:
         title="Rata-rata Tempo per Genre (dengan Standar Deviasi)",
         xaxis_title="Genre",
         yaxis_title="Tempo (BPM)",
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=500
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Durasi lagu
     st.subheader("Analisis Durasi Lagu")
     
-    # Konversi durasi ke menit untuk visualisasi
-    df['duration_min'] = df['duration_ms'] / 60000
-    
-    # Box plot durasi per genre
-    fig = px.box(
-        df,
-        x="playlist_genre",
-        y="duration_min",
-        color="playlist_genre",
-        title="Distribusi Durasi Lagu per Genre",
-        labels={
-            "duration_min": "Durasi (menit)",
-            "playlist_genre": "Genre"
-        }
-    )
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=500,
-        showlegend=False
-    )
+    # Box plot durasi per genre dari ringkasan kuartil (eksak untuk data kecil, t-digest untuk data besar)
+    summary = quantile_summary(df, 'duration_min', 'playlist_genre', version=current_view_version(), name="genre_tracks")
+    fig = plot_quantile_box(summary, "Distribusi Durasi Lagu per Genre", "Genre", "Durasi (menit)")
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Penjelasan tempo dan durasi
     st.markdown("""
@@ -580,7 +529,7 @@ with tab4:
                 <li>Rock memiliki standar deviasi tempo yang tinggi, menunjukkan keberagaman tempo dalam genre ini</li>
                 <li>Lagu-lagu EDM umumnya lebih panjang durasinya, mungkin karena termasuk extended mixes</li>
                 <li>Pop cenderung memiliki durasi yang lebih konsisten, menunjukkan format radio-friendly</li>
-                <li>Outlier pada box plot menunjukkan lagu-lagu dengan durasi yang sangat panjang atau sangat pendek</li>
+                <li>Whisker pada box plot menjangkau durasi terpendek hingga terpanjang tiap genre; whisker yang jauh dari kotak menunjukkan adanya lagu dengan durasi yang sangat panjang atau sangat pendek</li>
             </ul>
         </p>
     </div>
@@ -589,15 +538,14 @@ with tab4:
     # Scatter plot tempo vs durasi
     st.subheader("Hubungan Tempo dengan Durasi")
     
-    fig = px.scatter(
+    fig = scatter_figure(
         df,
-        x="tempo",
-        y="duration_min",
+        "tempo",
+        "duration_min",
         color="playlist_genre",
         size="track_popularity",
         hover_name="track_name",
         hover_data=["track_artist"],
-        opacity=0.7,
         title="Tempo vs Durasi Lagu",
         labels={
             "tempo": "Tempo (BPM)",
@@ -608,13 +556,119 @@ with tab4:
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=600
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
+
+# Tab 5: Korelasi
+if tab5:
+    st.subheader("Matriks Korelasi Fitur Audio dan Popularitas")
+    
+    # Frame per level: lagu unik untuk keseluruhan, satu baris per (lagu, genre/subgenre) untuk per grup
+    correlation_frames = {
+        "Semua Lagu": lambda: tracks,
+        "Genre": lambda: df,
+        "Subgenre": lambda: apply_global_filters(load_track_frame('playlist_subgenre'), "subgenre_tracks")
+    }
+    
+    # Fragment: ganti metode/grup hanya membaca matriks dari indeks yang sudah di-cache
+    @fragment
+    def correlation_heatmap():
+        col1, col2 = st.columns([1, 3])
+    
+        with col1:
+            method_label = st.radio("Metode", list(CORRELATION_METHODS), horizontal=True, key="correlation_method")
+            level_label = st.selectbox("Kelompok", list(CORRELATION_LEVELS), key="correlation_level")
+            level = CORRELATION_LEVELS[level_label]
+            index = load_correlation_index(correlation_frames[level_label](), current_view_version(), level)
+            group = st.selectbox(level_label, index["groups"].tolist(), key=f"correlation_group_{level}") if level else None
+        
+            method = CORRELATION_METHODS[method_label]
+            matrix = correlation_frame(index, method, group)
+            count = correlation_count(index, group)
+        
+            spotify_card(
+                method_label,
+                "Pearson mengukur hubungan linear antar nilai, sedangkan Spearman mengukur hubungan monoton antar "
+                f"peringkat sehingga lebih tahan terhadap outlier. Dihitung dari {count:,} lagu.",
+                "🔗"
+            )
+    
+        with col2:
+            title = f"Korelasi {method_label}" + (f" - {group}" if group else " - Semua Lagu")
+            show_chart(plot_correlation_heatmap(matrix, title))
+    
+        # Pasangan dengan korelasi terkuat, keseluruhan dan terhadap popularitas
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("**Pasangan fitur dengan korelasi terkuat**")
+            st.dataframe(top_correlations(matrix, 5), hide_index=True, use_container_width=True,
+                         column_config={"correlation": st.column_config.NumberColumn("Korelasi", format="%.3f")})
+        with col2:
+            st.markdown("**Fitur yang paling berkorelasi dengan popularitas**")
+            st.dataframe(top_correlations(matrix, 5, feature="track_popularity"), hide_index=True, use_container_width=True,
+                         column_config={"correlation": st.column_config.NumberColumn("Korelasi", format="%.3f")})
+
+    correlation_heatmap()
+
+# Tab 6: Peta Musik
+if tab6:
+    st.subheader("Peta Musik: Proyeksi 2-D Fitur Audio")
+    
+    # Proyeksi PCA dihitung sekali per versi dataset; filter global hanya memilih koordinat lagu yang tersisa
+    projection = load_projection()
+    coords = map_coordinates(projection, tracks)
+    
+    # Batas slider dari seluruh lagu agar tetap stabil saat filter berubah
+    bounds = projection["coords"].agg(['min', 'max'])
+    pc1_bounds = (float(np.floor(bounds.loc['min', 'pc1'])), float(np.ceil(bounds.loc['max', 'pc1'])))
+    pc2_bounds = (float(np.floor(bounds.loc['min', 'pc2'])), float(np.ceil(bounds.loc['max', 'pc2'])))
+    
+    # Fragment: zoom jendela dan sampel titik hanya menghitung ulang grid peta
+    @fragment
+    def music_map():
+        col1, col2 = st.columns([1, 3])
+    
+        with col1:
+            pc1_range = st.slider("Rentang PC1", *pc1_bounds, pc1_bounds, step=0.1, key="map_pc1")
+            pc2_range = st.slider("Rentang PC2", *pc2_bounds, pc2_bounds, step=0.1, key="map_pc2")
+            show_points = st.checkbox("Tampilkan sampel lagu", value=True, key="map_points")
+        
+            spotify_card(
+                "Cara Membaca Peta",
+                "Setiap sel menunjukkan jumlah lagu dengan karakter audio serupa. Persempit rentang PC1/PC2 "
+                "untuk memperbesar area tertentu dan melihat lagu-lagu di dalamnya.",
+                "🗺️"
+            )
+    
+        with col2:
+            counts, x_edges, y_edges = density_grid(coords, pc1_range, pc2_range)
+            points = None
+            rows, total = sample_window(coords, pc1_range, pc2_range)
+            if show_points and len(rows):
+                # Lagu dengan beberapa genre tampil sebagai titik di setiap genre-nya
+                keys = coords.index.to_numpy()[rows]
+                points = df.loc[df['track_key'].isin(keys), ['track_key', 'track_name', 'track_artist', 'playlist_genre']]
+                points = points.join(coords[['pc1', 'pc2']], on='track_key')
+        
+            show_chart(plot_music_map(counts, x_edges, y_edges, projection["explained"], points))
+            st.caption(f"{total:,} lagu di area ini" + (f", {len(rows):,} ditampilkan sebagai titik" if points is not None else ""))
+
+    music_map()
+    
+    # Kontribusi fitur pada setiap komponen
+    st.subheader("Kontribusi Fitur pada Komponen Utama")
+    st.dataframe(
+        projection["loadings"].rename(index=lambda f: f.replace('_', ' ').capitalize()),
+        use_container_width=True,
+        column_config={c: st.column_config.NumberColumn(c, format="%.3f") for c in ["PC1", "PC2"]}
+    )
+    st.caption(f"PC1 dan PC2 menjelaskan {projection['explained'][:2].sum():.0%} varians fitur audio yang distandarisasi "
+               f"({projection['rows']:,} lagu)")
+
+# Metrik performa (toggle di sidebar) dan ekspor file metrik
+render_metrics_overlay()
 
 # Footer
 display_footer() 
\ No newline at end of file
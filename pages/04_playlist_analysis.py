@@ -3,8 +3,25 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import numpy as np
-from helpers.utils import (display_spotify_title, spotify_card, display_footer,
+from helpers.utils import (display_spotify_title, lazy_tabs, spotify_card, display_footer,
                           load_and_prepare_data, plot_mood_radar)
+from helpers.instrumentation import start_page, show_chart, render_metrics_overlay, fragment
+from helpers.query import aggregate, aggregate_series
+from helpers.filters import (render_global_filters, apply_global_filters,
+                             current_view_version, stop_if_empty)
+from helpers.similarity import SIMILARITY_LEVELS, SIMILARITY_METRICS
+from helpers.playlists import (PROFILE_FEATURES, load_playlist_profiles, songs_per_playlist_by_genre,
+                               playlist_options, playlist_page)
+from helpers.api import fetch
+from helpers.sketches import distinct_count, quantile_summary, plot_quantile_box
+from helpers.clustering import (MOOD_CLUSTERS, MOOD_CLUSTER_OPTIONS, load_mood_clusters, with_mood_cluster,
+                                plot_cluster_radar)
+
+# Jumlah maksimum entitas yang ditampilkan pada heatmap kemiripan
+HEATMAP_SIZE = 20
+
+# Nama playlist yang dipilih default pada perbandingan playlist individual
+DEFAULT_PLAYLISTS = ("RapCaviar", "Rock Classics")
 
 # Konfigurasi halaman
 st.set_page_config(
@@ -13,6 +30,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# Instrumentasi: tandai awal run halaman ini
+start_page("playlist_analysis")
+
 # Menerapkan custom CSS
 with open("style/main.css") as f:
     st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
@@ -20,6 +40,14 @@ with open("style/main.css") as f:
 # Load data
 df = load_and_prepare_data()
 
+# Filter global dari sidebar, hasilnya di-cache per kombinasi filter
+render_global_filters()
+df = apply_global_filters(df, "playlist_rows")
+stop_if_empty(df)
+
+# Profil per playlist (jumlah lagu, rata-rata/varians fitur, distribusi popularitas, komposisi genre)
+profiles = load_playlist_profiles(df, current_view_version())
+
 # Header
 display_spotify_title("Analisis Playlist", "📊")
 
@@ -32,10 +60,11 @@ st.markdown("""
 st.markdown("---")
 
 # Tabs untuk berbagai analisis
-tab1, tab2, tab3 = st.tabs(["📋 Overview Playlist", "🎯 Perbandingan Playlist", "🧩 Subgenre Analysis"])
+tab1, tab2, tab3, tab4 = lazy_tabs(["📋 Overview Playlist", "🎯 Perbandingan Playlist", "🧩 Subgenre Analysis",
+                                   "🎭 Mood Cluster"], key="playlist_tabs")
 
 # Tab 1: Overview Playlist
-with tab1:
+if tab1:
     st.subheader("Overview Playlist")
     
     # Ringkasan statistik playlist
@@ -55,18 +84,15 @@ with tab1:
         )
         
         fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
             legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     with col2:
         # Jumlah playlist per genre
-        playlist_counts = df.groupby('playlist_genre')['playlist_id'].nunique().reset_index()
-        playlist_counts.columns = ['genre', 'count']
+        playlist_counts = distinct_count(df, 'playlist_key', by='playlist_genre', version=current_view_version(),
+                                         name="playlist_rows").rename('count').rename_axis('genre').reset_index()
         
         fig = px.bar(
             playlist_counts,
@@ -78,13 +104,10 @@ with tab1:
         )
         
         fig.update_layout(
-            plot_bgcolor='rgba(40,40,40,0.8)',
-            paper_bgcolor='rgba(40,40,40,0.8)',
-            font_color='white',
             showlegend=False
         )
         
-        st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
     
     # Informasi tentang playlist
     st.subheader("Informasi Playlist")
@@ -93,7 +116,7 @@ with tab1:
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        total_playlists = df['playlist_id'].nunique()
+        total_playlists = len(profiles)
         st.markdown(f"""
         <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
             <div style="font-size: 3rem; color: #1DB954; margin-bottom: 0.5rem;">{total_playlists}</div>
@@ -102,7 +125,7 @@ with tab1:
         """, unsafe_allow_html=True)
     
     with col2:
-        avg_songs = int(df.groupby('playlist_id')['track_id'].count().mean())
+        avg_songs = int(profiles['track_count'].mean())
         st.markdown(f"""
         <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
             <div style="font-size: 3rem; color: #1DB954; margin-bottom: 0.5rem;">{avg_songs}</div>
@@ -111,7 +134,7 @@ with tab1:
         """, unsafe_allow_html=True)
     
     with col3:
-        total_subgenres = df['playlist_subgenre'].nunique()
+        total_subgenres = distinct_count(df, 'playlist_subgenre', version=current_view_version(), name="playlist_rows")
         st.markdown(f"""
         <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; text-align: center; margin-bottom: 1rem;">
             <div style="font-size: 3rem; color: #1DB954; margin-bottom: 0.5rem;">{total_subgenres}</div>
@@ -122,27 +145,12 @@ with tab1:
     # Statistik lagu per playlist berdasarkan genre
     st.subheader("Lagu per Playlist berdasarkan Genre")
     
-    songs_per_playlist = df.groupby(['playlist_genre', 'playlist_id'])['track_id'].count().reset_index()
-    songs_per_playlist.columns = ['genre', 'playlist_id', 'song_count']
-    
-    fig = px.box(
-        songs_per_playlist,
-        x='genre',
-        y='song_count',
-        color='genre',
-        title="Distribusi Jumlah Lagu per Playlist",
-        labels={'song_count': 'Jumlah Lagu', 'genre': 'Genre'}
-    )
+    songs_per_playlist = songs_per_playlist_by_genre(profiles)
+    summary = quantile_summary(songs_per_playlist, 'song_count', 'genre')
     
-    fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=500,
-        showlegend=False
-    )
+    fig = plot_quantile_box(summary, "Distribusi Jumlah Lagu per Playlist", "Genre", "Jumlah Lagu")
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Insight tentang playlist
     st.markdown("""
@@ -161,53 +169,105 @@ with tab1:
     """, unsafe_allow_html=True)
 
 # Tab 2: Perbandingan Playlist
-with tab2:
+if tab2:
     st.subheader("Perbandingan Karakteristik Playlist")
     
     # Pilih playlist untuk dibandingkan
-    col1, col2 = st.columns([1, 2])
+    # Fragment radar genre dan playlist (pilihan fitur audio dipakai keduanya)
+    @fragment
+    def radar_comparison():
+        col1, col2 = st.columns([1, 2])
     
-    with col1:
-        # Filter genre
-        genres = sorted(df['playlist_genre'].unique())
-        selected_genres = st.multiselect("Pilih Genre", genres, default=genres[:2])
+        with col1:
+            # Filter genre
+            genres = sorted(df['playlist_genre'].unique())
+            selected_genres = st.multiselect("Pilih Genre", genres, default=genres[:2])
         
-        # Pilih fitur audio untuk dibandingkan
-        audio_features = ["danceability", "energy", "acousticness", "valence", "speechiness", "instrumentalness", "liveness"]
-        selected_features = st.multiselect("Pilih Fitur Audio", audio_features, default=audio_features)
+            # Pilih fitur audio untuk dibandingkan
+            audio_features = ["danceability", "energy", "acousticness", "valence", "speechiness", "instrumentalness", "liveness"]
+            selected_features = st.multiselect("Pilih Fitur Audio", audio_features, default=audio_features)
         
-        # Informasi tentang perbandingan
-        spotify_card(
-            "Cara Membaca Radar Chart",
-            "Radar chart memungkinkan perbandingan beberapa dimensi fitur audio secara bersamaan. Semakin jauh dari pusat, semakin tinggi nilai fitur tersebut.",
-            "📊"
-        )
+            # Informasi tentang perbandingan
+            spotify_card(
+                "Cara Membaca Radar Chart",
+                "Radar chart memungkinkan perbandingan beberapa dimensi fitur audio secara bersamaan. Semakin jauh dari pusat, semakin tinggi nilai fitur tersebut.",
+                "📊"
+            )
     
-    with col2:
-        if selected_genres and selected_features:
-            # Hitung rata-rata fitur audio untuk setiap genre
-            genre_features = df[df['playlist_genre'].isin(selected_genres)].groupby('playlist_genre')[selected_features].mean()
+        with col2:
+            if selected_genres and selected_features:
+                # Hitung rata-rata fitur audio untuk setiap genre
+                genre_features = aggregate(df, 'playlist_genre', {f: (f, 'mean') for f in selected_features},
+                                           where=[('playlist_genre', 'in', selected_genres)], name="playlist_rows")
             
-            # Tampilkan data dalam bentuk radar chart
-            fig = go.Figure()
+                # Tampilkan data dalam bentuk radar chart
+                fig = go.Figure()
+            
+                for genre in genre_features.index:
+                    fig.add_trace(go.Scatterpolar(
+                        r=genre_features.loc[genre, :].values,
+                        theta=selected_features,
+                        fill='toself',
+                        name=genre
+                    ))
+            
+                fig.update_layout(
+                    polar=dict(
+                        radialaxis=dict(
+                            visible=True,
+                            range=[0, 1]
+                        )
+                    ),
+                    title="Perbandingan Karakteristik Audio antar Genre Playlist",
+                    showlegend=True,
+                    legend=dict(
+                        orientation="h",
+                        yanchor="bottom",
+                        y=1.02,
+                        xanchor="right",
+                        x=1
+                    ),
+                    height=500
+                )
             
-            for genre in genre_features.index:
+                show_chart(fig)
+            else:
+                st.info("Pilih setidaknya satu genre dan satu fitur audio untuk melihat perbandingan")
+    
+        # Perbandingan playlist individual dari tabel profil
+        st.subheader("Perbandingan Playlist Individual")
+    
+        options = playlist_options(profiles)
+        default_playlists = [key for key in options if profiles.at[key, 'playlist_name'] in DEFAULT_PLAYLISTS]
+        selected_playlists = st.multiselect(
+            "Pilih Playlist untuk Dibandingkan",
+            list(options.keys()),
+            default=default_playlists or list(options.keys())[:2],
+            format_func=options.get
+        )
+    
+        if selected_playlists and selected_features:
+            # Lookup langsung ke profil, tanpa group-by ulang
+            playlist_features = profiles.loc[selected_playlists, [f"{f}_mean" for f in selected_features]]
+        
+            fig = go.Figure()
+        
+            for playlist_key, values in zip(playlist_features.index, playlist_features.values):
                 fig.add_trace(go.Scatterpolar(
-                    r=genre_features.loc[genre, :].values,
+                    r=values,
                     theta=selected_features,
                     fill='toself',
-                    name=genre
+                    name=options[playlist_key]
                 ))
-            
+        
             fig.update_layout(
                 polar=dict(
                     radialaxis=dict(
                         visible=True,
                         range=[0, 1]
-                    ),
-                    bgcolor='rgba(40,40,40,0.8)'
+                    )
                 ),
-                title="Perbandingan Karakteristik Audio antar Genre Playlist",
+                title="Perbandingan Karakteristik Audio antar Playlist",
                 showlegend=True,
                 legend=dict(
                     orientation="h",
@@ -216,20 +276,60 @@ with tab2:
                     xanchor="right",
                     x=1
                 ),
-                paper_bgcolor='rgba(40,40,40,0.8)',
-                font_color='white',
                 height=500
             )
-            
-            st.plotly_chart(fig, use_container_width=True)
+        
+            show_chart(fig)
         else:
-            st.info("Pilih setidaknya satu genre dan satu fitur audio untuk melihat perbandingan")
+            st.info("Pilih setidaknya satu playlist dan satu fitur audio untuk melihat perbandingan")
+
+    radar_comparison()
+    
+    # Tabel profil playlist dengan paging
+    st.subheader("Profil Playlist")
+    
+    # Fragment: urutan dan halaman tabel tidak menjalankan ulang grafik lain
+    @fragment
+    def playlist_profile_table():
+        sort_columns = {
+            "Jumlah Lagu": "track_count",
+            "Rata-rata Popularitas": "track_popularity_mean",
+            "Median Popularitas": "pop_median",
+            **{f.capitalize(): f"{f}_mean" for f in PROFILE_FEATURES}
+        }
+    
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            sort_label = st.selectbox("Urutkan Berdasarkan", list(sort_columns.keys()))
+        with col2:
+            page_size = st.selectbox("Baris per Halaman", [25, 50, 100])
+        with col3:
+            n_pages = max(1, -(-len(profiles) // page_size))
+            page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, value=1)
+    
+        st.dataframe(
+            playlist_page(profiles, page, page_size, sort_columns[sort_label])[
+                ['playlist_name', 'playlist_genre', 'track_count', 'track_popularity_mean', 'pop_median'] +
+                [f"{f}_mean" for f in PROFILE_FEATURES]
+            ],
+            use_container_width=True,
+            column_config={
+                "playlist_name": "Playlist",
+                "playlist_genre": "Genre",
+                "track_count": "Jumlah Lagu",
+                "track_popularity_mean": st.column_config.NumberColumn("Rata-rata Popularitas", format="%.1f"),
+                "pop_median": st.column_config.NumberColumn("Median Popularitas", format="%.1f"),
+                **{f"{f}_mean": st.column_config.NumberColumn(f.capitalize(), format="%.3f") for f in PROFILE_FEATURES}
+            }
+        )
+
+    playlist_profile_table()
     
     # Perbandingan popularitas playlist
     st.subheader("Perbandingan Popularitas antar Playlist")
     
     # Hitung rata-rata popularitas per genre dan subgenre
-    popularity_by_subgenre = df.groupby(['playlist_genre', 'playlist_subgenre'])['track_popularity'].mean().reset_index()
+    popularity_by_subgenre = aggregate_series(df, ['playlist_genre', 'playlist_subgenre'], 'track_popularity').reset_index()
     
     # Plot popularitas
     fig = px.treemap(
@@ -243,13 +343,10 @@ with tab2:
     )
     
     fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
         height=600
     )
     
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig)
     
     # Penjelasan treemap
     st.markdown("""
@@ -268,213 +365,305 @@ with tab2:
     """, unsafe_allow_html=True)
     
     # Analisis similarities antar playlist
-    st.subheader("Kemiripan antar Playlist Genre")
-    
-    # Hitung rata-rata fitur audio untuk setiap genre
-    genre_feat_avg = df.groupby('playlist_genre')[audio_features].mean()
+    st.subheader("Kemiripan antar Genre, Subgenre, Playlist dan Artis")
     
-    # Buat matriks jarak (disimilarity) menggunakan korelasi
-    from scipy.spatial.distance import pdist, squareform
+    # Fragment: level, metrik dan entitas acuan hanya menghitung ulang bagian kemiripan
+    @fragment
+    def similarity_section():
+        col1, col2, col3 = st.columns(3)
     
-    # Hitung jarak euclidean antar genre
-    dist_matrix = pd.DataFrame(
-        squareform(pdist(genre_feat_avg.values, 'euclidean')),
-        columns=genre_feat_avg.index,
-        index=genre_feat_avg.index
-    )
-    
-    # Konversi ke similarity (semakin dekat ke 1, semakin mirip)
-    max_dist = dist_matrix.max().max()
-    similarity_matrix = 1 - (dist_matrix / max_dist)
+        with col1:
+            similarity_level = st.selectbox("Level Kemiripan", list(SIMILARITY_LEVELS.keys()))
     
-    # Plot heatmap
-    fig = px.imshow(
-        similarity_matrix,
-        text_auto='.2f',
-        color_continuous_scale='Viridis',
-        title="Matriks Kemiripan antar Genre Playlist",
-        labels=dict(x="Genre", y="Genre", color="Similarity")
-    )
+        with col2:
+            similarity_metric = st.selectbox("Metrik Kemiripan", list(SIMILARITY_METRICS.keys()))
+    
+        # Indeks kemiripan (top-k tetangga) dihitung sekali per versi data oleh layanan agregasi
+        similarity = dict(level=SIMILARITY_LEVELS[similarity_level], metric=SIMILARITY_METRICS[similarity_metric],
+                          size=HEATMAP_SIZE)
+        entities = fetch("similarity", **similarity)["entities"]['entity'].tolist()
+    
+        # Untuk entitas yang banyak, heatmap hanya menampilkan entitas acuan dan tetangga terdekatnya
+        anchor = None
+        with col3:
+            if len(entities) > HEATMAP_SIZE:
+                anchor = st.selectbox(f"{similarity_level} Acuan", entities)
+    
+        result = fetch("similarity", anchor=anchor, **similarity)
+        similarity_matrix = result["matrix"].set_index('entity').rename_axis(None)
+        heatmap_labels = similarity_matrix.index
+    
+        # Plot heatmap
+        fig = px.imshow(
+            similarity_matrix,
+            text_auto='.2f' if len(heatmap_labels) <= 10 else False,
+            color_continuous_scale='Viridis',
+            title=f"Matriks Kemiripan antar {similarity_level}",
+            labels=dict(x=similarity_level, y=similarity_level, color="Similarity")
+        )
     
-    fig.update_layout(
-        plot_bgcolor='rgba(40,40,40,0.8)',
-        paper_bgcolor='rgba(40,40,40,0.8)',
-        font_color='white',
-        height=500
-    )
+        fig.update_layout(
+            height=500 if len(heatmap_labels) <= 10 else 700
+        )
     
-    st.plotly_chart(fig, use_container_width=True)
+        show_chart(fig)
+    
+        # Tabel tetangga terdekat untuk entitas acuan
+        if anchor is not None:
+            st.markdown(f"**{similarity_level} paling mirip dengan {anchor}**")
+            st.dataframe(
+                result["neighbors"],
+                use_container_width=True,
+                column_config={
+                    "entity": similarity_level,
+                    "similarity": st.column_config.NumberColumn("Similarity", format="%.3f"),
+                    "song_count": "Jumlah Lagu"
+                }
+            )
+
+    similarity_section()
     
     # Penjelasan matriks kemiripan
     st.markdown("""
     <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-top: 1rem;">
         <h4 style="color: #1DB954;">Memahami Matriks Kemiripan</h4>
         <p style="color: #FFFFFF;">
-            Matriks kemiripan menunjukkan seberapa mirip karakteristik audio antar genre playlist:
+            Matriks kemiripan menunjukkan seberapa mirip karakteristik audio antar genre, subgenre, playlist atau artis:
             <ul>
                 <li>Nilai mendekati 1.0 (lebih cerah) menunjukkan kemiripan yang tinggi</li>
                 <li>Nilai mendekati 0.0 (lebih gelap) menunjukkan perbedaan yang besar</li>
-                <li>Diagonal utama selalu 1.0 karena genre identik dengan dirinya sendiri</li>
-                <li>Kemiripan tinggi mengindikasikan karakteristik audio yang serupa antar genre</li>
+                <li>Diagonal utama selalu 1.0 karena setiap entitas identik dengan dirinya sendiri</li>
+                <li>Kemiripan tinggi mengindikasikan karakteristik audio yang serupa antar entitas</li>
+                <li>Untuk level dengan banyak entitas, heatmap menampilkan entitas acuan dan tetangga terdekatnya yang dikelompokkan dengan hierarchical clustering</li>
             </ul>
         </p>
     </div>
     """, unsafe_allow_html=True)
 
 # Tab 3: Subgenre Analysis
-with tab3:
+if tab3:
     st.subheader("Analisis Subgenre")
     
-    # Pilih genre untuk analisis subgenre
-    genre_for_subgenre = st.selectbox("Pilih Genre", sorted(df['playlist_genre'].unique()))
+    # Fragment: pilihan genre hanya menjalankan ulang analisis subgenre
+    @fragment
+    def subgenre_analysis():
+        # Pilih genre untuk analisis subgenre
+        genre_for_subgenre = st.selectbox("Pilih Genre", sorted(df['playlist_genre'].unique()))
     
-    if genre_for_subgenre:
-        # Filter data untuk genre yang dipilih
-        genre_df = df[df['playlist_genre'] == genre_for_subgenre]
+        if genre_for_subgenre:
+            # Jumlah lagu dan rata-rata popularitas per subgenre untuk genre yang dipilih (layanan agregasi)
+            subgenre_stats = fetch("subgenre-stats", genre=genre_for_subgenre)["subgenres"]
+            subgenre_counts = subgenre_stats.set_index('playlist_subgenre')['songs'].sort_values(ascending=False)
         
-        # Hitung jumlah lagu per subgenre
-        subgenre_counts = genre_df['playlist_subgenre'].value_counts()
+            col1, col2 = st.columns([1, 1])
         
-        col1, col2 = st.columns([1, 1])
-        
-        with col1:
-            # Pie chart untuk distribusi subgenre
-            fig = px.pie(
-                values=subgenre_counts.values,
-                names=subgenre_counts.index,
-                title=f"Distribusi Subgenre dalam {genre_for_subgenre}",
-                color_discrete_sequence=px.colors.qualitative.Pastel
-            )
+            with col1:
+                # Pie chart untuk distribusi subgenre
+                fig = px.pie(
+                    values=subgenre_counts.values,
+                    names=subgenre_counts.index,
+                    title=f"Distribusi Subgenre dalam {genre_for_subgenre}",
+                    color_discrete_sequence=px.colors.qualitative.Pastel
+                )
             
-            fig.update_layout(
-                plot_bgcolor='rgba(40,40,40,0.8)',
-                paper_bgcolor='rgba(40,40,40,0.8)',
-                font_color='white',
-                legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
-            )
+                fig.update_layout(
+                    legend=dict(orientation="h", yanchor="bottom", y=-0.3, xanchor="center", x=0.5)
+                )
             
-            st.plotly_chart(fig, use_container_width=True)
+                show_chart(fig)
         
-        with col2:
-            # Popularitas per subgenre
-            subgenre_popularity = genre_df.groupby('playlist_subgenre')['track_popularity'].mean().sort_values(ascending=False)
+            with col2:
+                # Popularitas per subgenre
+                subgenre_popularity = subgenre_stats.set_index('playlist_subgenre')['track_popularity'].sort_values(ascending=False)
             
-            fig = px.bar(
-                x=subgenre_popularity.index,
-                y=subgenre_popularity.values,
-                color=subgenre_popularity.values,
-                color_continuous_scale='Viridis',
-                title=f"Popularitas Subgenre dalam {genre_for_subgenre}",
-                labels={'x': 'Subgenre', 'y': 'Popularitas', 'color': 'Popularitas'}
-            )
+                fig = px.bar(
+                    x=subgenre_popularity.index,
+                    y=subgenre_popularity.values,
+                    color=subgenre_popularity.values,
+                    color_continuous_scale='Viridis',
+                    title=f"Popularitas Subgenre dalam {genre_for_subgenre}",
+                    labels={'x': 'Subgenre', 'y': 'Popularitas', 'color': 'Popularitas'}
+                )
             
-            fig.update_layout(
-                plot_bgcolor='rgba(40,40,40,0.8)',
-                paper_bgcolor='rgba(40,40,40,0.8)',
-                font_color='white',
-                xaxis={'tickangle': 45},
-                height=400
-            )
+                fig.update_layout(
+                    xaxis={'tickangle': 45},
+                    height=400
+                )
             
-            st.plotly_chart(fig, use_container_width=True)
+                show_chart(fig)
         
-        # Radar chart untuk subgenre
-        st.subheader(f"Karakteristik Audio Subgenre dalam {genre_for_subgenre}")
+            # Radar chart untuk subgenre
+            st.subheader(f"Karakteristik Audio Subgenre dalam {genre_for_subgenre}")
         
-        # Pilih subgenre untuk perbandingan
-        subgenres = sorted(genre_df['playlist_subgenre'].unique())
-        selected_subgenres = st.multiselect("Pilih Subgenre untuk Dibandingkan", subgenres, default=subgenres[:min(3, len(subgenres))])
+            # Daftar subgenre dipakai oleh kedua fragment di bawah
+            subgenres = sorted(subgenre_stats['playlist_subgenre'])
         
-        if selected_subgenres:
-            # Fitur audio untuk perbandingan
-            audio_features = ["danceability", "energy", "acousticness", "valence", "speechiness", "instrumentalness", "liveness"]
+            # Fragment bersarang: pilihan subgenre hanya menggambar ulang radar chart
+            @fragment
+            def subgenre_radar():
+                # Pilih subgenre untuk perbandingan
+                selected_subgenres = st.multiselect("Pilih Subgenre untuk Dibandingkan", subgenres, default=subgenres[:min(3, len(subgenres))])
+        
+                if selected_subgenres:
+                    # Fitur audio untuk perbandingan
+                    audio_features = ["danceability", "energy", "acousticness", "valence", "speechiness", "instrumentalness", "liveness"]
             
-            # Hitung rata-rata fitur audio untuk setiap subgenre
-            subgenre_features = genre_df[genre_df['playlist_subgenre'].isin(selected_subgenres)].groupby('playlist_subgenre')[audio_features].mean()
+                    # Hitung rata-rata fitur audio untuk setiap subgenre
+                    subgenre_features = aggregate(df, 'playlist_subgenre', {f: (f, 'mean') for f in audio_features},
+                                                  where=[('playlist_genre', '==', genre_for_subgenre),
+                                                         ('playlist_subgenre', 'in', selected_subgenres)],
+                                                  name="playlist_rows")
             
-            # Tampilkan radar chart
-            fig = go.Figure()
+                    # Tampilkan radar chart
+                    fig = go.Figure()
             
-            for subgenre in subgenre_features.index:
-                fig.add_trace(go.Scatterpolar(
-                    r=subgenre_features.loc[subgenre, :].values,
-                    theta=audio_features,
-                    fill='toself',
-                    name=subgenre
-                ))
+                    for subgenre in subgenre_features.index:
+                        fig.add_trace(go.Scatterpolar(
+                            r=subgenre_features.loc[subgenre, :].values,
+                            theta=audio_features,
+                            fill='toself',
+                            name=subgenre
+                        ))
             
-            fig.update_layout(
-                polar=dict(
-                    radialaxis=dict(
-                        visible=True,
-                        range=[0, 1]
-                    ),
-                    bgcolor='rgba(40,40,40,0.8)'
-                ),
-                title=f"Perbandingan Karakteristik Audio antar Subgenre {genre_for_subgenre}",
-                showlegend=True,
-                legend=dict(
-                    orientation="h",
-                    yanchor="bottom",
-                    y=1.02,
-                    xanchor="right",
-                    x=1
-                ),
-                paper_bgcolor='rgba(40,40,40,0.8)',
-                font_color='white',
-                height=600
-            )
+                    fig.update_layout(
+                        polar=dict(
+                            radialaxis=dict(
+                                visible=True,
+                                range=[0, 1]
+                            )
+                        ),
+                        title=f"Perbandingan Karakteristik Audio antar Subgenre {genre_for_subgenre}",
+                        showlegend=True,
+                        legend=dict(
+                            orientation="h",
+                            yanchor="bottom",
+                            y=1.02,
+                            xanchor="right",
+                            x=1
+                        ),
+                        height=600
+                    )
             
-            st.plotly_chart(fig, use_container_width=True)
+                    show_chart(fig)
+
+            subgenre_radar()
         
-        # Top artis per subgenre
-        st.subheader(f"Top Artis per Subgenre dalam {genre_for_subgenre}")
+            # Top artis per subgenre
+            st.subheader(f"Top Artis per Subgenre dalam {genre_for_subgenre}")
         
-        # Pilih subgenre
-        selected_subgenre = st.selectbox("Pilih Subgenre", subgenres)
+            # Fragment bersarang: pilihan subgenre hanya menggambar ulang top artis
+            @fragment
+            def subgenre_top_artists():
+                # Pilih subgenre
+                selected_subgenre = st.selectbox("Pilih Subgenre", subgenres)
         
-        if selected_subgenre:
-            # Filter data untuk subgenre yang dipilih
-            subgenre_df = genre_df[genre_df['playlist_subgenre'] == selected_subgenre]
+                if selected_subgenre:
+                    # Hitung rata-rata popularitas per artis dalam subgenre yang dipilih
+                    artist_popularity = aggregate_series(df, 'track_artist', 'track_popularity',
+                                                         where=[('playlist_genre', '==', genre_for_subgenre),
+                                                                ('playlist_subgenre', '==', selected_subgenre)],
+                                                         order_by='track_popularity', ascending=False, limit=10,
+                                                         name="playlist_rows")
             
-            # Hitung rata-rata popularitas per artis
-            artist_popularity = subgenre_df.groupby('track_artist')['track_popularity'].mean().sort_values(ascending=False).head(10)
+                    # Plot top artis
+                    fig = px.bar(
+                        x=artist_popularity.values,
+                        y=artist_popularity.index,
+                        orientation='h',
+                        color=artist_popularity.values,
+                        color_continuous_scale='Viridis',
+                        title=f"Top 10 Artis di Subgenre {selected_subgenre}",
+                        labels={'x': 'Popularitas', 'y': 'Artis', 'color': 'Popularitas'}
+                    )
             
-            # Plot top artis
-            fig = px.bar(
-                x=artist_popularity.values,
-                y=artist_popularity.index,
-                orientation='h',
-                color=artist_popularity.values,
-                color_continuous_scale='Viridis',
-                title=f"Top 10 Artis di Subgenre {selected_subgenre}",
-                labels={'x': 'Popularitas', 'y': 'Artis', 'color': 'Popularitas'}
-            )
+                    fig.update_layout(
+                        height=500
+                    )
             
-            fig.update_layout(
-                plot_bgcolor='rgba(40,40,40,0.8)',
-                paper_bgcolor='rgba(40,40,40,0.8)',
-                font_color='white',
-                height=500
-            )
+                    show_chart(fig)
             
-            st.plotly_chart(fig, use_container_width=True)
-            
-            # Penjelasan top artis
-            st.markdown(f"""
-            <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-top: 1rem;">
-                <h4 style="color: #1DB954;">Top Artis di {selected_subgenre}</h4>
-                <p style="color: #FFFFFF;">
-                    Graf di atas menunjukkan artis paling populer di subgenre {selected_subgenre}. Artis ini:
-                    <ul>
-                        <li>Memiliki rata-rata popularitas lagu tertinggi dalam subgenre ini</li>
-                        <li>Mungkin menjadi pengaruh utama dalam bentuk dan arah subgenre</li>
-                        <li>Sering dimasukkan ke dalam playlist {selected_subgenre}</li>
-                        <li>Mungkin mewakili "sound" khas dari subgenre ini</li>
-                    </ul>
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
+                    # Penjelasan top artis
+                    st.markdown(f"""
+                    <div style="background-color: #282828; padding: 1.5rem; border-radius: 10px; margin-top: 1rem;">
+                        <h4 style="color: #1DB954;">Top Artis di {selected_subgenre}</h4>
+                        <p style="color: #FFFFFF;">
+                            Graf di atas menunjukkan artis paling populer di subgenre {selected_subgenre}. Artis ini:
+                            <ul>
+                                <li>Memiliki rata-rata popularitas lagu tertinggi dalam subgenre ini</li>
+                                <li>Mungkin menjadi pengaruh utama dalam bentuk dan arah subgenre</li>
+                                <li>Sering dimasukkan ke dalam playlist {selected_subgenre}</li>
+                                <li>Mungkin mewakili "sound" khas dari subgenre ini</li>
+                            </ul>
+                        </p>
+                    </div>
+                    """, unsafe_allow_html=True)
+
+            subgenre_top_artists()
+
+    subgenre_analysis()
+
+# Tab 4: Mood Cluster
+if tab4:
+    st.subheader("Klaster Mood Lagu")
+
+    # Fragment klaster: jumlah klaster, filter klaster, radar centroid dan komposisi genre
+    @fragment
+    def mood_clusters():
+        col1, col2 = st.columns([1, 2])
+
+        with col1:
+            n_clusters = st.selectbox("Jumlah Klaster", MOOD_CLUSTER_OPTIONS,
+                                      index=MOOD_CLUSTER_OPTIONS.index(MOOD_CLUSTERS), key="mood_cluster_count")
+            clusters = load_mood_clusters(n_clusters)
+            selected_clusters = st.multiselect("Pilih Klaster", clusters["names"], default=clusters["names"],
+                                               key=f"mood_cluster_selected_{n_clusters}")
+
+            spotify_card(
+                "Tentang Klaster Mood",
+                "Lagu dikelompokkan dengan mini-batch k-means atas valence, energy, danceability, acousticness dan instrumentalness. Nama klaster mengikuti kuadran valence/energy dan fitur yang menonjol.",
+                "🎭"
+            )
+
+        if not selected_clusters:
+            st.info("Pilih setidaknya satu klaster untuk melihat profilnya")
+            return
+
+        # Baris playlist (sudah difilter global) diberi label klaster lewat track_key, lalu difilter per klaster
+        rows = with_mood_cluster(df, clusters)
+        rows = rows[rows['mood_cluster'].isin(selected_clusters)]
+
+        with col2:
+            show_chart(plot_cluster_radar(clusters, selected_clusters))
+
+        # Komposisi genre playlist per klaster (lagu unik)
+        composition = aggregate(rows, ['mood_cluster', 'playlist_genre'],
+                                {'songs': ('track_key', 'nunique')}).reset_index()
+        fig = px.bar(
+            composition,
+            x='mood_cluster',
+            y='songs',
+            color='playlist_genre',
+            title="Komposisi Genre per Klaster Mood",
+            labels={'mood_cluster': 'Klaster', 'songs': 'Jumlah Lagu', 'playlist_genre': 'Genre'},
+            category_orders={'mood_cluster': selected_clusters},
+            height=500
+        )
+        show_chart(fig)
+
+        # Lagu terpopuler di klaster terpilih
+        st.markdown("#### Lagu Terpopuler di Klaster Terpilih")
+        top_tracks = (rows.drop_duplicates('track_key')
+                      .nlargest(20, 'track_popularity')
+                      [['track_name', 'track_artist', 'playlist_genre', 'mood_cluster', 'track_popularity']])
+        st.dataframe(top_tracks.rename(columns={'track_name': 'Judul', 'track_artist': 'Artis',
+                                                'playlist_genre': 'Genre', 'mood_cluster': 'Klaster',
+                                                'track_popularity': 'Popularitas'}),
+                     hide_index=True, use_container_width=True)
+
+    mood_clusters()
+
+# Metrik performa (toggle di sidebar) dan ekspor file metrik
+render_metrics_overlay()
 
 # Footer
 display_footer() 
\ No newline at end of file
@@ -0,0 +1,34 @@
+import pytest
+
+from helpers.filters import apply_global_filters
+from helpers.utils import load_track_tables, load_track_frame
+
+# Kombinasi filter global (format global_filter_key) yang melibatkan kolom keanggotaan playlist
+KEYS = [
+    (("playlist_subgenre", ("hard rock",)),),
+    (("playlist_genre", ("rock", "pop")), ("playlist_subgenre", ("hard rock", "dance pop", "album rock"))),
+    (("playlist_subgenre", ("hard rock", "trap")), ("year", (2000, 2015))),
+    (("playlist_genre", ("rock",)), ("track_popularity", (20, 80))),
+]
+
+
+# Acuan: baris subgenre_tracks yang lolos filter (frame ini memuat genre dan subgenre)
+def _reference(key):
+    frame = apply_global_filters(load_track_frame('playlist_subgenre'), "subgenre_tracks", key)
+    return frame[['track_key', 'playlist_genre']].drop_duplicates()
+
+
+@pytest.mark.parametrize("key", KEYS)
+def test_genre_tracks_membership_filter(key):
+    filtered = apply_global_filters(load_track_frame('playlist_genre'), "genre_tracks", key)
+    expected = _reference(key)
+    assert len(filtered) == len(expected)
+    assert set(zip(filtered['track_key'], filtered['playlist_genre'])) == \
+        set(zip(expected['track_key'], expected['playlist_genre']))
+
+
+@pytest.mark.parametrize("key", KEYS)
+def test_tracks_membership_filter(key):
+    tracks, _ = load_track_tables()
+    filtered = apply_global_filters(tracks, "tracks", key)
+    assert set(filtered.index) == set(_reference(key)['track_key'])
@@ -0,0 +1,21 @@
+import numpy as np
+import plotly.graph_objects as go
+
+from helpers.payload import HOVER_MAX_CHARS, optimize_figure
+
+LONG_TEXT = "Judul lagu yang sangat panjang untuk label akhir peringkat di chart"
+
+
+# Label yang tampil di chart (text) tetap utuh; teks hover dan customdata dipotong
+def test_visible_text_kept_hover_truncated():
+    labels = np.array([LONG_TEXT, "pendek"], dtype=object)
+    fig = go.Figure([
+        go.Scatter(x=[1, 2], y=[1, 2], mode="lines+markers+text", text=labels, hovertext=labels,
+                   customdata=np.array([[LONG_TEXT], ["pendek"]], dtype=object)),
+        go.Bar(x=[1, 2], y=[3, 4], text=labels, textposition="outside"),
+    ])
+    optimize_figure(fig)
+    scatter, bar = fig.data
+    assert list(scatter.text) == list(labels) and list(bar.text) == list(labels)
+    assert len(scatter.hovertext[0]) == HOVER_MAX_CHARS and scatter.hovertext[0].endswith("…")
+    assert len(scatter.customdata[0][0]) == HOVER_MAX_CHARS and scatter.hovertext[1] == "pendek"
@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import helpers.filters as filters
+from helpers.query import aggregate
+
+
+def _frame(seed, n=2_000):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'playlist_genre': rng.choice(["pop", "rock", "rap", "edm"], n),
+        'year': rng.integers(1990, 2021, n).astype(float),
+        'track_popularity': rng.integers(0, 101, n),
+    })
+
+
+# Mencatat frame yang dilayani lewat FilterIndex.frame (bukan mask)
+@pytest.fixture
+def served(monkeypatch):
+    frames = []
+    original = filters.FilterIndex.frame
+
+    def frame(self, **predicates):
+        frames.append(self.df)
+        return original(self, **predicates)
+
+    monkeypatch.setattr(filters.FilterIndex, "frame", frame)
+    return frames
+
+
+# Dua frame berbeda nama dengan nama ukuran yang sama: masing-masing memakai indeksnya sendiri
+def test_named_frames_with_shared_measure_names(served):
+    measures = {'track_popularity': ('track_popularity', 'mean'), 'songs': ('year', 'count')}
+    where = [('playlist_genre', 'in', ["pop", "rock"]), ('year', '>=', 2000.0)]
+    frames = {"query_test_a": _frame(1), "query_test_b": _frame(2)}
+    for name, df in frames.items():
+        result = aggregate(df, 'playlist_genre', measures, where=where, name=name, version="query-test")
+        subset = df[df['playlist_genre'].isin(["pop", "rock"]) & (df['year'] >= 2000)]
+        expected = subset.groupby('playlist_genre').agg(**measures)
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+    assert [id(df) for df in served] == [id(df) for df in frames.values()]
+
+
+# Tanpa nama frame tidak ada indeks yang dibuat atau disimpan di cache
+def test_unnamed_frame_uses_mask(monkeypatch, served):
+    calls = []
+    monkeypatch.setattr(filters, "load_filter_index", lambda *args: calls.append(args))
+    df = _frame(3)
+    result = aggregate(df, 'playlist_genre', {'track_popularity': ('track_popularity', 'mean')},
+                       where=[('playlist_genre', '==', "rap")])
+    assert result.index.tolist() == ["rap"]
+    assert calls == [] and served == []
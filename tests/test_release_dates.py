@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from helpers.utils import parse_release_dates
+
+
+@pytest.mark.parametrize("value, date, year, month, precision", [
+    ("2019-06-14", "2019-06-14", 2019, 6, 3),
+    ("2019-06", "2019-06-01", 2019, 6, 2),
+    ("2019", "2019-01-01", 2019, 0, 1),
+    ("2019-02-30", "2019-02-01", 2019, 2, 2),
+    ("2020-02-29", "2020-02-29", 2020, 2, 3),
+    ("2019-13", "2019-01-01", 2019, 0, 1),
+    ("1678-01-01", "1678-01-01", 1678, 1, 3),
+    ("2261-12-31", "2261-12-31", 2261, 12, 3),
+])
+def test_valid_dates(value, date, year, month, precision):
+    result = parse_release_dates(pd.Series([value])).iloc[0]
+    assert result["date"] == pd.Timestamp(date)
+    assert (result["year"], result["month"], result["precision"]) == (year, month, precision)
+
+
+# Tahun di luar rentang datetime64[ns] tidak boleh "membungkus" ke tanggal lain
+@pytest.mark.parametrize("value", ["0000", "1500-01-01", "1677-12-31", "2262-01-01", "9999-12-31",
+                                   "", None, np.nan, "abc", "19-06-14"])
+def test_invalid_dates(value):
+    result = parse_release_dates(pd.Series([value], dtype=object)).iloc[0]
+    assert pd.isna(result["date"]) and pd.isna(result["year"])
+    assert (result["month"], result["precision"]) == (0, 0)
+
+
+# Hasil sama dengan pd.to_datetime(format='mixed') untuk setiap tanggal lengkap yang bisa di-parse keduanya
+def test_matches_pandas_mixed():
+    values = pd.Series(["2019-06-14", "2018", "2017-03", "1999-12-31", "2000-02-29", "1678-01-01", "bad"] * 3)
+    parsed = parse_release_dates(values)
+    expected = pd.to_datetime(values, format='mixed', errors='coerce')
+    full = parsed["precision"] == 3
+    assert (parsed.loc[full, "date"] == expected[full]).all()
+    assert parsed.index.equals(values.index)
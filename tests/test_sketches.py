@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from helpers.sketches import (hll_registers, hll_estimate, hll_relative_error, tdigest, merge_tdigests,
+                              tdigest_quantiles, tdigest_rank_error)
+
+# Kuantil yang dicek, termasuk ekor
+QUANTILES = np.array([0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 0.999])
+
+# Distribusi nilai untuk t-digest: simetris, miring dan berekor panjang
+DISTRIBUTIONS = {
+    "uniform": lambda rng, n: rng.random(n),
+    "normal": lambda rng, n: rng.normal(50, 10, n),
+    "exponential": lambda rng, n: rng.exponential(1.0, n),
+    "lognormal": lambda rng, n: rng.lognormal(0, 1.5, n),
+}
+
+
+def _hll_error(estimate, truth):
+    return abs(estimate - truth) / truth
+
+
+# Galat rank: posisi empiris nilai kuantil hasil t-digest dibandingkan kuantil yang diminta
+def _rank_errors(values, estimates):
+    ordered = np.sort(values)
+    low = np.searchsorted(ordered, estimates, side='left') / len(ordered)
+    high = np.searchsorted(ordered, estimates, side='right') / len(ordered)
+    return np.maximum(np.maximum(low - QUANTILES, QUANTILES - high), 0)
+
+
+@pytest.mark.parametrize("cardinality", [100, 1_000, 30_000, 300_000])
+def test_hll_error_within_bound(cardinality):
+    rng = np.random.default_rng(cardinality)
+    values = rng.permutation(np.repeat(np.arange(cardinality), 3))
+    registers = hll_registers(values, np.zeros(len(values), dtype=np.int64), 1)
+    assert _hll_error(hll_estimate(registers)[0], cardinality) <= 3 * hll_relative_error()
+
+
+def test_hll_strings_per_group():
+    rng = np.random.default_rng(7)
+    sizes = [500, 5_000, 50_000]
+    values = np.concatenate([np.array([f"track-{g}-{i}" for i in range(size)], dtype=object)
+                             for g, size in enumerate(sizes)])
+    codes = np.repeat(np.arange(len(sizes)), sizes)
+    order = rng.permutation(len(values))
+    estimates = hll_estimate(hll_registers(values[order], codes[order], len(sizes)))
+    for estimate, size in zip(estimates, sizes):
+        assert _hll_error(estimate, size) <= 3 * hll_relative_error()
+
+
+# Register dari dua potongan data yang digabung (max) sama dengan register seluruh data
+def test_hll_merged():
+    rng = np.random.default_rng(11)
+    values = rng.integers(0, 80_000, 200_000)
+    codes = np.zeros(len(values), dtype=np.int64)
+    half = len(values) // 2
+    merged = np.maximum(hll_registers(values[:half], codes[:half], 1), hll_registers(values[half:], codes[half:], 1))
+    np.testing.assert_array_equal(merged, hll_registers(values, codes, 1))
+    assert _hll_error(hll_estimate(merged)[0], len(np.unique(values))) <= 3 * hll_relative_error()
+
+
+@pytest.mark.parametrize("distribution", list(DISTRIBUTIONS))
+def test_tdigest_rank_error_within_bound(distribution):
+    rng = np.random.default_rng(3)
+    values = DISTRIBUTIONS[distribution](rng, 100_000)
+    digest = tdigest(values, np.zeros(len(values), dtype=np.int64), 1)
+    estimates = tdigest_quantiles(digest, QUANTILES)[0]
+    assert _rank_errors(values, estimates).max() <= tdigest_rank_error()
+
+
+@pytest.mark.parametrize("distribution", list(DISTRIBUTIONS))
+def test_tdigest_merged(distribution):
+    rng = np.random.default_rng(5)
+    # Potongan dengan sebaran berbeda agar penggabungan benar-benar menggeser kuantil
+    parts = [DISTRIBUTIONS[distribution](rng, 60_000), DISTRIBUTIONS[distribution](rng, 40_000) * 2 + 1,
+             DISTRIBUTIONS[distribution](rng, 20_000)]
+    digests = [tdigest(part, np.zeros(len(part), dtype=np.int64), 1) for part in parts]
+    merged = digests[0]
+    for digest in digests[1:]:
+        merged = merge_tdigests(merged, digest)
+    values = np.concatenate(parts)
+    estimates = tdigest_quantiles(merged, QUANTILES)[0]
+    assert _rank_errors(values, estimates).max() <= tdigest_rank_error()
+
+
+def test_tdigest_per_group():
+    rng = np.random.default_rng(9)
+    groups = [rng.normal(0, 1, 30_000), rng.exponential(5, 10_000), rng.random(500)]
+    values = np.concatenate(groups)
+    codes = np.repeat(np.arange(len(groups)), [len(group) for group in groups])
+    estimates = tdigest_quantiles(tdigest(values, codes, len(groups)), QUANTILES)
+    for group, row in zip(groups, estimates):
+        assert _rank_errors(group, row).max() <= tdigest_rank_error()